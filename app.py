@@ -1,9 +1,16 @@
 # streamlit_app/app.py
 
+import time
+
 import streamlit as st
 from streamlit_option_menu import option_menu
-from utils import load_model, format_metrics, set_particle_background 
-import os
+from utils import set_particle_background
+from assets import show_image
+from page_router import render_page
+from instrumentation import observe, start_exporters
+
+rerun_start = time.perf_counter()
+start_exporters()  # Prometheus endpoint / file, if configured (once per process)
 
 # -------------------- Page Config --------------------
 # Configure the main Streamlit app settings
@@ -63,7 +70,7 @@ html, body, [data-testid="stAppViewContainer"] {
 # -------------------- Sidebar --------------------
 # Add branding, app title, and description to sidebar
 with st.sidebar:
-    st.image("assets/heart.gif", width=120)  # Heart animation/logo
+    show_image("assets/heart.gif", width=120, alt="Heart")  # Heart animation/logo (static WebP once built)
     st.markdown("## ❤️ **Self Heart Risk Predictor**")
     st.markdown("### 🧠 *AI-Powered Health Companion*")
     st.markdown("---")
@@ -76,8 +83,8 @@ st.markdown('<div class="option-menu-sticky">', unsafe_allow_html=True)
 # Navigation bar with options
 selected = option_menu(
     menu_title=None,
-    options=["🏡 Home", "🩺 Predictor", "📊 Compare", "🔍 SHAP Insights", "📁 MLflow Stats"],
-    icons=["house", "activity", "bar-chart", "search", "folder2"],
+    options=["🏡 Home", "🩺 Predictor", "📦 Batch", "📊 Compare", "🔍 SHAP Insights", "📁 MLflow Stats"],
+    icons=["house", "activity", "files", "bar-chart", "search", "folder2"],
     orientation="horizontal",
     styles={
         "container": {"background-color": "#f9f9f9", "padding": "5px"},
@@ -87,12 +94,7 @@ selected = option_menu(
 
 st.markdown('</div>', unsafe_allow_html=True)
 
-# -------------------- Page Imports --------------------
-# Import page-specific modules
-from my_pages.page1_predictor import predictor_page
-from my_pages.page2_compare_models import compare_models_page
-from my_pages.page3_shap_insights import shap_insights_page
-from my_pages.page4_mlflow_stats import mlflow_stats_page
+set_particle_background()  # Animated background particles, mounted once per session
 
 # -------------------- Routing --------------------
 # Display content based on selected page
@@ -114,25 +116,17 @@ if selected == "🏡 Home":
         </style>
     """, unsafe_allow_html=True)
 
-    set_particle_background()  # Optional animated background particles
-
     # Home page UI
     st.markdown("<h1 style='text-align: center;'>💖 Welcome to Heart Risk Predictor</h1>", unsafe_allow_html=True)
-    st.image("assets/welcome_banner.gif", use_container_width=True)
+    show_image("assets/welcome_banner.gif", use_container_width=True, alt="Welcome")
     st.markdown("""
     <div style='text-align: center; font-size: 20px; margin-top: 20px;'>
         Empowering lives with AI.<br><br>Choose a page above to begin exploring your health insights!
     </div>
     """, unsafe_allow_html=True)
 
-elif selected == "🩺 Predictor":
-    predictor_page()  # Load predictor page
-
-elif selected == "📊 Compare":
-    compare_models_page()  # Load model comparison page
-
-elif selected == "🔍 SHAP Insights":
-    shap_insights_page()  # Load SHAP insights page
+else:
+    # Other pages: import the page module on first use only
+    render_page(selected)
 
-elif selected == "📁 MLflow Stats":
-    mlflow_stats_page()  # Load MLflow stats page
+observe("app_rerun", time.perf_counter() - rerun_start)
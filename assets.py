@@ -0,0 +1,199 @@
+# assets.py
+#
+# Media assets for the UI.
+#   - JSON assets (Lottie animations) are parsed once per file version and
+#     shared by every session in the process.
+#   - GIFs and the static SHAP plots are transcoded at build time into WebP files with
+#     content-hashed names under static/, served by Streamlit's static file
+#     serving (/app/static/...). Browsers fetch each file once and revalidate
+#     it with ETag / Last-Modified instead of receiving it again on each rerun.
+#     Because the names change whenever the content does, a proxy or CDN in
+#     front of the app can cache /app/static/ forever.
+#   - If the build has not been run, pages fall back to the original files.
+#
+# Usage:
+#     python assets.py build
+
+import argparse
+import hashlib
+import io
+import json
+import os
+
+import streamlit as st
+
+from model_registry import BASE_DIR, ModelRegistry
+
+
+ASSETS_DIR = os.path.join(BASE_DIR, "assets")
+STATIC_DIR = os.path.join(BASE_DIR, "static")
+MANIFEST_PATH = os.path.join(STATIC_DIR, "manifest.json")
+STATIC_URL = "app/static"
+
+# Images to build (paths relative to the project root) and their options:
+#   max_width  - largest width it is displayed at (2x for high-DPI screens)
+#   background - flatten transparency onto this color (alpha is expensive in animated WebP)
+#   lossless   - keep exact pixels (plots with text)
+BUILD_OPTIONS = {
+    "assets/heart.gif": {"max_width": 240, "background": "#ffe5e5"},  # Sidebar logo (120 px)
+    "assets/welcome_banner.gif": {},                                  # Home banner, full width
+    "shap_plots/shap_summary_bar.png": {"max_width": 1400, "lossless": True},
+    "shap_plots/shap_summary_dot.png": {"max_width": 1400, "lossless": True},
+}
+WEBP_QUALITY = 60
+MAX_FPS = 20  # Faster animations are decimated (frame durations are merged)
+
+
+# -------------------- 📦 PARSED ASSETS -------------------- #
+
+def _load_json(path):
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except ValueError:
+        return None  # Cached too, so a broken file is not re-parsed on every rerun
+
+
+# Same mtime/hash-keyed caching as the models, with JSON loaders
+asset_store = ModelRegistry(loader=_load_json)
+
+
+def load_json_asset(name):
+    """
+    Returns a parsed JSON asset (e.g. a Lottie animation), or None if missing/invalid.
+
+    Shared across sessions: do not mutate the result.
+    """
+    path = os.path.join(ASSETS_DIR, name)
+    if not os.path.exists(path):
+        return None
+    return asset_store.get(path)
+
+
+# -------------------- 🖼️ STATIC MEDIA -------------------- #
+
+def static_url(name):
+    """
+    Returns the served URL of the built version of an asset, or None if not built.
+
+    Args:
+        name (str): Source path relative to the project root (e.g. "assets/heart.gif").
+    """
+    if not os.path.exists(MANIFEST_PATH):
+        return None
+    built = (asset_store.get(MANIFEST_PATH) or {}).get(name)
+    if built is None or not os.path.exists(os.path.join(STATIC_DIR, built)):
+        return None
+    return f"{STATIC_URL}/{built}"
+
+
+def show_image(name, width=None, use_container_width=False, alt="", caption=None):
+    """
+    Displays an image asset, from static serving when built, else via `st.image`.
+
+    Args:
+        name (str): Source path relative to the project root.
+        width (int): Display width in pixels.
+        use_container_width (bool): Stretch to the container width.
+        alt (str): Alternative text.
+        caption (str): Caption shown below the image.
+    """
+    url = static_url(name)
+    if url is None:
+        st.image(os.path.join(BASE_DIR, name), width=width, use_container_width=use_container_width, caption=caption)
+        return
+    style = "width: 100%;" if use_container_width else (f"width: {width}px;" if width else "")
+    st.markdown(f'<img src="{url}" alt="{alt or caption or ""}" style="{style}">', unsafe_allow_html=True)
+    if caption:
+        st.caption(caption)
+
+
+# -------------------- 🏗️ BUILD -------------------- #
+
+def transcode_image(path, max_width=None, background=None, lossless=False, quality=WEBP_QUALITY, max_fps=MAX_FPS):
+    """
+    Converts an image (animated GIFs included) to WebP bytes, keeping animation timing.
+
+    Args:
+        path (str): Source image.
+        max_width (int): Downscale frames wider than this.
+        background (str): Flatten transparency onto this color (e.g. "#ffe5e5").
+        lossless (bool): Lossless encoding (ignores `quality`).
+        quality (int): WebP quality (0-100).
+        max_fps (float): Merge consecutive frames shorter than 1/max_fps seconds.
+
+    Returns:
+        bytes: The encoded WebP file.
+    """
+    from PIL import Image, ImageSequence
+
+    min_duration = 1000 / max_fps
+    with Image.open(path) as image:
+        frames, durations = [], []
+        for frame in ImageSequence.Iterator(image):
+            duration = frame.info.get("duration", image.info.get("duration", 100))
+            if durations and durations[-1] < min_duration:
+                durations[-1] += duration  # Extend the previous frame instead
+                continue
+            frame = frame.convert("RGBA")
+            if max_width and frame.width > max_width:
+                frame = frame.resize((max_width, round(frame.height * max_width / frame.width)), Image.LANCZOS)
+            if background:
+                flat = Image.new("RGBA", frame.size, background)
+                flat.alpha_composite(frame)
+                frame = flat.convert("RGB")
+            frames.append(frame)
+            durations.append(duration)
+        buffer = io.BytesIO()
+        frames[0].save(buffer, format="WEBP", save_all=True, append_images=frames[1:],
+                       duration=durations, loop=image.info.get("loop", 0), lossless=lossless,
+                       quality=quality, method=4)
+    return buffer.getvalue()
+
+
+def build_static_assets(options=BUILD_OPTIONS, quality=WEBP_QUALITY):
+    """
+    Transcodes every image in `options` into static/<stem>.<hash>.webp and writes the manifest.
+
+    Returns:
+        dict: {source path: (original bytes, built bytes)}
+    """
+    os.makedirs(STATIC_DIR, exist_ok=True)
+    manifest, sizes = {}, {}
+    for name, image_options in options.items():
+        source = os.path.join(BASE_DIR, name)
+        if not os.path.exists(source):
+            continue
+        data = transcode_image(source, quality=quality, **image_options)
+        stem = os.path.splitext(os.path.basename(name))[0]
+        built = f"{stem}.{hashlib.sha256(data).hexdigest()[:10]}.webp"
+
+        # Drop previous builds of the same asset
+        for old in os.listdir(STATIC_DIR):
+            if old.startswith(f"{stem}.") and old.endswith(".webp") and old != built:
+                os.remove(os.path.join(STATIC_DIR, old))
+        with open(os.path.join(STATIC_DIR, built), "wb") as f:
+            f.write(data)
+
+        manifest[name] = built
+        sizes[name] = (os.path.getsize(source), len(data))
+
+    with open(MANIFEST_PATH, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+    return sizes
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build optimized, content-hashed static assets.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    build = sub.add_parser("build", help="Transcode GIFs and SHAP plots to WebP in static/")
+    build.add_argument("--quality", type=int, default=WEBP_QUALITY, help="WebP quality (0-100)")
+    args = parser.parse_args(argv)
+
+    if args.command == "build":
+        for name, (before, after) in build_static_assets(quality=args.quality).items():
+            print(f"✅ {name}: {before / 1024:.0f} KB -> {after / 1024:.0f} KB ({before / after:.1f}x smaller)")
+
+
+if __name__ == "__main__":
+    main()
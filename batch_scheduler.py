@@ -0,0 +1,186 @@
+# batch_scheduler.py
+#
+# In-process micro-batching for concurrent predictor sessions. Every Streamlit
+# session runs in its own thread; instead of each one calling predict_proba on
+# a 1-row DataFrame, sessions submit rows to a shared queue. A background
+# worker collects requests for up to `max_wait_ms` or `max_batch_rows` rows,
+# scores them in one call and resolves each request's future.
+#
+# Configure with $HEART_BATCH_MAX_ROWS and $HEART_BATCH_MAX_WAIT_MS.
+
+import os
+import queue
+import threading
+import time
+from collections import Counter
+from concurrent.futures import Future
+
+import numpy as np
+
+from instrumentation import register_collector, timed
+from model_registry import get_predictor
+from utils import DEFAULT_THRESHOLD
+
+
+MAX_BATCH_ROWS = int(os.environ.get("HEART_BATCH_MAX_ROWS", 64))
+MAX_WAIT_MS = float(os.environ.get("HEART_BATCH_MAX_WAIT_MS", 2.0))
+
+_STOP = object()
+
+
+def _bucket(n):
+    """Power-of-two histogram bucket (upper bound) for a count."""
+    return 1 << max(int(n) - 1, 0).bit_length()
+
+
+class MicroBatcher:
+    """
+    Thread-safe request queue plus one worker thread that scores in batches.
+
+    Args:
+        predictor_fn (callable): Returns the object used for scoring (called once per batch,
+            so hot-swapped models are picked up).
+        max_batch_rows (int): Upper bound on rows scored in one call.
+        max_wait_ms (float): How long the worker waits for more requests after the first
+            (skipped while the server is idle enough that requests arrive one at a time).
+    """
+
+    def __init__(self, predictor_fn=get_predictor, max_batch_rows=MAX_BATCH_ROWS, max_wait_ms=MAX_WAIT_MS):
+        self.predictor_fn = predictor_fn
+        self.max_batch_rows = max_batch_rows
+        self.max_wait = max_wait_ms / 1000
+        self._queue = queue.Queue()
+        self._batch_sizes = Counter()   # rows per batch (power-of-two buckets)
+        self._queue_depths = Counter()  # requests waiting when a batch starts
+        self._requests = 0
+        self._batches = 0
+        self._last_batch_requests = 0
+        self._stats_lock = threading.Lock()
+        self._thread = threading.Thread(target=self._run, name="micro-batcher", daemon=True)
+        self._thread.start()
+
+    # -------------------- 📥 SUBMIT -------------------- #
+
+    def submit(self, features, threshold=DEFAULT_THRESHOLD):
+        """
+        Queues rows for scoring.
+
+        Args:
+            features (pd.DataFrame | np.ndarray): Preprocessed rows, shape (n, f) or (f,).
+            threshold (float): Probability above which a row is labelled high risk.
+
+        Returns:
+            Future: Resolves to (probabilities, 0/1 labels) for these rows.
+        """
+        X = np.asarray(features, dtype=np.float64)
+        if X.ndim == 1:
+            X = X.reshape(1, -1)
+        future = Future()
+        self._queue.put((X, threshold, future))
+        return future
+
+    def predict_risk(self, features, threshold=DEFAULT_THRESHOLD, timeout=None):
+        """Batched drop-in for `utils.predict_risk`: (probability, label) of the first row."""
+        proba, labels = self.submit(features, threshold).result(timeout)
+        return float(proba[0]), int(labels[0])
+
+    # -------------------- ⚙️ WORKER -------------------- #
+
+    def _collect(self, first, depth):
+        batch, rows = [first], len(first[0])
+        # Under low load (nothing queued, last batch was a single request) don't
+        # hold a lone request back; just take whatever is already queued.
+        wait = self.max_wait if depth or self._last_batch_requests > 1 else 0.0
+        deadline = time.perf_counter() + wait
+        while rows < self.max_batch_rows:
+            remaining = deadline - time.perf_counter()
+            try:
+                item = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is _STOP:
+                self._queue.put(_STOP)  # Stop after this batch
+                break
+            batch.append(item)
+            rows += len(item[0])
+        return batch, rows
+
+    def _score(self, batch):
+        try:
+            X = np.concatenate([X for X, _, _ in batch])
+            with timed("predict_proba"):
+                proba = self.predictor_fn().predict_proba(X)[:, 1]
+        except Exception as e:
+            for _, _, future in batch:
+                future.set_exception(e)
+            return
+        start = 0
+        for X, threshold, future in batch:
+            p = proba[start:start + len(X)]
+            future.set_result((p, (p > threshold).astype(np.int8)))
+            start += len(X)
+
+    def _run(self):
+        while True:
+            first = self._queue.get()
+            if first is _STOP:
+                return
+            depth = self._queue.qsize()
+            batch, rows = self._collect(first, depth)
+            self._last_batch_requests = len(batch)
+            self._score(batch)
+            with self._stats_lock:
+                self._queue_depths[_bucket(depth)] += 1
+                self._batch_sizes[_bucket(rows)] += 1
+                self._requests += len(batch)
+                self._batches += 1
+
+    def close(self):
+        """Stops the worker after the requests already queued."""
+        self._queue.put(_STOP)
+        self._thread.join()
+
+    # -------------------- 📈 STATS -------------------- #
+
+    def stats(self):
+        """
+        Returns request/batch counts and histograms.
+
+        Histograms map a power-of-two upper bound to a count:
+        `batch_rows` (rows per scored batch) and `queue_depth`
+        (requests still waiting when a batch started).
+        """
+        with self._stats_lock:
+            return {
+                "requests": self._requests,
+                "batches": self._batches,
+                "mean_requests_per_batch": self._requests / self._batches if self._batches else 0.0,
+                "queue_depth_now": self._queue.qsize(),
+                "batch_rows": dict(sorted(self._batch_sizes.items())),
+                "queue_depth": dict(sorted(self._queue_depths.items())),
+            }
+
+
+_batcher = None
+_batcher_lock = threading.Lock()
+
+
+def get_batcher():
+    """Returns the process-wide `MicroBatcher`, starting its worker on first use."""
+    global _batcher
+    with _batcher_lock:
+        if _batcher is None:
+            _batcher = MicroBatcher()
+        return _batcher
+
+
+@register_collector
+def _batcher_metrics():
+    if _batcher is None:
+        return []
+    stats = _batcher.stats()
+    return [
+        ("heart_batcher_requests_total", "counter", "Requests scored by the micro-batcher.", stats["requests"]),
+        ("heart_batcher_batches_total", "counter", "Batches scored by the micro-batcher.", stats["batches"]),
+        ("heart_batcher_queue_depth", "gauge", "Requests currently waiting in the micro-batcher.", stats["queue_depth_now"]),
+    ]
@@ -0,0 +1,389 @@
+# batch_scoring.py
+#
+# Chunked batch scoring for large clinic extracts (CSV, Parquet or Arrow IPC).
+#
+# Parquet/Arrow inputs written to Parquet skip pandas entirely: record batches
+# are read from a memory map (only the requested columns are decoded), the 7
+# feature columns are copied straight into a float32 matrix, and each scored
+# batch is appended to a streaming ParquetWriter. Memory stays flat at roughly
+# one batch, whatever the number of rows.
+#
+# Probabilities are calibrated (calibration.py) when the model was exported
+# with a calibration; --raw writes the uncalibrated ones.
+#
+# Usage:
+#     python batch_scoring.py patients.csv -o scored.csv --chunksize 100000
+#     python batch_scoring.py cohort.parquet -o scored.parquet --keep patient_id
+
+import argparse
+import os
+import sys
+import time
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+from calibration import Calibration, get_calibration, risk_threshold
+from model_registry import get_predictor
+from shap_explainer import explain_batch
+from utils import DEFAULT_THRESHOLD, FEATURE_LIST, predict_batch, preprocess_input
+
+
+DEFAULT_CHUNKSIZE = 100_000
+
+ARROW_SUFFIXES = (".arrow", ".feather", ".ipc")
+
+PROBA_COLUMN = "risk_probability"
+LABEL_COLUMN = "risk_label"
+
+
+# -------------------- 📊 RUN STATS -------------------- #
+
+@dataclass
+class BatchStats:
+    """Summary of a batch scoring run."""
+    rows: int = 0
+    chunks: int = 0
+    seconds: float = 0.0
+
+    @property
+    def rows_per_second(self):
+        return self.rows / self.seconds if self.seconds else 0.0
+
+
+# -------------------- 📥 CHUNKED READERS -------------------- #
+
+def _infer_format(source, fmt=None):
+    """Returns "csv", "parquet" or "arrow" from an explicit format or the file name."""
+    if fmt:
+        return fmt.lower()
+    name = str(source if isinstance(source, str) else getattr(source, "name", "")).lower()
+    if name.endswith((".parquet", ".pq")):
+        return "parquet"
+    return "arrow" if name.endswith(ARROW_SUFFIXES) else "csv"
+
+
+def iter_chunks(source, chunksize=DEFAULT_CHUNKSIZE, fmt=None):
+    """
+    Streams an input file as DataFrame chunks of at most `chunksize` rows.
+
+    Args:
+        source (str | file-like): Path or open binary file (e.g., a Streamlit upload).
+        chunksize (int): Maximum number of rows per chunk.
+        fmt (str): "csv" or "parquet"; inferred from the file name if omitted.
+
+    Yields:
+        pd.DataFrame: Consecutive chunks of the input.
+    """
+    fmt = _infer_format(source, fmt)
+    if fmt == "parquet":
+        import pyarrow.parquet as pq
+
+        parquet_file = pq.ParquetFile(source)
+        for batch in parquet_file.iter_batches(batch_size=chunksize):
+            yield batch.to_pandas()
+    elif fmt == "arrow":
+        for batch in iter_record_batches(source, batch_size=chunksize, fmt=fmt):
+            yield batch.to_pandas()
+    elif fmt == "csv":
+        yield from pd.read_csv(source, chunksize=chunksize)
+    else:
+        raise ValueError(f"🚨 Unsupported input format: {fmt}")
+
+
+def iter_record_batches(source, batch_size=DEFAULT_CHUNKSIZE, columns=None, fmt=None):
+    """
+    Streams a Parquet or Arrow IPC input as pyarrow RecordBatches.
+
+    File paths are memory-mapped. Arrow IPC batches are zero-copy slices of the
+    map; Parquet only decodes the projected columns, one row group at a time.
+
+    Args:
+        source (str | file-like): Parquet or Arrow IPC (file or stream format).
+        batch_size (int): Maximum number of rows per batch.
+        columns (list): Columns to read (all if None).
+        fmt (str): "parquet" or "arrow"; inferred from the file name if omitted.
+
+    Yields:
+        pyarrow.RecordBatch: Consecutive batches of the input.
+    """
+    import pyarrow as pa
+
+    fmt = _infer_format(source, fmt)
+    if fmt == "parquet":
+        import pyarrow.parquet as pq
+
+        parquet_file = pq.ParquetFile(source, memory_map=isinstance(source, str))
+        _check_columns(parquet_file.schema_arrow, columns)
+        yield from parquet_file.iter_batches(batch_size=batch_size, columns=columns)
+    elif fmt == "arrow":
+        import pyarrow.ipc as ipc
+
+        stream = pa.memory_map(source) if isinstance(source, str) else pa.PythonFile(source, mode="r")
+        try:
+            reader = ipc.open_file(stream)
+            batches = (reader.get_batch(i) for i in range(reader.num_record_batches))
+        except pa.ArrowInvalid:  # Stream format (no footer)
+            stream.seek(0)
+            reader = ipc.open_stream(stream)
+            batches = iter(reader)
+        _check_columns(reader.schema, columns)
+        for batch in batches:
+            if columns is not None:
+                batch = batch.select(columns)
+            for offset in range(0, batch.num_rows, batch_size):
+                yield batch.slice(offset, batch_size)
+    else:
+        raise ValueError(f"🚨 Unsupported Arrow input format: {fmt}")
+
+
+def _check_columns(schema, columns):
+    missing = [col for col in columns or [] if col not in schema.names]
+    if missing:
+        raise ValueError(f"🚨 Missing required input features: {missing}")
+
+
+# -------------------- 🔮 CHUNK SCORING -------------------- #
+
+def score_chunk(model, chunk: pd.DataFrame, threshold=DEFAULT_THRESHOLD, explain=False, calibration=None):
+    """
+    Scores one chunk with a single pass over the model.
+
+    Args:
+        model: Trained model with `predict_proba`.
+        chunk (pd.DataFrame): Raw input rows (extra columns are kept).
+        threshold (float): Probability cut-off for the high-risk label.
+        explain (bool): Also append one `shap_<feature>` column per feature.
+        calibration (calibration.Calibration): Optional probability calibration.
+
+    Returns:
+        pd.DataFrame: `chunk` with probability and label columns appended.
+    """
+    features = preprocess_input(chunk, FEATURE_LIST)
+    X = np.ascontiguousarray(features.to_numpy(dtype=np.float32))
+    proba, labels = predict_batch(model, X, threshold=threshold, calibration=calibration)
+    columns = {PROBA_COLUMN: proba, LABEL_COLUMN: labels}
+    if explain:
+        shap_values, _ = explain_batch(X)
+        columns.update({f"shap_{name}": shap_values[:, j] for j, name in enumerate(FEATURE_LIST)})
+    return chunk.assign(**columns)
+
+
+def arrow_features(batch):
+    """
+    Copies the model features of a RecordBatch into a contiguous (n, 7) float32
+    matrix, in `FEATURE_LIST` order, without going through pandas.
+
+    Nulls become NaN, which the model treats as missing values.
+    """
+    X = np.empty((batch.num_rows, len(FEATURE_LIST)), dtype=np.float32)
+    for j, name in enumerate(FEATURE_LIST):
+        X[:, j] = batch.column(name).to_numpy(zero_copy_only=False)
+    return X
+
+
+def score_record_batch(model, batch, threshold=DEFAULT_THRESHOLD, calibration=None):
+    """
+    Scores one RecordBatch.
+
+    Returns:
+        pyarrow.RecordBatch: `batch` with probability and label columns appended.
+    """
+    import pyarrow as pa
+
+    proba, labels = predict_batch(model, arrow_features(batch), threshold=threshold, calibration=calibration)
+    columns = batch.columns + [pa.array(proba), pa.array(labels)]
+    return pa.RecordBatch.from_arrays(columns, names=batch.schema.names + [PROBA_COLUMN, LABEL_COLUMN])
+
+
+# -------------------- 📤 INCREMENTAL WRITERS -------------------- #
+
+class _CsvSink:
+    def __init__(self, path):
+        self.path = path
+        self.header = True
+
+    def write(self, df):
+        df.to_csv(self.path, mode="w" if self.header else "a", header=self.header, index=False)
+        self.header = False
+
+    def close(self):
+        if self.header:  # Empty input: still produce a file
+            open(self.path, "w").close()
+
+
+class _ParquetSink:
+    def __init__(self, path):
+        self.path = path
+        self.writer = None
+
+    def write(self, df):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        table = pa.Table.from_pandas(df, preserve_index=False)
+        if self.writer is None:
+            self.writer = pq.ParquetWriter(self.path, table.schema)
+        self.writer.write_table(table)
+
+    def write_batch(self, batch):
+        import pyarrow.parquet as pq
+
+        if self.writer is None:
+            self.writer = pq.ParquetWriter(self.path, batch.schema)
+        self.writer.write_batch(batch)
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+
+
+def score_arrow(model, source, output, batch_size=DEFAULT_CHUNKSIZE, fmt=None,
+                threshold=DEFAULT_THRESHOLD, keep=None, on_chunk=None, calibration=None):
+    """
+    Scores a Parquet/Arrow input batch by batch into a Parquet file, without pandas.
+
+    Args:
+        model: Trained model with `predict_proba`.
+        source (str | file-like): Parquet or Arrow IPC input.
+        output (str): Output Parquet path.
+        batch_size (int): Rows scored per `predict_proba` call.
+        fmt (str): Input format override ("parquet" or "arrow").
+        threshold (float): Probability cut-off for the high-risk label.
+        keep (list): Extra input columns to copy to the output (all if None).
+            Only `FEATURE_LIST` + `keep` are read from the input.
+        on_chunk (callable): Optional callback receiving the running `BatchStats`.
+        calibration (calibration.Calibration): Optional probability calibration.
+
+    Returns:
+        BatchStats: Rows scored, batches processed and elapsed time.
+    """
+    columns = None if keep is None else FEATURE_LIST + [col for col in keep if col not in FEATURE_LIST]
+    batches = iter_record_batches(source, batch_size=batch_size, columns=columns, fmt=fmt)
+
+    sink = _ParquetSink(output)
+    stats = BatchStats()
+    start = time.perf_counter()
+    try:
+        for batch in batches:
+            if columns is None:
+                _check_columns(batch.schema, FEATURE_LIST)
+            sink.write_batch(score_record_batch(model, batch, threshold=threshold, calibration=calibration))
+            stats.rows += batch.num_rows
+            stats.chunks += 1
+            stats.seconds = time.perf_counter() - start
+            if on_chunk is not None:
+                on_chunk(stats)
+    finally:
+        sink.close()
+    stats.seconds = time.perf_counter() - start
+    return stats
+
+
+def score_file(model, source, output, chunksize=DEFAULT_CHUNKSIZE, fmt=None,
+               threshold=DEFAULT_THRESHOLD, explain=False, on_chunk=None, calibration=None):
+    """
+    Scores `source` chunk by chunk and appends each result to `output`.
+
+    Only one chunk is held in memory at a time, so peak memory depends on
+    `chunksize` rather than on the size of the input file. Parquet/Arrow to
+    Parquet runs without SHAP go through `score_arrow`.
+
+    Args:
+        model: Trained model with `predict_proba`.
+        source (str | file-like): CSV or Parquet input.
+        output (str): Output path; ".parquet" writes Parquet, anything else CSV.
+        chunksize (int): Rows scored per `predict_proba` call.
+        fmt (str): Input format override ("csv" or "parquet").
+        threshold (float): Probability cut-off for the high-risk label.
+        explain (bool): Append batched SHAP contributions per row.
+        on_chunk (callable): Optional callback receiving the running `BatchStats`.
+        calibration (calibration.Calibration): Optional probability calibration.
+
+    Returns:
+        BatchStats: Rows scored, chunks processed and elapsed time.
+    """
+    out_format = _infer_format(output)
+    if not explain and out_format == "parquet" and _infer_format(source, fmt) in ("parquet", "arrow"):
+        return score_arrow(model, source, output, batch_size=chunksize, fmt=fmt,
+                           threshold=threshold, on_chunk=on_chunk, calibration=calibration)
+
+    sink = _ParquetSink(output) if out_format == "parquet" else _CsvSink(output)
+    stats = BatchStats()
+    start = time.perf_counter()
+    try:
+        for chunk in iter_chunks(source, chunksize=chunksize, fmt=fmt):
+            sink.write(score_chunk(model, chunk, threshold=threshold, explain=explain, calibration=calibration))
+            stats.rows += len(chunk)
+            stats.chunks += 1
+            stats.seconds = time.perf_counter() - start
+            if on_chunk is not None:
+                on_chunk(stats)
+    finally:
+        sink.close()
+    stats.seconds = time.perf_counter() - start
+    return stats
+
+
+# -------------------- 🖥️ CLI -------------------- #
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Score a CSV/Parquet/Arrow file with the heart risk model.")
+    parser.add_argument("input", help="Input CSV, Parquet or Arrow IPC file")
+    parser.add_argument("-o", "--output", help="Output file (default: <input>_scored.<ext>)")
+    parser.add_argument("--chunksize", type=int, default=DEFAULT_CHUNKSIZE, help="Rows per chunk")
+    parser.add_argument("--format", choices=["csv", "parquet", "arrow"], help="Input format override")
+    parser.add_argument("--threshold", type=float,
+                        help="High-risk cut-off (default: $HEART_RISK_THRESHOLD or the exported one)")
+    parser.add_argument("--raw", action="store_true",
+                        help="Write uncalibrated probabilities (cut-off: --threshold or 0.5)")
+    parser.add_argument("--explain", action="store_true", help="Append per-row SHAP contributions")
+    parser.add_argument("--keep", nargs="*", metavar="COLUMN",
+                        help="Parquet/Arrow -> Parquet: only read the features plus these columns")
+    parser.add_argument("--workers", type=int,
+                        help="Score each chunk across this many processes (parallel_scoring.py)")
+    args = parser.parse_args(argv)
+
+    output = args.output
+    if output is None:
+        root, ext = os.path.splitext(args.input)
+        output = f"{root}_scored{'.parquet' if ext in ARROW_SUFFIXES else ext or '.csv'}"
+    if args.keep is not None and (args.explain or _infer_format(output) != "parquet"
+                                  or _infer_format(args.input, args.format) == "csv"):
+        parser.error("--keep needs a Parquet/Arrow input, a Parquet output and no --explain")
+
+    def report(stats):
+        print(f"\r{stats.rows:,} rows | {stats.rows_per_second:,.0f} rows/s", end="", file=sys.stderr)
+
+    # Exported / $HEART_RISK_THRESHOLD cut-offs are chosen for calibrated scores
+    if args.raw:
+        calibration = Calibration.identity()
+        threshold = DEFAULT_THRESHOLD if args.threshold is None else args.threshold
+    else:
+        calibration = get_calibration()
+        threshold = risk_threshold(calibration) if args.threshold is None else args.threshold
+
+    if args.workers:
+        from parallel_scoring import ParallelScorer
+        model = ParallelScorer(workers=args.workers)
+    else:
+        model = get_predictor()
+    try:
+        if args.keep is not None:
+            stats = score_arrow(model, args.input, output, batch_size=args.chunksize, fmt=args.format,
+                                threshold=threshold, keep=args.keep, on_chunk=report, calibration=calibration)
+        else:
+            stats = score_file(model, args.input, output, chunksize=args.chunksize,
+                               fmt=args.format, threshold=threshold, explain=args.explain,
+                               on_chunk=report, calibration=calibration)
+    finally:
+        if args.workers:
+            model.close()
+    print(file=sys.stderr)
+    print(f"✅ Scored {stats.rows:,} rows in {stats.seconds:.2f}s "
+          f"({stats.rows_per_second:,.0f} rows/s) -> {output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+# benchmarks/bench_predict_risk.py
+#
+# Microbenchmark: legacy predict_proba + predict vs. single-pass utils.predict_batch.
+#
+# Usage:
+#     python benchmarks/bench_predict_risk.py --rows 1 --repeat 2000
+
+import argparse
+import os
+import sys
+import timeit
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from model_registry import get_model  # noqa: E402
+from utils import FEATURE_LIST, predict_batch  # noqa: E402
+
+
+def make_input(rows, seed=0):
+    """Builds a random DataFrame covering the predictor page's input ranges."""
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        "age_years": rng.integers(18, 101, rows),
+        "systolic_bp": rng.integers(80, 201, rows),
+        "cholesterol_level": rng.integers(1, 4, rows),
+        "bmi": rng.uniform(15.0, 45.0, rows),
+        "glucose_level": rng.integers(1, 4, rows),
+        "gender": rng.integers(0, 2, rows),
+        "smokes": rng.integers(0, 2, rows),
+    })[FEATURE_LIST]
+
+
+def legacy_predict(model, X):
+    """The pre-refactor `predict_risk`: two full passes over the ensemble."""
+    proba = model.predict_proba(X)[:, 1]
+    labels = model.predict(X)
+    return proba, labels
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Legacy vs. single-pass prediction microbenchmark.")
+    parser.add_argument("--rows", type=int, default=1, help="Rows per call")
+    parser.add_argument("--repeat", type=int, default=2000, help="Calls per measurement")
+    args = parser.parse_args(argv)
+
+    model = get_model()
+    X = make_input(args.rows)
+
+    # Same labels either way, so the speedup is free
+    assert np.array_equal(legacy_predict(model, X)[1], predict_batch(model, X)[1])
+
+    results = {}
+    for name, fn in [("legacy", legacy_predict), ("single_pass", predict_batch)]:
+        fn(model, X)  # Warm-up
+        best = min(timeit.repeat(lambda: fn(model, X), number=args.repeat, repeat=5))
+        results[name] = best / args.repeat * 1e6
+
+    print(f"rows/call      : {args.rows}")
+    for name, us in results.items():
+        print(f"{name:<15}: {us:9.1f} µs/call")
+    print(f"speedup        : {results['legacy'] / results['single_pass']:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,155 @@
+# benchmarks/check_correctness.py
+#
+# Scripted correctness checks for the fast paths that replace predict_proba.
+# Each check prints one line and the script exits with code 1 if any fails,
+# so it can run next to the benchmarks (or in CI) after touching them:
+#   - compiled:  tree_engine's CompiledForest vs. predict_proba (≤ 1e-9) for
+#                both shipped models, on rows sitting on every split edge
+#   - grid:      the built risk grid (risk_grid.py) vs. the 7-feature model
+#                (≤ GRID_TOLERANCE); skipped when no current grid is built
+#   - calibration: calibration.py's threshold table, operating-point lookups
+#                and calibration maps on a toy set with hand-computed answers
+#
+# Usage:
+#     python benchmarks/check_correctness.py
+#     python benchmarks/check_correctness.py --only compiled --rows 20000
+
+import argparse
+import os
+import sys
+import tempfile
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from model_registry import MODEL_7_FEATURE_PATH, MODEL_FULL_PATH, get_model  # noqa: E402
+
+
+MODELS = {"7_feature": MODEL_7_FEATURE_PATH, "full": MODEL_FULL_PATH}
+CHECKS = ["compiled", "grid", "calibration"]
+
+# Toy held-out set: 8 patients, 4 positives
+TOY_PROBA = np.array([0.1, 0.2, 0.3, 0.4, 0.6, 0.7, 0.8, 0.9])
+TOY_Y = np.array([0, 0, 1, 0, 1, 0, 1, 1])
+# Rule `proba > threshold`: threshold -> (precision, recall, f1, positive_rate), worked out by hand
+TOY_OPERATING_POINTS = {
+    0.0: (4 / 8, 4 / 4, 8 / 12, 8 / 8),
+    0.3: (3 / 5, 3 / 4, 6 / 9, 5 / 8),   # 0.3 itself is not flagged
+    0.5: (3 / 4, 3 / 4, 6 / 8, 4 / 8),
+    0.75: (2 / 2, 2 / 4, 4 / 6, 2 / 8),
+    1.0: (np.nan, 0.0, 0.0, 0.0),       # Nothing flagged: precision undefined
+}
+# Isotonic fit pools (0.3, 0.4) and (0.6, 0.7) to 0.5: raw -> calibrated, interpolated between knots
+TOY_ISOTONIC = {0.0: 0.0, 0.1: 0.0, 0.25: 0.25, 0.5: 0.5, 0.75: 0.75, 0.9: 1.0, 1.0: 1.0}
+
+
+class Skipped(Exception):
+    """Raised by a check that has nothing to verify in this checkout."""
+
+
+# -------------------- 🌳 COMPILED ENGINE -------------------- #
+
+def check_compiled(rows):
+    """Compiled forest vs. predict_proba on edge-heavy synthetic rows."""
+    from tree_engine import compile_model, verification_input, verify
+
+    results = []
+    for name, path in MODELS.items():
+        model = get_model(path)
+        compiled = compile_model(model)
+        max_diff = verify(model, compiled, verification_input(model, rows))
+        results.append(f"{name}: max |Δp| {max_diff:.3g} on {rows:,} rows")
+    return results
+
+
+# -------------------- 🧮 RISK GRID -------------------- #
+
+def check_grid(rows):
+    """Grid lookups vs. the 7-feature model on random in-range rows."""
+    from model_registry import registry
+    from risk_grid import RiskGrid, grid_paths, verify_grid
+
+    table_path, manifest_path = grid_paths(MODEL_7_FEATURE_PATH)
+    if not os.path.exists(manifest_path):
+        raise Skipped("no grid built (python risk_grid.py build)")
+    grid = RiskGrid.load(table_path, manifest_path)
+    if grid.meta["model_version"] != registry.version(MODEL_7_FEATURE_PATH):
+        raise Skipped("grid is stale for the current model (python risk_grid.py build)")
+    max_error = verify_grid(grid, get_model(MODEL_7_FEATURE_PATH), rows)
+    return [f"7_feature: max |Δp| {max_error:.3g} on {rows:,} rows (build measured {grid.max_error:.3g})"]
+
+
+# -------------------- 🎚️ CALIBRATION -------------------- #
+
+def check_calibration():
+    """Threshold table, operating points and calibration maps on the toy set."""
+    from numpy.testing import assert_allclose
+
+    from calibration import Calibration, fit_calibration_map, load_calibration, threshold_table
+
+    thresholds = np.array(sorted(TOY_OPERATING_POINTS))
+    table = threshold_table(TOY_PROBA, TOY_Y, thresholds)
+    expected = np.array([TOY_OPERATING_POINTS[t] for t in thresholds])
+    for i, column in enumerate(["precision", "recall", "f1", "positive_rate"]):
+        assert_allclose(table[column], expected[:, i], atol=1e-12, err_msg=f"threshold table: {column}")
+
+    # Default 0.005 grid: F1 peaks at 8/10 over [0.2, 0.3) (6 flagged, 4 true positives)
+    calibration = Calibration(TOY_PROBA, TOY_PROBA, threshold_table(TOY_PROBA, TOY_Y), 0.5,
+                              "toy", "toy", "", len(TOY_Y))
+    assert_allclose(calibration.best_f1_threshold(), 0.2, atol=1e-12, err_msg="best F1 threshold")
+    point = calibration.operating_point(0.503)  # Row at or just below: 0.500
+    assert_allclose([point["threshold"], point["precision"], point["recall"]], [0.5, 0.75, 0.75],
+                    atol=1e-12, err_msg="operating point lookup")
+
+    knots_x, knots_y = fit_calibration_map(TOY_PROBA, TOY_Y, "isotonic")
+    isotonic = Calibration(knots_x, knots_y, {}, 0.5, "isotonic", "toy", "", len(TOY_Y))
+    assert_allclose(isotonic.apply(np.array(list(TOY_ISOTONIC))), list(TOY_ISOTONIC.values()),
+                    atol=1e-12, err_msg="isotonic map")
+
+    knots_x, knots_y = fit_calibration_map(TOY_PROBA, TOY_Y, "platt")
+    assert np.all(np.diff(knots_x) > 0) and np.all(np.diff(knots_y) >= 0), "🚨 Platt knots are not monotone"
+    assert 0.0 <= knots_y[0] and knots_y[-1] <= 1.0, "🚨 Platt knots leave [0, 1]"
+    try:
+        fit_calibration_map(TOY_PROBA, 1 - TOY_Y, "platt")
+    except ValueError:
+        pass
+    else:
+        raise AssertionError("🚨 Platt scaling accepted a decreasing map")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "toy.calibration.npz")
+        calibration.save(path)
+        loaded = load_calibration(path)
+    assert_allclose(loaded.table["f1"], calibration.table["f1"], err_msg="save/load round trip")
+    assert loaded.version == calibration.version, "🚨 save/load changed the calibration version"
+
+    return [f"{len(thresholds)} operating points, best-F1 lookup, isotonic / Platt maps, save/load"]
+
+
+# -------------------- 🖥️ CLI -------------------- #
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Check the fast inference paths against predict_proba.")
+    parser.add_argument("--only", nargs="+", choices=CHECKS, default=CHECKS, help="Checks to run")
+    parser.add_argument("--rows", type=int, default=10_000, help="Synthetic rows per model")
+    args = parser.parse_args(argv)
+
+    runners = {"compiled": lambda: check_compiled(args.rows), "grid": lambda: check_grid(args.rows),
+               "calibration": check_calibration}
+    failed = False
+    for check in args.only:
+        try:
+            for line in runners[check]():
+                print(f"✅ {check} — {line}")
+        except Skipped as e:
+            print(f"⏭️ {check} — {e}")
+        except AssertionError as e:
+            failed = True
+            print(f"❌ {check} — {e}")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+# benchmarks/load_test.py
+#
+# Load test for scoring_service.py against a localhost instance. Uses plain
+# asyncio keep-alive connections, so it needs no HTTP client dependency.
+#
+# Usage:
+#     python scoring_service.py --workers 4 &
+#     python benchmarks/load_test.py --concurrency 32 --duration 10
+#     python benchmarks/load_test.py --mode columnar --batch 1000
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bench_predict_risk import make_input  # noqa: E402
+
+
+def make_payload(mode, batch, seed=0):
+    """Builds one request body in the given payload shape."""
+    df = make_input(batch, seed=seed)
+    if mode == "single":
+        payload = df.iloc[0].to_dict()
+    elif mode == "records":
+        payload = {"instances": df.to_dict(orient="records")}
+    else:
+        payload = {"columns": df.to_dict(orient="list")}
+    return json.dumps(payload, default=float).encode()
+
+
+async def _post(reader, writer, host, path, body):
+    writer.write(
+        f"POST {path} HTTP/1.1\r\nHost: {host}\r\nContent-Type: application/json\r\n"
+        f"Content-Length: {len(body)}\r\n\r\n".encode() + body
+    )
+    await writer.drain()
+    status = int((await reader.readline()).split()[1])
+    length = 0
+    while (line := await reader.readline()) not in (b"\r\n", b""):
+        name, _, value = line.decode().partition(":")
+        if name.lower() == "content-length":
+            length = int(value)
+    await reader.readexactly(length)
+    return status
+
+
+async def _client(host, port, path, body, deadline, latencies, errors):
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        while time.perf_counter() < deadline:
+            start = time.perf_counter()
+            status = await _post(reader, writer, host, path, body)
+            latencies.append(time.perf_counter() - start)
+            if status != 200:
+                errors.append(status)
+    finally:
+        writer.close()
+
+
+async def run_load(host, port, body, concurrency, duration, path="/predict"):
+    """
+    Sends `body` from `concurrency` keep-alive connections for `duration` seconds.
+
+    Returns:
+        dict: requests, errors, requests/s and latency percentiles (ms).
+    """
+    latencies, errors = [], []
+    deadline = time.perf_counter() + duration
+    start = time.perf_counter()
+    await asyncio.gather(*(
+        _client(host, port, path, body, deadline, latencies, errors) for _ in range(concurrency)
+    ))
+    elapsed = time.perf_counter() - start
+    ms = np.array(latencies) * 1000
+    return {
+        "requests": len(latencies),
+        "errors": len(errors),
+        "requests_per_second": len(latencies) / elapsed,
+        "p50_ms": float(np.percentile(ms, 50)),
+        "p95_ms": float(np.percentile(ms, 95)),
+        "p99_ms": float(np.percentile(ms, 99)),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Load-test the HTTP scoring service.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--mode", choices=["single", "records", "columnar"], default="single")
+    parser.add_argument("--batch", type=int, default=1, help="Rows per request (records/columnar)")
+    parser.add_argument("--concurrency", type=int, default=16, help="Parallel keep-alive connections")
+    parser.add_argument("--duration", type=float, default=10.0, help="Seconds to run")
+    args = parser.parse_args(argv)
+
+    batch = 1 if args.mode == "single" else args.batch
+    body = make_payload(args.mode, batch)
+    result = asyncio.run(run_load(args.host, args.port, body, args.concurrency, args.duration))
+
+    print(f"{args.mode} x{batch} rows, {args.concurrency} connections, {args.duration:.0f}s")
+    print(f"  {result['requests']:,} requests ({result['errors']} errors), "
+          f"{result['requests_per_second']:,.0f} req/s, {result['requests_per_second'] * batch:,.0f} rows/s")
+    print(f"  latency p50 {result['p50_ms']:.2f} ms | p95 {result['p95_ms']:.2f} ms | p99 {result['p99_ms']:.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+# benchmarks/parallel_scaling.py
+#
+# Throughput of parallel_scoring.ParallelScorer versus worker count, against a
+# single in-process predict_proba call on the same rows. Results are identical
+# to the single-process scores (checked on every run).
+#
+# Usage:
+#     python benchmarks/parallel_scaling.py --rows 2000000
+#     python benchmarks/parallel_scaling.py --workers 1 2 4 8 16 32 --json
+
+import argparse
+import json
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bench_predict_risk import make_input  # noqa: E402
+from model_registry import MODEL_7_FEATURE_PATH, registry  # noqa: E402
+from parallel_scoring import SHARD_ROWS, ParallelScorer  # noqa: E402
+
+
+def default_workers():
+    """1, 2, 4, ... up to the CPU count (always included)."""
+    cpus = os.cpu_count() or 1
+    counts = [1 << i for i in range(cpus.bit_length()) if 1 << i < cpus]
+    return counts + [cpus]
+
+
+def best_of(fn, repeat):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Parallel scoring throughput vs. worker count.")
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--workers", nargs="+", type=int, default=default_workers())
+    parser.add_argument("--shard-rows", type=int, default=SHARD_ROWS)
+    parser.add_argument("--repeat", type=int, default=3, help="Best-of runs per configuration")
+    parser.add_argument("--json", action="store_true", help="Print the results as JSON")
+    args = parser.parse_args(argv)
+
+    X = np.ascontiguousarray(make_input(args.rows).to_numpy(dtype=np.float32))
+    model = registry.get(MODEL_7_FEATURE_PATH)
+    expected = model.predict_proba(X)[:, 1]
+    baseline = best_of(lambda: model.predict_proba(X), args.repeat)
+    results = [{"workers": 0, "seconds": baseline, "rows_per_second": args.rows / baseline}]
+
+    for workers in args.workers:
+        with ParallelScorer(workers=workers, shard_rows=args.shard_rows) as scorer:
+            proba = scorer.predict_proba_positive(X)
+            if not np.allclose(proba, expected, rtol=0, atol=1e-12):
+                sys.exit(f"🚨 {workers} workers: results differ from predict_proba")
+            seconds = best_of(lambda: scorer.predict_proba_positive(X), args.repeat)
+        results.append({"workers": workers, "seconds": seconds, "rows_per_second": args.rows / seconds})
+
+    if args.json:
+        print(json.dumps({"rows": args.rows, "cpu_count": os.cpu_count(), "results": results}, indent=2))
+        return
+    print(f"{args.rows:,} rows, {os.cpu_count()} CPUs")
+    print(f"{'workers':>8} {'seconds':>9} {'rows/s':>14} {'speedup':>8}")
+    for row in results:
+        label = "in-proc" if row["workers"] == 0 else row["workers"]
+        print(f"{label:>8} {row['seconds']:9.3f} {row['rows_per_second']:14,.0f} "
+              f"{baseline / row['seconds']:7.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,267 @@
+# benchmarks/run_suite.py
+#
+# Reproducible benchmark suite. Writes one JSON document so runs can be
+# compared across commits:
+#   - predict:  predict_proba latency / throughput at batch sizes 1, 100, 10k, 1M
+#               for both shipped LightGBM models
+#   - unpickle: joblib.load time and resident-memory growth (fresh process per model)
+#   - imports:  cold import time of app.py and every my_pages module (fresh process each)
+#   - reruns:   full app.py script run time per page through Streamlit's AppTest
+#
+# Usage:
+#     python benchmarks/run_suite.py -o bench.json
+#     python benchmarks/run_suite.py --only predict --batch-sizes 1 100 --quick
+#     python benchmarks/run_suite.py --compare old.json new.json
+
+import argparse
+import datetime
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+import timeit
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from model_registry import MODEL_7_FEATURE_PATH, MODEL_FULL_PATH, registry  # noqa: E402
+from page_router import PAGES, measure_cold_import  # noqa: E402
+
+
+MODELS = {"7_feature": MODEL_7_FEATURE_PATH, "full": MODEL_FULL_PATH}
+BATCH_SIZES = [1, 100, 10_000, 1_000_000]
+SECTIONS = ["predict", "unpickle", "imports", "reruns"]
+
+
+# -------------------- 🧰 HELPERS -------------------- #
+
+def make_model_input(model, rows, seed=0):
+    """Uniform random rows within each feature's training range (from the booster dump)."""
+    infos = model.booster_.dump_model()["feature_infos"]
+    rng = np.random.default_rng(seed)
+    columns = []
+    for name in model.feature_name_:
+        low, high = infos[name]["min_value"], infos[name]["max_value"]
+        columns.append(rng.uniform(low, high, rows))
+    return np.column_stack(columns)
+
+
+def time_call(fn, repeat=5, min_seconds=0.2):
+    """
+    Best-of-`repeat` seconds per call, with `timeit`-style loop calibration.
+    Calls slower than one second are timed once.
+    """
+    timer = timeit.Timer(fn)
+    number, total = timer.autorange()
+    if total / number > 1.0:
+        return total / number
+    number = max(number, int(np.ceil(min_seconds * number / total)))
+    return min(timer.repeat(repeat=repeat, number=number)) / number
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], cwd=ROOT, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def environment():
+    import lightgbm
+    import streamlit
+
+    return {
+        "commit": git_commit(),
+        "timestamp": datetime.datetime.now(datetime.timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "numpy": np.__version__,
+        "lightgbm": lightgbm.__version__,
+        "streamlit": streamlit.__version__,
+    }
+
+
+# -------------------- 🔮 PREDICT -------------------- #
+
+def bench_predict(batch_sizes=BATCH_SIZES):
+    results = []
+    for name, path in MODELS.items():
+        model = registry.get(path)
+        X_all = make_model_input(model, max(batch_sizes))
+        for rows in batch_sizes:
+            X = X_all[:rows]
+            model.predict_proba(X)  # Warm-up
+            seconds = time_call(lambda: model.predict_proba(X))
+            results.append({
+                "model": name,
+                "rows": rows,
+                "seconds_per_call": seconds,
+                "rows_per_second": rows / seconds,
+            })
+            print(f"  predict {name:<10} {rows:>9,} rows  {seconds * 1000:10.3f} ms  "
+                  f"{rows / seconds:14,.0f} rows/s", file=sys.stderr)
+    return results
+
+
+# -------------------- 💾 UNPICKLE -------------------- #
+
+# lightgbm/sklearn are imported first and timed separately from the unpickle itself
+_UNPICKLE_CODE = """
+import json, sys, time
+import joblib
+from model_registry import _rss_bytes
+start = time.perf_counter()
+import lightgbm, sklearn.base
+import_seconds = time.perf_counter() - start
+rss = _rss_bytes()
+start = time.perf_counter()
+joblib.load(sys.argv[1])
+print(json.dumps({"seconds": time.perf_counter() - start, "rss_growth_bytes": _rss_bytes() - rss,
+                  "library_import_seconds": import_seconds}))
+"""
+
+
+def bench_unpickle():
+    results = []
+    for name, path in MODELS.items():
+        runs = [
+            json.loads(subprocess.run([sys.executable, "-c", _UNPICKLE_CODE, path], cwd=ROOT,
+                                      capture_output=True, text=True, check=True).stdout.splitlines()[-1])
+            for _ in range(3)
+        ]
+        best = min(runs, key=lambda r: r["seconds"])
+        results.append({"model": name, "file_bytes": os.path.getsize(path), **best})
+        print(f"  unpickle {name:<10} {best['seconds'] * 1000:8.1f} ms  "
+              f"{best['rss_growth_bytes'] / 1024 ** 2:6.1f} MB", file=sys.stderr)
+    return results
+
+
+# -------------------- ⏱️ COLD IMPORTS -------------------- #
+
+def bench_imports():
+    results = []
+    for module in ["app"] + [module for module, _ in PAGES.values()]:
+        entry = measure_cold_import(module, base_modules=[])
+        results.append(entry)
+        print(f"  import  {module:<32} {entry['seconds'] * 1000:8.0f} ms", file=sys.stderr)
+    return results
+
+
+# -------------------- 🔁 APPTEST RERUNS -------------------- #
+
+def _app_script(label, root):
+    """AppTest script: app.py with the navigation menu pinned to `label`."""
+    import os
+    import runpy
+    import sys
+
+    import streamlit_option_menu
+
+    os.chdir(root)
+    sys.path.insert(0, root)
+    streamlit_option_menu.option_menu = lambda *args, **kwargs: label
+    runpy.run_path(os.path.join(root, "app.py"), run_name="__main__")
+
+
+def bench_reruns(reruns=5):
+    from streamlit.testing.v1 import AppTest
+
+    results = []
+    for label in ["🏡 Home"] + list(PAGES):
+        at = AppTest.from_function(_app_script, args=(label, ROOT), default_timeout=120)
+        start = time.perf_counter()
+        at.run()
+        first = time.perf_counter() - start
+        errors = [str(e.value) for e in at.exception]
+
+        times = []
+        for _ in range(reruns):
+            start = time.perf_counter()
+            at.run()
+            times.append(time.perf_counter() - start)
+        results.append({
+            "page": label,
+            "first_run_seconds": first,
+            "rerun_seconds_median": float(np.median(times)),
+            "rerun_seconds_min": min(times),
+            "errors": errors,
+        })
+        print(f"  rerun   {label:<20} first {first * 1000:8.0f} ms  "
+              f"median {np.median(times) * 1000:8.0f} ms", file=sys.stderr)
+    return results
+
+
+# -------------------- 🆚 COMPARE -------------------- #
+
+def _flatten(report):
+    """{metric key: value} for the timing numbers of a report."""
+    flat = {}
+    for row in report.get("predict", []):
+        flat[f"predict/{row['model']}/{row['rows']}"] = row["seconds_per_call"]
+    for row in report.get("unpickle", []):
+        flat[f"unpickle/{row['model']}"] = row["seconds"]
+    for row in report.get("imports", []):
+        flat[f"import/{row['module']}"] = row["seconds"]
+    for row in report.get("reruns", []):
+        flat[f"rerun/{row['page']}"] = row["rerun_seconds_median"]
+    return flat
+
+
+def compare(old_path, new_path, tolerance=0.10):
+    """Prints per-metric ratios new/old; returns the keys slower by more than `tolerance`."""
+    with open(old_path) as f:
+        old = _flatten(json.load(f))
+    with open(new_path) as f:
+        new = _flatten(json.load(f))
+    regressions = []
+    for key in sorted(old.keys() & new.keys()):
+        ratio = new[key] / old[key] if old[key] else float("inf")
+        flag = "🔺" if ratio > 1 + tolerance else ("🔻" if ratio < 1 - tolerance else "  ")
+        print(f"{flag} {key:<50} {old[key] * 1000:10.3f} ms -> {new[key] * 1000:10.3f} ms  ({ratio:.2f}x)")
+        if ratio > 1 + tolerance:
+            regressions.append(key)
+    return regressions
+
+
+# -------------------- 🖥️ CLI -------------------- #
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run the inference / startup / page benchmark suite.")
+    parser.add_argument("-o", "--output", help="Write the JSON report here (default: stdout)")
+    parser.add_argument("--only", nargs="+", choices=SECTIONS, default=SECTIONS, help="Sections to run")
+    parser.add_argument("--batch-sizes", nargs="+", type=int, default=BATCH_SIZES)
+    parser.add_argument("--reruns", type=int, default=5, help="AppTest reruns per page")
+    parser.add_argument("--quick", action="store_true", help="Skip the 1M-row batch")
+    parser.add_argument("--compare", nargs=2, metavar=("OLD", "NEW"), help="Compare two JSON reports")
+    args = parser.parse_args(argv)
+
+    if args.compare:
+        sys.exit(1 if compare(*args.compare) else 0)
+
+    batch_sizes = [n for n in args.batch_sizes if not (args.quick and n >= 1_000_000)]
+    report = {"environment": environment()}
+    if "predict" in args.only:
+        report["predict"] = bench_predict(batch_sizes)
+    if "unpickle" in args.only:
+        report["unpickle"] = bench_unpickle()
+    if "imports" in args.only:
+        report["imports"] = bench_imports()
+    if "reruns" in args.only:
+        report["reruns"] = bench_reruns(args.reruns)
+
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,302 @@
+# calibration.py
+#
+# Probability calibration and decision-threshold tables, computed once at
+# export time (model_export.py --holdout) and stored next to the model:
+#
+#   <model>.calibration.npz   monotone lookup (knots_x -> knots_y) fitted on
+#                             held-out data (isotonic or Platt), plus the
+#                             precision / recall / F1 of every threshold on
+#                             the calibrated held-out probabilities
+#
+# At runtime calibrating a batch is one np.interp over the knots, and any
+# operating point (the predictor's threshold, the Compare page's curves) is a
+# lookup in the precomputed table instead of re-scoring data.
+#
+# The decision threshold is $HEART_RISK_THRESHOLD if set, else the one
+# recorded at export time: the calibration's (0.5 unless exported with
+# --threshold f1), or the manifest's `--threshold` for a model exported
+# without held-out data.
+#
+# Usage:
+#     calibration = get_calibration()
+#     risk = calibration.apply(model.predict_proba(X)[:, 1])
+#     labels = risk > risk_threshold(calibration)
+
+import datetime
+import os
+
+import numpy as np
+
+from model_registry import MODEL_7_FEATURE_PATH, ModelRegistry, predictor_version, resolve_path
+
+
+CALIBRATION_METHODS = ("isotonic", "platt")
+PLATT_POINTS = 256           # Knots tabulating the fitted sigmoid
+THRESHOLD_STEPS = 201        # Thresholds 0.000, 0.005, ..., 1.000
+RISK_THRESHOLD = os.environ.get("HEART_RISK_THRESHOLD")  # Clinic-specific override
+
+
+def calibration_path(model_path=MODEL_7_FEATURE_PATH):
+    """Returns the calibration file that belongs to a model file."""
+    return f"{os.path.splitext(resolve_path(model_path))[0]}.calibration.npz"
+
+
+# -------------------- 📏 CALIBRATION -------------------- #
+
+class Calibration:
+    """
+    Monotone probability map plus the threshold table of the held-out data.
+
+    Args:
+        knots_x (np.ndarray): Increasing raw probabilities.
+        knots_y (np.ndarray): Non-decreasing calibrated probabilities at `knots_x`.
+        table (dict): Equal-length arrays "threshold", "precision", "recall", "f1", "positive_rate".
+        threshold (float): Decision threshold recorded at export time.
+        method (str): "isotonic", "platt" or "identity".
+        source_version (str): Version of the model the map was fitted for.
+        fitted_at (str): ISO timestamp of the fit.
+        rows (int): Held-out rows used.
+    """
+
+    def __init__(self, knots_x, knots_y, table, threshold, method, source_version, fitted_at, rows):
+        self.knots_x = knots_x
+        self.knots_y = knots_y
+        self.table = table
+        self.threshold = threshold
+        self.method = method
+        self.source_version = source_version
+        self.fitted_at = fitted_at
+        self.rows = rows
+
+    @classmethod
+    def identity(cls, threshold=None):
+        """No calibration: probabilities pass through and there is no threshold table."""
+        from utils import DEFAULT_THRESHOLD
+
+        return cls(np.array([0.0, 1.0]), np.array([0.0, 1.0]), {},
+                   DEFAULT_THRESHOLD if threshold is None else threshold, "identity", "", "", 0)
+
+    @property
+    def is_identity(self):
+        return self.method == "identity"
+
+    @property
+    def version(self):
+        """Changes whenever the map is refitted (cache key for anything derived from it)."""
+        return f"{self.method}-{self.source_version}-{self.fitted_at}"
+
+    def apply(self, proba):
+        """
+        Calibrates raw positive-class probabilities.
+
+        Args:
+            proba (float | np.ndarray): Raw probabilities, any shape.
+
+        Returns:
+            float | np.ndarray: Calibrated probabilities (float64), same shape.
+        """
+        if self.is_identity:
+            return proba
+        return np.interp(proba, self.knots_x, self.knots_y)
+
+    def operating_point(self, threshold):
+        """
+        Held-out precision / recall / F1 of the table row at or just below `threshold`.
+
+        Returns:
+            dict | None: None without a threshold table.
+        """
+        if not self.table:
+            return None
+        i = max(np.searchsorted(self.table["threshold"], threshold, side="right") - 1, 0)
+        return {name: float(values[i]) for name, values in self.table.items()}
+
+    def best_f1_threshold(self):
+        """Threshold with the highest held-out F1 (None without a table)."""
+        if not self.table:
+            return None
+        return float(self.table["threshold"][np.nanargmax(self.table["f1"])])
+
+    def table_df(self):
+        """The threshold table as a DataFrame."""
+        import pandas as pd
+
+        return pd.DataFrame(self.table)
+
+    def save(self, path):
+        tmp = f"{path}.tmp.npz"
+        np.savez(
+            tmp, knots_x=self.knots_x, knots_y=self.knots_y,
+            threshold=np.float64(self.threshold), method=np.array(self.method),
+            source_version=np.array(self.source_version), fitted_at=np.array(self.fitted_at),
+            rows=np.int64(self.rows), **{f"table_{name}": values for name, values in self.table.items()},
+        )
+        os.replace(tmp, path)  # Readers never see a partial file
+
+
+def load_calibration(path):
+    """Reads a `Calibration` written by `Calibration.save` (no pickle)."""
+    with np.load(path, allow_pickle=False) as data:
+        table = {key[len("table_"):]: data[key] for key in data.files if key.startswith("table_")}
+        return Calibration(
+            knots_x=data["knots_x"], knots_y=data["knots_y"], table=table,
+            threshold=float(data["threshold"]), method=str(data["method"]),
+            source_version=str(data["source_version"]), fitted_at=str(data["fitted_at"]),
+            rows=int(data["rows"]),
+        )
+
+
+# Same mtime/hash-keyed caching (and hot-swapping) as the models
+calibration_store = ModelRegistry(loader=load_calibration)
+
+
+def get_calibration(model_path=MODEL_7_FEATURE_PATH):
+    """
+    Returns the calibration of a model, or the identity if it has none.
+
+    A calibration fitted for another version of the model (e.g. after
+    retraining without re-exporting) is ignored. The identity carries the
+    export manifest's threshold when there is one for this model version.
+
+    Args:
+        model_path (str): Model the calibration belongs to.
+
+    Returns:
+        Calibration
+    """
+    path = calibration_path(model_path)
+    if os.path.exists(path):
+        calibration = calibration_store.get(path)
+        if calibration.source_version == predictor_version(model_path):
+            return calibration
+    return Calibration.identity(threshold=exported_threshold(model_path))
+
+
+def exported_threshold(model_path=MODEL_7_FEATURE_PATH):
+    """Threshold recorded in the export manifest of this model version, or None."""
+    from model_export import export_paths, get_exported_model
+
+    if not os.path.exists(export_paths(model_path)[2]):
+        return None
+    manifest = get_exported_model(model_path).manifest
+    if manifest["source_version"] != predictor_version(model_path):
+        return None
+    return float(manifest["threshold"])
+
+
+def risk_threshold(calibration=None):
+    """Decision threshold on calibrated probabilities: $HEART_RISK_THRESHOLD or the exported one."""
+    if RISK_THRESHOLD:
+        return float(RISK_THRESHOLD)
+    return (calibration or get_calibration()).threshold
+
+
+# -------------------- 🏗️ FIT (EXPORT TIME) -------------------- #
+
+def fit_calibration_map(proba, y, method="isotonic"):
+    """
+    Fits a monotone map from raw to calibrated probabilities.
+
+    Args:
+        proba (np.ndarray): Raw held-out probabilities, shape (n,).
+        y (np.ndarray): 0/1 held-out labels.
+        method (str): "isotonic" (step-wise, non-parametric) or "platt" (sigmoid on the log-odds).
+
+    Returns:
+        tuple: (knots_x increasing, knots_y non-decreasing), float64.
+    """
+    proba = np.asarray(proba, dtype=np.float64)
+    if method == "isotonic":
+        from sklearn.isotonic import IsotonicRegression
+
+        iso = IsotonicRegression(y_min=0.0, y_max=1.0, out_of_bounds="clip").fit(proba, y)
+        return iso.X_thresholds_.astype(np.float64), iso.y_thresholds_.astype(np.float64)
+    if method == "platt":
+        from sklearn.linear_model import LogisticRegression
+
+        eps = 1e-6
+        logit = lambda p: np.log(np.clip(p, eps, 1 - eps) / (1 - np.clip(p, eps, 1 - eps)))  # noqa: E731
+        platt = LogisticRegression(C=1e6).fit(logit(proba).reshape(-1, 1), y)
+        if platt.coef_[0, 0] <= 0:
+            raise ValueError("🚨 Platt scaling fitted a decreasing map (is the model better than chance?)")
+        knots_x = np.linspace(0.0, 1.0, PLATT_POINTS)
+        return knots_x, platt.predict_proba(logit(knots_x).reshape(-1, 1))[:, 1]
+    raise ValueError(f"🚨 Unknown calibration method: {method} (expected one of {CALIBRATION_METHODS})")
+
+
+def threshold_table(proba, y, thresholds=None):
+    """
+    Precision / recall / F1 of the rule `proba > threshold` for every threshold, in one pass.
+
+    Args:
+        proba (np.ndarray): Held-out probabilities, shape (n,).
+        y (np.ndarray): 0/1 held-out labels.
+        thresholds (np.ndarray): Increasing thresholds; defaults to THRESHOLD_STEPS over [0, 1].
+
+    Returns:
+        dict: Arrays "threshold", "precision" (NaN when nothing is flagged), "recall", "f1", "positive_rate".
+    """
+    if thresholds is None:
+        thresholds = np.linspace(0.0, 1.0, THRESHOLD_STEPS)
+    order = np.argsort(proba, kind="stable")
+    sorted_proba = np.asarray(proba)[order]
+    positives_below = np.concatenate([[0], np.cumsum(np.asarray(y)[order])])
+
+    n, n_pos = len(sorted_proba), positives_below[-1]
+    below = np.searchsorted(sorted_proba, thresholds, side="right")  # Rows with proba <= threshold
+    flagged = n - below
+    tp = n_pos - positives_below[below]
+    with np.errstate(invalid="ignore", divide="ignore"):
+        precision = np.where(flagged > 0, tp / flagged, np.nan)
+        recall = tp / n_pos if n_pos else np.zeros(len(thresholds))
+        f1 = 2 * tp / (flagged + n_pos)
+    return {
+        "threshold": np.asarray(thresholds, dtype=np.float64),
+        "precision": precision,
+        "recall": recall,
+        "f1": f1,
+        "positive_rate": flagged / n,
+    }
+
+
+def build_calibration(model_path, X, y, method="isotonic", threshold=None, source_version=None):
+    """
+    Fits the calibration of a model on held-out data and writes it next to the model.
+
+    Args:
+        model_path (str): Joblib model to calibrate.
+        X (np.ndarray): Held-out features, (n, 7) in FEATURE_LIST order.
+        y (np.ndarray): 0/1 held-out labels.
+        method (str): "isotonic" or "platt".
+        threshold (float | str): Decision threshold to record, or "f1" for the best held-out F1
+            (default: utils.DEFAULT_THRESHOLD).
+        source_version (str): Model version to stamp (default: the registry's).
+
+    Returns:
+        tuple: (Calibration, {"brier_raw": ..., "brier_calibrated": ...})
+    """
+    import pandas as pd
+
+    from model_registry import get_model, registry
+    from utils import DEFAULT_THRESHOLD, FEATURE_LIST
+
+    y = np.asarray(y)
+    raw = get_model(model_path).predict_proba(pd.DataFrame(X, columns=FEATURE_LIST))[:, 1]
+    knots_x, knots_y = fit_calibration_map(raw, y, method)
+    calibrated = np.interp(raw, knots_x, knots_y)
+
+    calibration = Calibration(
+        knots_x, knots_y, threshold_table(calibrated, y), DEFAULT_THRESHOLD, method,
+        source_version or registry.version(model_path),
+        datetime.datetime.now(datetime.timezone.utc).isoformat(timespec="seconds"), len(y),
+    )
+    if threshold == "f1":
+        calibration.threshold = calibration.best_f1_threshold()
+    elif threshold is not None:
+        calibration.threshold = float(threshold)
+    calibration.save(calibration_path(model_path))
+    scores = {
+        "brier_raw": float(np.mean((raw - y) ** 2)),
+        "brier_calibrated": float(np.mean((calibrated - y) ** 2)),
+    }
+    return calibration, scores
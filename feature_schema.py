@@ -0,0 +1,191 @@
+# feature_schema.py
+#
+# The model's input schema, declared once: feature order, valid ranges (the
+# predictor page's slider bounds), integer features and the level encodings of
+# the categorical inputs. `FeatureEncoder` maps form values, records or columns
+# straight into float32 matrices in model order, without building a DataFrame,
+# and validates whole batches with a few vectorized comparisons.
+#
+# Usage:
+#     X = encoder.encode_row({"age_years": 45, "gender": "Male", ...})   # (1, 7) float32
+#     X = encoder.encode_columns({"age_years": [45, 61], ...})           # (2, 7) float32
+
+import threading
+from dataclasses import dataclass
+
+import numpy as np
+
+
+# -------------------- 📋 SCHEMA -------------------- #
+
+@dataclass(frozen=True)
+class FeatureSpec:
+    """One model input."""
+    name: str
+    label: str               # Widget label on the predictor page
+    low: float               # Inclusive valid range (slider bounds)
+    high: float
+    default: float
+    step: float = 1
+    integer: bool = True
+    levels: tuple = ()       # ((display label, code), ...) for categorical inputs
+
+
+LEVELS_1_TO_3 = (("1️⃣ Normal", 1), ("2️⃣ Above Normal", 2), ("3️⃣ Well Above Normal", 3))
+
+FEATURE_SCHEMA = (
+    FeatureSpec("age_years", "🎂 Age", 18, 100, 45),
+    FeatureSpec("systolic_bp", "🩺 Systolic BP", 80, 200, 120),
+    FeatureSpec("cholesterol_level", "🧈 Cholesterol Level", 1, 3, 1, levels=LEVELS_1_TO_3),
+    FeatureSpec("bmi", "⚖️ BMI", 15.0, 45.0, 25.0, step=0.1, integer=False),
+    FeatureSpec("glucose_level", "🍭 Glucose Level", 1, 3, 1, levels=LEVELS_1_TO_3),
+    FeatureSpec("gender", "🛋 Gender", 0, 1, 1, levels=(("Male", 1), ("Female", 0))),
+    FeatureSpec("smokes", "🚬 Smokes", 0, 1, 0, levels=(("No", 0), ("Yes", 1))),
+)
+
+FEATURE_NAMES = [spec.name for spec in FEATURE_SCHEMA]
+SCHEMA_BY_NAME = {spec.name: spec for spec in FEATURE_SCHEMA}
+
+
+# -------------------- 🧮 ENCODER -------------------- #
+
+class FeatureEncoder:
+    """
+    Encodes inputs into float32 matrices in schema order.
+
+    Single rows are written into a per-thread buffer that is reused across
+    calls: the returned (1, f) array is only valid until the same thread
+    encodes the next row (copy it to keep it).
+
+    Args:
+        schema (tuple[FeatureSpec]): Features in model order.
+    """
+
+    def __init__(self, schema=FEATURE_SCHEMA):
+        self.schema = tuple(schema)
+        self.names = [spec.name for spec in self.schema]
+        self._index = {name: j for j, name in enumerate(self.names)}
+        self._low = np.array([spec.low for spec in self.schema], dtype=np.float32)
+        self._high = np.array([spec.high for spec in self.schema], dtype=np.float32)
+        self._integer = np.array([spec.integer for spec in self.schema])
+        self._codes = [dict(spec.levels) for spec in self.schema]
+        self._local = threading.local()
+
+    def _row_buffer(self):
+        buffer = getattr(self._local, "buffer", None)
+        if buffer is None:
+            buffer = self._local.buffer = np.empty((1, len(self.names)), dtype=np.float32)
+        return buffer
+
+    def _code(self, j, value):
+        """Maps a level label (e.g. "Male") to its code; numbers pass through."""
+        if isinstance(value, str):
+            try:
+                return self._codes[j][value]
+            except KeyError:
+                raise ValueError(f"🚨 Unknown value {value!r} for `{self.names[j]}`")
+        return value
+
+    def encode_row(self, values, validate=True):
+        """
+        Encodes one input row.
+
+        Args:
+            values (Mapping | Sequence): {name: value} or values in schema order.
+                Categorical features also accept their display labels.
+            validate (bool): Check ranges and integer features.
+
+        Returns:
+            np.ndarray: (1, f) float32 view of this thread's reusable buffer.
+        """
+        if hasattr(values, "keys"):
+            missing = [name for name in self.names if name not in values]
+            if missing:
+                raise ValueError(f"🚨 Missing required input features: {missing}")
+            values = [values[name] for name in self.names]
+        elif len(values) != len(self.names):
+            raise ValueError(f"🚨 Expected {len(self.names)} features, got {len(values)}")
+
+        out = self._row_buffer()
+        row = out[0]
+        for j, value in enumerate(values):
+            row[j] = self._code(j, value)
+        if validate:
+            self.validate(out)
+        return out
+
+    def encode_columns(self, columns, validate=True):
+        """
+        Encodes a columnar batch ({name: sequence}); extra columns are ignored.
+
+        Returns:
+            np.ndarray: (n, f) float32 matrix (a new array).
+        """
+        missing = [name for name in self.names if name not in columns]
+        if missing:
+            raise ValueError(f"🚨 Missing required input features: {missing}")
+        n_rows = len(columns[self.names[0]])
+        X = np.empty((n_rows, len(self.names)), dtype=np.float32)
+        for j, name in enumerate(self.names):
+            column = columns[name]
+            if self._codes[j] and len(column) and isinstance(column[0], str):
+                column = [self._code(j, value) for value in column]
+            column = np.asarray(column, dtype=np.float32)
+            if column.shape != (n_rows,):
+                raise ValueError(f"🚨 Column `{name}` must be a list of {n_rows} numbers")
+            X[:, j] = column
+        if validate:
+            self.validate(X)
+        return X
+
+    def encode_records(self, records, validate=True):
+        """
+        Encodes a list of {name: value} records.
+
+        Returns:
+            np.ndarray: (n, f) float32 matrix (a new array).
+        """
+        X = np.empty((len(records), len(self.names)), dtype=np.float32)
+        try:
+            for i, record in enumerate(records):
+                X[i] = [self._code(j, record[name]) for j, name in enumerate(self.names)]
+        except KeyError:
+            missing = [name for name in self.names if name not in records[i]]
+            raise ValueError(f"🚨 Missing required input features: {missing} (record {i})")
+        if validate:
+            self.validate(X)
+        return X
+
+    def _invalid(self, X):
+        """(n, f) mask of values outside their range (or NaN) or non-integer where required."""
+        bad = ~((X >= self._low) & (X <= self._high))  # Also catches NaN
+        bad |= self._integer & (X != np.round(X))
+        return bad
+
+    def valid_rows(self, X):
+        """
+        Returns a (n,) boolean mask of the rows that pass `validate` (e.g. to drop outliers).
+        """
+        return ~self._invalid(X).any(axis=1)
+
+    def validate(self, X):
+        """
+        Checks a (n, f) matrix against the schema in one vectorized pass.
+
+        Raises:
+            ValueError: Naming each offending feature, its number of bad rows and its valid range.
+        """
+        bad = self._invalid(X)
+        if not bad.any():
+            return
+        counts = bad.sum(axis=0)
+        problems = [
+            f"`{name}` ({counts[j]} row{'s' if counts[j] > 1 else ''}, valid: "
+            f"{'integer ' if self._integer[j] else ''}{self.schema[j].low}–{self.schema[j].high})"
+            for j, name in enumerate(self.names) if counts[j]
+        ]
+        raise ValueError(f"🚨 Invalid input values: {', '.join(problems)}")
+
+
+# Shared, stateless apart from the per-thread row buffers
+encoder = FeatureEncoder()
@@ -0,0 +1,198 @@
+# instrumentation.py
+#
+# Lightweight timing of hot paths (model loading, DataFrame building,
+# predict_proba, Lottie/image loading, plot construction, page renders).
+# Durations are aggregated in-process into fixed-bucket histograms, one per
+# stage, and exported in Prometheus text format:
+#
+#     $HEART_METRICS_PORT=9102  -> http://localhost:9102/metrics
+#     $HEART_METRICS_FILE=/var/lib/node_exporter/heart.prom  (rewritten every 15 s)
+#
+# Recording costs about a microsecond (two perf_counter calls, one bisect, one
+# lock). Set HEART_METRICS=0 to turn timing into a no-op.
+#
+# Usage:
+#     with timed("predict_proba"):
+#         ...
+#
+#     @timed("lottie_load")
+#     def load_lottie_file(...): ...
+
+import os
+import threading
+import time
+from bisect import bisect_left
+from contextlib import ContextDecorator
+
+
+ENABLED = os.environ.get("HEART_METRICS", "1") != "0"
+METRICS_PORT = os.environ.get("HEART_METRICS_PORT")
+METRICS_FILE = os.environ.get("HEART_METRICS_FILE")
+FILE_INTERVAL = 15.0  # Seconds between metrics file rewrites
+
+# Histogram upper bounds in seconds (+Inf is implicit)
+BUCKETS = (0.0001, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+METRIC_NAME = "heart_stage_duration_seconds"
+
+
+# -------------------- 📊 HISTOGRAMS -------------------- #
+
+class _Histogram:
+    __slots__ = ("counts", "total", "count")
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS) + 1)
+        self.total = 0.0
+        self.count = 0
+
+
+_histograms = {}   # stage -> _Histogram
+_lock = threading.Lock()
+
+
+def observe(stage, seconds):
+    """Records one duration (in seconds) for a stage (no-op with HEART_METRICS=0)."""
+    if not ENABLED:
+        return
+    with _lock:
+        hist = _histograms.get(stage)
+        if hist is None:
+            hist = _histograms[stage] = _Histogram()
+        hist.counts[bisect_left(BUCKETS, seconds)] += 1
+        hist.total += seconds
+        hist.count += 1
+
+
+class timed(ContextDecorator):
+    """Context manager / decorator that records the wall time of a block under `stage`."""
+
+    def __init__(self, stage):
+        self.stage = stage
+
+    def __enter__(self):
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        observe(self.stage, time.perf_counter() - self._start)
+        return False
+
+    def _recreate_cm(self):
+        return timed(self.stage)  # Fresh instance per call: safe across threads/reentrancy
+
+
+def snapshot():
+    """
+    Returns {stage: {"count", "sum", "buckets"}} with cumulative bucket counts.
+    """
+    with _lock:
+        items = [(stage, list(h.counts), h.total, h.count) for stage, h in _histograms.items()]
+    result = {}
+    for stage, counts, total, count in items:
+        cumulative, running = [], 0
+        for c in counts:
+            running += c
+            cumulative.append(running)
+        result[stage] = {"count": count, "sum": total, "buckets": cumulative}
+    return result
+
+
+def reset():
+    with _lock:
+        _histograms.clear()
+
+
+# -------------------- 📈 OTHER COLLECTORS -------------------- #
+
+_collectors = []  # callables returning [(name, type, help, value)]
+
+
+def register_collector(fn):
+    """Adds a callable whose (name, type, help, value) samples are appended to the export."""
+    if fn not in _collectors:
+        _collectors.append(fn)
+    return fn
+
+
+# -------------------- 📤 PROMETHEUS EXPORT -------------------- #
+
+def _le(bound):
+    return "+Inf" if bound is None else repr(bound)
+
+
+def render_prometheus():
+    """Returns all metrics in the Prometheus text exposition format (0.0.4)."""
+    lines = [
+        f"# HELP {METRIC_NAME} Wall time of instrumented hot-path stages.",
+        f"# TYPE {METRIC_NAME} histogram",
+    ]
+    for stage, data in sorted(snapshot().items()):
+        label = stage.replace("\\", "\\\\").replace('"', '\\"')
+        for bound, value in zip(list(BUCKETS) + [None], data["buckets"]):
+            lines.append(f'{METRIC_NAME}_bucket{{stage="{label}",le="{_le(bound)}"}} {value}')
+        lines.append(f'{METRIC_NAME}_sum{{stage="{label}"}} {data["sum"]!r}')
+        lines.append(f'{METRIC_NAME}_count{{stage="{label}"}} {data["count"]}')
+
+    for collector in list(_collectors):
+        for name, kind, help_text, value in collector():
+            lines += [f"# HELP {name} {help_text}", f"# TYPE {name} {kind}", f"{name} {value!r}"]
+    return "\n".join(lines) + "\n"
+
+
+def write_metrics_file(path=METRICS_FILE):
+    """Atomically writes the current metrics to `path` (node_exporter textfile format)."""
+    tmp = f"{path}.tmp"
+    with open(tmp, "w") as f:
+        f.write(render_prometheus())
+    os.replace(tmp, path)
+
+
+def _serve(port):
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split("?")[0] != "/metrics":
+                self.send_error(404)
+                return
+            body = render_prometheus().encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    ThreadingHTTPServer(("127.0.0.1", port), Handler).serve_forever()
+
+
+def _write_loop(path):
+    while True:
+        write_metrics_file(path)
+        time.sleep(FILE_INTERVAL)
+
+
+_exporters_started = False
+_exporters_lock = threading.Lock()
+
+
+def start_exporters(port=METRICS_PORT, path=METRICS_FILE):
+    """
+    Starts the configured exporters once per process (safe to call on every rerun).
+
+    Args:
+        port (int | str | None): Serve /metrics on this localhost port.
+        path (str | None): Periodically rewrite this Prometheus text file.
+    """
+    global _exporters_started
+    with _exporters_lock:
+        if _exporters_started:
+            return
+        _exporters_started = True
+    if port:
+        threading.Thread(target=_serve, args=(int(port),), name="metrics-http", daemon=True).start()
+    if path:
+        threading.Thread(target=_write_loop, args=(path,), name="metrics-file", daemon=True).start()
@@ -0,0 +1,193 @@
+# mlflow_store.py
+#
+# Read experiment runs straight from a local MLflow tracking store (file-based
+# `mlruns/` or SQLite). Runs are fetched with paginated `search_runs`, kept in
+# a process-wide cache, and refreshed incrementally: only runs that started at
+# or after the newest start time already seen are pulled again.
+#
+# The tracking URI defaults to ./mlruns and can be overridden with
+# $MLFLOW_TRACKING_URI (e.g. sqlite:///mlflow.db).
+
+import os
+import threading
+import time
+
+import pandas as pd
+
+from model_registry import BASE_DIR
+
+
+TRACKING_URI = os.environ.get("MLFLOW_TRACKING_URI", "file:" + os.path.join(BASE_DIR, "mlruns"))
+PAGE_SIZE = 1_000  # Runs per search_runs page
+
+
+def allow_file_store(tracking_uri=TRACKING_URI):
+    """Opts in to the file store, which recent MLflow versions refuse by default (before importing mlflow)."""
+    if tracking_uri.startswith("file:"):
+        os.environ.setdefault("MLFLOW_ALLOW_FILE_STORE", "true")
+
+
+def has_tracking_data(tracking_uri=TRACKING_URI):
+    """
+    Cheap check (no mlflow import) for whether the tracking store can hold runs.
+
+    For a file store this looks for an experiment folder with a `meta.yaml`;
+    any other URI (SQLite, server) is assumed to be populated.
+    """
+    if not tracking_uri.startswith("file:"):
+        return True
+    root = tracking_uri[len("file:"):]
+    if not os.path.isdir(root):
+        return False
+    return any(os.path.isfile(os.path.join(root, name, "meta.yaml")) for name in os.listdir(root))
+
+
+def _run_row(run):
+    """Flattens an MLflow `Run` into one table row."""
+    row = {
+        "Run ID": run.info.run_id,
+        "Run Name": run.data.tags.get("mlflow.runName", run.info.run_id[:8]),
+        "Experiment ID": run.info.experiment_id,
+        "Status": run.info.status,
+        "Start Time": run.info.start_time,
+    }
+    row.update({f"metrics.{k}": v for k, v in run.data.metrics.items()})
+    row.update({f"params.{k}": v for k, v in run.data.params.items()})
+    return row
+
+
+# -------------------- 🧪 RUN CACHE -------------------- #
+
+class RunCache:
+    """
+    Process-wide, incrementally refreshed cache of the runs in a tracking store.
+    """
+
+    def __init__(self, tracking_uri=TRACKING_URI, page_size=PAGE_SIZE):
+        self.tracking_uri = tracking_uri
+        self.page_size = page_size
+        self._client = None
+        self._runs = {}            # run_id -> row
+        self._unfinished = set()   # run_ids to re-fetch until they finish
+        self._last_start_time = 0
+        self._last_refresh = None
+        self._lock = threading.RLock()  # Re-entered by frame() for the first refresh
+
+    @property
+    def client(self):
+        if self._client is None:
+            allow_file_store(self.tracking_uri)
+            from mlflow.tracking import MlflowClient
+
+            self._client = MlflowClient(tracking_uri=self.tracking_uri)
+        return self._client
+
+    def experiment_ids(self):
+        return [exp.experiment_id for exp in self.client.search_experiments()]
+
+    def search(self, filter_string="", order_by=None, max_results=None):
+        """
+        Runs a server-side `search_runs` across all experiments, following page tokens.
+
+        Args:
+            filter_string (str): MLflow search filter (e.g. "metrics.accuracy > 0.9").
+            order_by (list[str]): MLflow order-by clauses.
+            max_results (int): Stop after this many runs (None = all).
+
+        Returns:
+            list[mlflow.entities.Run]
+        """
+        experiment_ids = self.experiment_ids()
+        if not experiment_ids:
+            return []
+        runs, page_token = [], None
+        while True:
+            page_size = self.page_size if max_results is None else min(self.page_size, max_results - len(runs))
+            page = self.client.search_runs(
+                experiment_ids,
+                filter_string=filter_string,
+                order_by=order_by,
+                max_results=page_size,
+                page_token=page_token,
+            )
+            runs.extend(page)
+            page_token = page.token
+            if not page_token or (max_results is not None and len(runs) >= max_results):
+                return runs
+
+    def refresh(self):
+        """
+        Pulls runs that started at or after the newest start time seen so far.
+
+        Returns:
+            int: Number of runs added or updated.
+        """
+        with self._lock:
+            runs = self.search(
+                filter_string=f"attributes.start_time >= {self._last_start_time}",
+                order_by=["attributes.start_time ASC"],
+            )
+            # Runs still in progress last time may have new metrics/status
+            for run_id in self._unfinished - {run.info.run_id for run in runs}:
+                runs.append(self.client.get_run(run_id))
+
+            for run in runs:
+                self._runs[run.info.run_id] = _run_row(run)
+                if run.info.status in ("RUNNING", "SCHEDULED"):
+                    self._unfinished.add(run.info.run_id)
+                else:
+                    self._unfinished.discard(run.info.run_id)
+                self._last_start_time = max(self._last_start_time, run.info.start_time or 0)
+            self._last_refresh = time.time()
+            return len(runs)
+
+    def frame(self):
+        """
+        Returns all cached runs as a DataFrame, refreshing once if never loaded.
+
+        Returns:
+            pd.DataFrame: One row per run, newest first.
+        """
+        with self._lock:
+            if self._last_refresh is None:
+                self.refresh()
+            rows = list(self._runs.values())
+        df = pd.DataFrame(rows)
+        if df.empty:
+            return df
+        return df.sort_values("Start Time", ascending=False).reset_index(drop=True)
+
+    def top_k(self, metric, k=10, filter_string=""):
+        """
+        Returns the best `k` runs by a metric, ranked server-side.
+
+        Args:
+            metric (str): Metric key (without the `metrics.` prefix).
+            k (int): Number of runs.
+            filter_string (str): Extra MLflow search filter.
+
+        Returns:
+            pd.DataFrame: Up to `k` rows ordered by the metric, descending.
+        """
+        runs = self.search(filter_string=filter_string, order_by=[f"metrics.`{metric}` DESC"], max_results=k)
+        return pd.DataFrame([_run_row(run) for run in runs])
+
+    @property
+    def last_refresh(self):
+        return self._last_refresh
+
+    def __len__(self):
+        with self._lock:
+            return len(self._runs)
+
+
+_caches = {}
+_caches_lock = threading.Lock()
+
+
+def get_run_cache(tracking_uri=TRACKING_URI):
+    """Returns the process-wide `RunCache` for a tracking URI."""
+    with _caches_lock:
+        if tracking_uri not in _caches:
+            _caches[tracking_uri] = RunCache(tracking_uri)
+        return _caches[tracking_uri]
@@ -0,0 +1,282 @@
+# model_export.py
+#
+# Pickle-free model artifacts for fast, version-independent startup.
+#
+# `python model_export.py` writes, next to the joblib pickle:
+#   <model>.txt            LightGBM's native text format (readable by any LightGBM version)
+#   <model>.forest.npz     the tree_engine flat arrays (NumPy only, no pickle)
+#   <model>.manifest.json  feature list, threshold, metrics, source model version
+#   <model>.calibration.npz  with --holdout: calibration map + threshold table (calibration.py)
+#
+# With HEART_INFERENCE_BACKEND=exported the app loads the manifest and the
+# flat arrays on the first prediction (~60 ms, NumPy only) instead of
+# unpickling the sklearn wrapper (~1.3 s with the lightgbm/sklearn imports).
+# Without Numba, batches larger than FOREST_MAX_ROWS are scored by a LightGBM
+# Booster read from the text file, which is only imported when first needed.
+#
+# Usage:
+#     python model_export.py
+#     python model_export.py --model mlruns/final_lgbm_model.pkl --metric roc_auc=0.87 --metric f1=0.81
+#     python model_export.py --holdout holdout.csv --calibration isotonic --threshold f1
+
+import argparse
+import datetime
+import json
+import os
+import threading
+
+import numpy as np
+
+from model_registry import MODEL_7_FEATURE_PATH, ModelRegistry, _file_sha256, resolve_path
+from tree_engine import CompiledForest, numba
+
+
+MANIFEST_VERSION = 1
+FOREST_MAX_ROWS = 1_000  # Larger batches go to the native Booster (when Numba is missing)
+
+
+def export_paths(model_path=MODEL_7_FEATURE_PATH):
+    """Returns the (native text, flat arrays, manifest) paths that belong to a model file."""
+    root = os.path.splitext(resolve_path(model_path))[0]
+    return f"{root}.txt", f"{root}.forest.npz", f"{root}.manifest.json"
+
+
+# -------------------- 📦 EXPORTED MODEL -------------------- #
+
+class ExportedModel:
+    """
+    A model loaded from an exported manifest.
+
+    Exposes `predict_proba` with the sklearn output shape, plus the manifest's
+    `features`, `threshold` and `metrics`.
+    """
+
+    def __init__(self, manifest, directory):
+        self.manifest = manifest
+        self.features = list(manifest["features"])
+        self.threshold = float(manifest["threshold"])
+        self.metrics = dict(manifest.get("metrics", {}))
+        self.forest = CompiledForest.load(os.path.join(directory, manifest["files"]["forest"]))
+        self._booster_path = os.path.join(directory, manifest["files"]["lightgbm"])
+        self._booster = None
+        self._lock = threading.Lock()
+
+    @property
+    def n_features_in_(self):
+        return len(self.features)
+
+    @property
+    def feature_name_(self):
+        return self.features
+
+    def booster(self):
+        """The native LightGBM Booster, read from the text export on first use."""
+        if self._booster is None:
+            with self._lock:
+                if self._booster is None:
+                    import lightgbm
+
+                    self._booster = lightgbm.Booster(model_file=self._booster_path)
+        return self._booster
+
+    def predict_proba(self, X):
+        """
+        Returns class probabilities of shape (n, 2).
+
+        Args:
+            X (array-like): Features of shape (n, f) or (f,) in `features` order.
+        """
+        X = np.asarray(X, dtype=np.float64)
+        if X.ndim == 1:
+            X = X.reshape(1, -1)
+        if numba is not None or len(X) <= FOREST_MAX_ROWS:
+            return self.forest.predict_proba(X)
+        p1 = self.booster().predict(X)
+        return np.column_stack([1.0 - p1, p1])
+
+
+def load_exported(manifest_path):
+    """
+    Loads an `ExportedModel` from its manifest.
+
+    Raises:
+        ValueError: If the manifest was written by a newer exporter.
+    """
+    with open(manifest_path, "r", encoding="utf-8") as f:
+        manifest = json.load(f)
+    if manifest.get("manifest_version", 0) > MANIFEST_VERSION:
+        raise ValueError(f"🚨 Unsupported model manifest version: {manifest.get('manifest_version')}")
+    return ExportedModel(manifest, os.path.dirname(manifest_path))
+
+
+# Same mtime/hash-keyed caching (and hot-swapping) as the pickles
+export_store = ModelRegistry(loader=load_exported)
+
+
+def get_exported_model(model_path=MODEL_7_FEATURE_PATH):
+    """
+    Returns the exported form of a model from the process-wide export store.
+
+    The export is not tied to the pickle's contents: re-run the export after
+    retraining (the manifest records the pickle's `source_version`).
+
+    Args:
+        model_path (str): Pickle the export was made from (only its path is used).
+
+    Raises:
+        FileNotFoundError: If the model has not been exported.
+    """
+    manifest_path = export_paths(model_path)[2]
+    if not os.path.exists(manifest_path):
+        raise FileNotFoundError(f"❌ No exported model at {manifest_path} (run `python model_export.py`)")
+    return export_store.get(manifest_path)
+
+
+# -------------------- 🏗️ EXPORT -------------------- #
+
+def _sample_input(booster, rows, seed=0):
+    """Uniform random rows within each feature's training range."""
+    infos = booster.dump_model()["feature_infos"]
+    rng = np.random.default_rng(seed)
+    return np.column_stack([rng.uniform(infos[name]["min_value"], infos[name]["max_value"], rows)
+                            for name in booster.feature_name()])
+
+
+def export_model(model_path=MODEL_7_FEATURE_PATH, threshold=None, metrics=None, verify_rows=10_000,
+                 holdout=None, calibration_method="isotonic"):
+    """
+    Writes the native text, flat-array and manifest files for a pickled model.
+
+    Both exports are checked against the pickle's `predict_proba` before the
+    manifest is written; the largest difference is recorded in it.
+
+    Args:
+        model_path (str): Joblib pickle of a fitted LightGBM binary classifier.
+        threshold (float | str): Decision threshold to record (default: utils.DEFAULT_THRESHOLD),
+            or "f1" for the best held-out F1 (needs `holdout`).
+        metrics (dict): Evaluation metrics to record (e.g. {"roc_auc": 0.87}).
+        verify_rows (int): Random in-range rows used for the check.
+        holdout (tuple): Optional held-out (X, y) to fit the calibration and threshold table on.
+        calibration_method (str): "isotonic" or "platt".
+
+    Returns:
+        dict: The manifest.
+    """
+    import lightgbm
+
+    from model_registry import get_model
+    from tree_engine import compile_model
+    from utils import DEFAULT_THRESHOLD
+
+    model_path = resolve_path(model_path)
+    text_path, forest_path, manifest_path = export_paths(model_path)
+    model = get_model(model_path)
+    booster = getattr(model, "booster_", model)
+
+    booster.save_model(text_path)
+    forest = compile_model(model)
+    forest.save(forest_path)
+
+    X = _sample_input(booster, verify_rows)
+    expected = model.predict_proba(X)[:, 1]
+    max_diff = 0.0
+    for actual in (CompiledForest.load(forest_path).predict_proba(X)[:, 1],
+                   lightgbm.Booster(model_file=text_path).predict(X)):
+        max_diff = max(max_diff, float(np.max(np.abs(actual - expected))))
+    if max_diff > 1e-9:
+        raise AssertionError(f"🚨 Exported model differs from predict_proba by {max_diff:.3g}")
+
+    source_version = _file_sha256(model_path)[:12]
+    files = {"lightgbm": os.path.basename(text_path), "forest": os.path.basename(forest_path)}
+    calibration_info = None
+    if holdout is not None:
+        from calibration import build_calibration, calibration_path
+
+        calibration, scores = build_calibration(model_path, *holdout, method=calibration_method,
+                                                threshold=threshold, source_version=source_version)
+        threshold = calibration.threshold
+        files["calibration"] = os.path.basename(calibration_path(model_path))
+        calibration_info = {"method": calibration.method, "rows": calibration.rows, **scores}
+    elif threshold == "f1":
+        raise ValueError("🚨 --threshold f1 needs held-out data (--holdout)")
+
+    manifest = {
+        "manifest_version": MANIFEST_VERSION,
+        "features": list(booster.feature_name()),
+        "threshold": DEFAULT_THRESHOLD if threshold is None else float(threshold),
+        "metrics": dict(metrics or {}),
+        "files": files,
+        "calibration": calibration_info,
+        "source_model": os.path.basename(model_path),
+        "source_version": source_version,
+        "lightgbm_version": lightgbm.__version__,
+        "n_trees": forest.n_trees,
+        "max_abs_diff": max_diff,
+        "exported_at": datetime.datetime.now(datetime.timezone.utc).isoformat(timespec="seconds"),
+    }
+    tmp = f"{manifest_path}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(tmp, manifest_path)  # Written last, so readers never see a partial export
+    return manifest
+
+
+# -------------------- 🖥️ CLI -------------------- #
+
+def _metric(text):
+    name, _, value = text.partition("=")
+    try:
+        return name, float(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected NAME=VALUE, got {text!r}")
+
+
+def _threshold(text):
+    if text == "f1":
+        return text
+    try:
+        return float(text)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected a probability or \"f1\", got {text!r}")
+
+
+def main(argv=None):
+    from training import TARGET_COLUMN, load_training_data
+
+    parser = argparse.ArgumentParser(description="Export a pickled LightGBM model to pickle-free artifacts.")
+    parser.add_argument("--model", default=MODEL_7_FEATURE_PATH, help="Joblib model path")
+    parser.add_argument("--threshold", type=_threshold, help="Decision threshold to record, or \"f1\" "
+                                                             "for the best held-out F1 (needs --holdout)")
+    parser.add_argument("--metric", type=_metric, action="append", default=[], metavar="NAME=VALUE",
+                        help="Evaluation metric to record (repeatable)")
+    parser.add_argument("--holdout", help="Held-out CSV/Parquet (features + target) to fit the calibration on")
+    parser.add_argument("--target", default=TARGET_COLUMN, help="0/1 label column of --holdout")
+    parser.add_argument("--calibration", choices=["isotonic", "platt"], default="isotonic",
+                        help="Calibration method")
+    args = parser.parse_args(argv)
+
+    holdout = None
+    if args.holdout:
+        X, y, _ = load_training_data(args.holdout, args.target)
+        holdout = (X, y)
+    elif args.threshold == "f1":
+        parser.error("--threshold f1 needs --holdout")
+
+    manifest = export_model(args.model, threshold=args.threshold, metrics=dict(args.metric),
+                            holdout=holdout, calibration_method=args.calibration)
+    paths = list(export_paths(args.model))
+    if holdout is not None:
+        from calibration import calibration_path
+
+        paths.append(calibration_path(args.model))
+    for path in paths:
+        print(f"✅ {os.path.relpath(path)} ({os.path.getsize(path) / 1024:.0f} KB)")
+    print(f"   {manifest['n_trees']} trees, max |Δp| vs pickle: {manifest['max_abs_diff']:.3g}")
+    if manifest["calibration"]:
+        info = manifest["calibration"]
+        print(f"   {info['method']} calibration on {info['rows']:,} rows: Brier {info['brier_raw']:.4f} -> "
+              f"{info['brier_calibrated']:.4f}, threshold {manifest['threshold']:.3f}")
+
+
+if __name__ == "__main__":
+    main()
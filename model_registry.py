@@ -0,0 +1,282 @@
+# model_registry.py
+
+import hashlib
+import os
+import threading
+import time
+from dataclasses import dataclass, asdict
+
+from instrumentation import observe
+
+
+# -------------------- 📁 ARTIFACT PATHS -------------------- #
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+MODEL_7_FEATURE_PATH = os.path.join(BASE_DIR, "models", "final_7_feature_lgbm.pkl")
+MODEL_FULL_PATH = os.path.join(BASE_DIR, "mlruns", "final_lgbm_model.pkl")
+
+# "lightgbm" (sklearn wrapper), "compiled" (tree_engine flat arrays),
+# "grid" (risk_grid lookup table with model fallback)
+# or "exported" (model_export pickle-free artifacts, no sklearn import)
+INFERENCE_BACKEND = os.environ.get("HEART_INFERENCE_BACKEND", "lightgbm")
+
+
+def resolve_path(path):
+    """
+    Resolves a project-relative artifact path to an absolute path.
+
+    Args:
+        path (str): Absolute path, or path relative to the project root.
+
+    Returns:
+        str: Normalized absolute path.
+    """
+    if not os.path.isabs(path):
+        path = os.path.join(BASE_DIR, path)
+    return os.path.normpath(path)
+
+
+def _file_sha256(path, chunk_size=1 << 20):
+    """Returns the SHA-256 hex digest of a file, read in 1 MB chunks."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _joblib_load(path):
+    import joblib  # Imported on first unpickle: pickle-free backends never need it
+
+    return joblib.load(path)
+
+
+def _rss_bytes():
+    """Returns the current resident set size of this process (0 if unknown)."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return 0
+
+
+# -------------------- 📊 ARTIFACT STATS -------------------- #
+
+@dataclass
+class ArtifactStats:
+    """Bookkeeping for one loaded artifact (shown on the MLflow Stats page)."""
+    path: str
+    version: str             # SHA-256 prefix of the file contents
+    mtime_ns: int
+    file_bytes: int
+    load_seconds: float      # Wall-clock time of the last unpickle
+    memory_bytes: int        # Approximate RSS growth caused by the last load
+    loads: int = 0           # Number of times the file was (re)loaded
+    hits: int = 0            # Number of lookups served from memory
+
+
+class _Entry:
+    __slots__ = ("obj", "stats")
+
+    def __init__(self, obj, stats):
+        self.obj = obj
+        self.stats = stats
+
+
+# -------------------- 💾 MODEL REGISTRY -------------------- #
+
+class ModelRegistry:
+    """
+    Process-wide cache of joblib artifacts keyed by absolute path.
+
+    Every lookup does a cheap ``os.stat``; the file is only unpickled again when
+    its mtime or size changed *and* its SHA-256 differs from the loaded version,
+    so retrained models are hot-swapped without restarting the app.
+    """
+
+    def __init__(self, loader=_joblib_load):
+        self._loader = loader
+        self._entries = {}
+        self._derived = {}
+        self._path_locks = {}
+        self._lock = threading.Lock()
+
+    def _path_lock(self, path):
+        with self._lock:
+            return self._path_locks.setdefault(path, threading.RLock())
+
+    def get(self, path):
+        """
+        Returns the artifact stored at `path`, loading it at most once per version.
+
+        Args:
+            path (str): Absolute or project-relative path to a joblib file.
+
+        Returns:
+            The unpickled object.
+        """
+        path = resolve_path(path)
+        try:
+            info = os.stat(path)
+        except FileNotFoundError:
+            raise FileNotFoundError(f"❌ Model not found at {path}")
+
+        entry = self._entries.get(path)
+        if entry is not None and (entry.stats.mtime_ns, entry.stats.file_bytes) == (info.st_mtime_ns, info.st_size):
+            entry.stats.hits += 1
+            return entry.obj
+
+        # Serialize loads per path so concurrent sessions unpickle only once
+        with self._path_lock(path):
+            entry = self._entries.get(path)
+            info = os.stat(path)
+            if entry is not None and (entry.stats.mtime_ns, entry.stats.file_bytes) == (info.st_mtime_ns, info.st_size):
+                entry.stats.hits += 1
+                return entry.obj
+
+            version = _file_sha256(path)[:12]
+            if entry is not None and entry.stats.version == version:
+                # Touched but unchanged: keep the loaded object
+                entry.stats.mtime_ns = info.st_mtime_ns
+                entry.stats.hits += 1
+                return entry.obj
+
+            rss_before = _rss_bytes()
+            start = time.perf_counter()
+            obj = self._loader(path)
+            load_seconds = time.perf_counter() - start
+            observe("model_load", load_seconds)
+
+            stats = ArtifactStats(
+                path=path,
+                version=version,
+                mtime_ns=info.st_mtime_ns,
+                file_bytes=info.st_size,
+                load_seconds=load_seconds,
+                memory_bytes=max(_rss_bytes() - rss_before, 0),
+                loads=(entry.stats.loads if entry else 0) + 1,
+            )
+            self._entries[path] = _Entry(obj, stats)
+            return obj
+
+    def version(self, path):
+        """
+        Returns the content version of the artifact at `path`, loading it if needed.
+
+        Args:
+            path (str): Absolute or project-relative path to a joblib file.
+
+        Returns:
+            str: SHA-256 prefix identifying the loaded file contents.
+        """
+        path = resolve_path(path)
+        self.get(path)
+        return self._entries[path].stats.version
+
+    def derived(self, path, name, factory):
+        """
+        Returns an object built from the artifact at `path`, cached per artifact version.
+
+        Use this for anything expensive derived from a model (compiled trees,
+        explainers, ...) so it is rebuilt only when the model is hot-swapped.
+
+        Args:
+            path (str): Absolute or project-relative path to a joblib file.
+            name (str): Name of the derived object (cache key).
+            factory (callable): Builds the derived object from the loaded artifact.
+
+        Returns:
+            The cached result of `factory(artifact)`.
+        """
+        path = resolve_path(path)
+        obj = self.get(path)
+        version = self._entries[path].stats.version
+        cached = self._derived.get((path, name))
+        if cached is not None and cached[0] == version:
+            return cached[1]
+
+        with self._path_lock(path):
+            cached = self._derived.get((path, name))
+            if cached is not None and cached[0] == version:
+                return cached[1]
+            value = factory(obj)
+            self._derived[(path, name)] = (version, value)
+            return value
+
+    def stats(self):
+        """
+        Returns load statistics for every artifact currently held in memory.
+
+        Returns:
+            list[dict]: One dict per artifact (see `ArtifactStats`).
+        """
+        return [asdict(entry.stats) for entry in list(self._entries.values())]
+
+    def clear(self):
+        """Drops every cached artifact (the next `get` reloads from disk)."""
+        with self._lock:
+            self._entries.clear()
+            self._derived.clear()
+
+
+# Shared by every page and Streamlit session of this process
+registry = ModelRegistry()
+
+
+def get_model(path=MODEL_7_FEATURE_PATH):
+    """
+    Returns a model from the process-wide registry.
+
+    Args:
+        path (str): Model path; defaults to the 7-feature LightGBM model.
+
+    Returns:
+        Loaded model object (e.g., LightGBM).
+    """
+    return registry.get(path)
+
+
+def get_predictor(path=MODEL_7_FEATURE_PATH, backend=None):
+    """
+    Returns the object used for scoring: the LightGBM model or its compiled form.
+
+    Args:
+        path (str): Model path; defaults to the 7-feature LightGBM model.
+        backend (str): "lightgbm", "compiled", "grid" or "exported"; defaults to $HEART_INFERENCE_BACKEND.
+
+    Returns:
+        Object exposing `predict_proba`.
+    """
+    backend = backend or INFERENCE_BACKEND
+    if backend == "compiled":
+        from tree_engine import compile_verified
+        return registry.derived(path, "compiled", compile_verified)
+    if backend == "grid":
+        from risk_grid import load_grid_predictor
+        return load_grid_predictor(path)
+    if backend == "exported":
+        from model_export import get_exported_model
+        return get_exported_model(path)
+    if backend != "lightgbm":
+        raise ValueError(f"🚨 Unknown inference backend: {backend}")
+    return registry.get(path)
+
+
+def predictor_version(path=MODEL_7_FEATURE_PATH, backend=None):
+    """
+    Returns the content version of the model behind `get_predictor`.
+
+    For the "exported" backend this is the pickle version recorded in the
+    manifest, so the pickle is never loaded just to read its version.
+    """
+    if (backend or INFERENCE_BACKEND) == "exported":
+        from model_export import get_exported_model
+        return get_exported_model(path).manifest["source_version"]
+    return registry.version(path)
+
+
+def preload_models():
+    """Loads both shipped LightGBM models into the registry (e.g., at startup)."""
+    for path in (MODEL_7_FEATURE_PATH, MODEL_FULL_PATH):
+        registry.get(path)
@@ -1,68 +1,64 @@
 import streamlit as st
 import pandas as pd
 import numpy as np
-import joblib
-import os
-import json
+import time
+import plotly.express as px
 
 from streamlit_lottie import st_lottie
 from streamlit_extras.metric_cards import style_metric_cards
 
-from utils import set_particle_background
-set_particle_background()  # Apply animated particle background globally
-
-
-# -------------------- Custom CSS --------------------
-# Define custom styles for background, buttons, sliders
-st.markdown("""
-<style>
-    .main {
-        background-color: #f0f2f6;   /* Light gray background */
-    }
-    .block-container {
-        padding-top: 2rem;           /* Extra spacing at top */
-    }
-    .stButton > button {
-        background-color: #ff4b4b;   /* Red button background */
-        color: white;                /* White text */
-        border-radius: 8px;          /* Rounded corners */
-        font-weight: bold;           /* Bold text */
-    }
-    .stSlider > div {
-        color: #ff4b4b;              /* Slider text in red */
-    }
-</style>
-""", unsafe_allow_html=True)
+from utils import FEATURE_LIST
+from feature_schema import SCHEMA_BY_NAME, encoder
+from batch_scheduler import get_batcher
+from instrumentation import observe, timed
+from assets import load_json_asset
+from prediction_cache import canonical_key, prediction_cache
+from calibration import get_calibration, risk_threshold
+from shap_explainer import explain_row
+from what_if import what_if_sweep
 
 
 # -------------------- Page Function --------------------
 def predictor_page():
     """Renders the heart risk prediction page with form inputs, ML model prediction, and results."""
-    
+
+    # -------------------- Custom CSS --------------------
+    # Define custom styles for background, buttons, sliders
+    st.markdown("""
+    <style>
+        .main {
+            background-color: #f0f2f6;   /* Light gray background */
+        }
+        .block-container {
+            padding-top: 2rem;           /* Extra spacing at top */
+        }
+        .stButton > button {
+            background-color: #ff4b4b;   /* Red button background */
+            color: white;                /* White text */
+            border-radius: 8px;          /* Rounded corners */
+            font-weight: bold;           /* Bold text */
+        }
+        .stSlider > div {
+            color: #ff4b4b;              /* Slider text in red */
+        }
+    </style>
+    """, unsafe_allow_html=True)
+
     st.title("💖 Smart Risk Predictor")
 
-    # ----------------- Lottie Loader -----------------
-    # Utility function to load JSON-based Lottie animations
-    def load_lottie_file(filename):
-        try:
-            base_path = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "assets"))
-            file_path = os.path.join(base_path, filename)
-            with open(file_path, "r", encoding="utf-8") as f:
-                return json.load(f)
-        except Exception:
-            return None
-
-    # Load and display animated heart
-    lottie_heart = load_lottie_file("heart_lottie.json")
+    # ----------------- Lottie Animation -----------------
+    # Parsed once per process and shared by all sessions
+    with timed("predictor.lottie_load"):
+        lottie_heart = load_json_asset("heart_lottie.json")
     if lottie_heart:
         st_lottie(lottie_heart, height=250, key="heart")
     else:
         st.warning("⚠️ Could not load heart animation.")
 
     # ----------------- Load Model -----------------
-    # Load trained LightGBM model (7-feature version)
-    model_path = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "models", "final_7_feature_lgbm.pkl"))
-    model = joblib.load(model_path)
+    # The model is loaded from the shared registry on the first prediction;
+    # predictions from all sessions are scored together by the micro-batcher
+    batcher = get_batcher()
 
     # ----------------- Info Expander -----------------
     # Provide explanation of how predictions are made
@@ -81,56 +77,56 @@ def predictor_page():
         # Split inputs into 2 columns for better UI
         col1, col2 = st.columns(2)
 
-        with col1:
-            age = st.slider("🎂 Age", 18, 100, 45)
-            sys_bp = st.slider("🩺 Systolic BP", 80, 200, 120)
+        def widget(name):
+            spec = SCHEMA_BY_NAME[name]
+            if spec.levels:
+                return st.selectbox(spec.label, [label for label, _ in spec.levels])
+            return st.slider(spec.label, spec.low, spec.high, spec.default, step=spec.step)
 
-            cholesterol_options = {
-                "1️⃣ Normal": 1,
-                "2️⃣ Above Normal": 2,
-                "3️⃣ Well Above Normal": 3
-            }
-            chol_label = st.selectbox("🧈 Cholesterol Level", list(cholesterol_options.keys()))
-            chol = cholesterol_options[chol_label]
-
-            bmi = st.slider("⚖️ BMI", 15.0, 45.0, 25.0)
+        # Widgets are declared by the feature schema (labels, ranges, level encodings)
+        values = {}
+        with col1:
+            for name in ("age_years", "systolic_bp", "cholesterol_level", "bmi"):
+                values[name] = widget(name)
 
         with col2:
-            glucose_options = {
-                "1️⃣ Normal": 1,
-                "2️⃣ Above Normal": 2,
-                "3️⃣ Well Above Normal": 3
-            }
-            glucose_label = st.selectbox("🍭 Glucose Level", list(glucose_options.keys()))
-            glucose = glucose_options[glucose_label]
-
-            gender = st.selectbox("🛋 Gender", ["Male", "Female"])
-            smokes = st.selectbox("🚬 Smokes", ["No", "Yes"])
+            for name in ("glucose_level", "gender", "smokes"):
+                values[name] = widget(name)
 
         # Submit button
         submit = st.form_submit_button("💡 Predict Risk", type="primary")
 
     # ----------------- Prediction -----------------
     if submit:
-        # Prepare input data in DataFrame format for model
-        input_df = pd.DataFrame({
-            "age_years": [age],
-            "systolic_bp": [sys_bp],
-            "cholesterol_level": [chol],
-            "bmi": [bmi],
-            "glucose_level": [glucose],
-            "gender": [1 if gender == "Male" else 0],
-            "smokes": [1 if smokes == "Yes" else 0]
-        })
-
         try:
-            # Get probability of high risk from model
-            pred_prob = model.predict_proba(input_df)[0][1]
-            prediction = int(pred_prob > 0.5)  # Threshold = 0.5
+            # Encode straight into a reusable float32 row in model order (no DataFrame)
+            with timed("predictor.encode"):
+                features = encoder.encode_row(values)
+            # Canonical input vector (BMI rounded to slider precision) = prediction cache key
+            row = canonical_key(features[0])
+
+            # Get the raw probability in one model pass (or from the shared cache), then
+            # calibrate it with the exported lookup table and apply the configured threshold
+            start = time.perf_counter()
+            raw_prob, _ = prediction_cache.get_or_compute(row, lambda: batcher.predict_risk(features))
+            calibration = get_calibration()
+            threshold = risk_threshold(calibration)
+            pred_prob = float(calibration.apply(raw_prob))
+            prediction = int(pred_prob > threshold)
+            predict_ms = (time.perf_counter() - start) * 1000
+            observe("predictor.predict", predict_ms / 1000)
+            st.session_state["what_if_row"] = row  # Kept for the what-if panel across reruns
 
             # ----------------- Display Results -----------------
             st.subheader("🎯 Prediction Result")
             st.metric(label="🧠 Risk Probability", value=f"{round(pred_prob * 100, 2)} %")
+            point = calibration.operating_point(threshold)
+            if point is None:
+                st.caption(f"High risk above {threshold * 100:.1f} % (uncalibrated model output).")
+            else:
+                st.caption(f"{calibration.method.capitalize()}-calibrated. High risk above {threshold * 100:.1f} %: "
+                           f"{point['precision'] * 100:.0f} % precision and {point['recall'] * 100:.0f} % recall "
+                           f"on {calibration.rows:,} held-out patients.")
 
             if prediction == 1:
                 # High risk
@@ -143,9 +139,131 @@ def predictor_page():
                 st.success("You seem healthy! Keep maintaining your lifestyle.")
                 st.markdown("### 🟢 Keep it up and stay active!")
 
+            # ----------------- Per-Prediction SHAP -----------------
+            # Contribution of each input to this prediction (log-odds scale)
+            st.subheader("🔍 Why this prediction?")
+            start = time.perf_counter()
+            shap_values, base_value = explain_row(row)
+            explain_ms = (time.perf_counter() - start) * 1000
+            observe("predictor.shap_explain", explain_ms / 1000)
+
+            with timed("predictor.shap_plot"):
+                shap_df = pd.DataFrame({"Feature": FEATURE_LIST, "SHAP Value": shap_values})
+                shap_df = shap_df.reindex(shap_df["SHAP Value"].abs().sort_values().index)
+                fig = px.bar(
+                    shap_df,
+                    x="SHAP Value",
+                    y="Feature",
+                    orientation="h",
+                    color="SHAP Value",
+                    color_continuous_scale="RdBu_r",
+                    color_continuous_midpoint=0,
+                    height=350
+                )
+                fig.update_layout(xaxis_title="Impact on risk (log-odds)", yaxis_title=None, coloraxis_showscale=False)
+            st.plotly_chart(fig, use_container_width=True)
+            st.caption("🔴 Positive values push the risk up, 🔵 negative values pull it down.")
+
+            # Latency of this request
+            cache_stats = prediction_cache.stats()
+            col1, col2, col3 = st.columns(3)
+            col1.metric("⚡ Prediction Latency", f"{predict_ms:.2f} ms")
+            col2.metric("🧠 Explanation Latency", f"{explain_ms:.2f} ms")
+            col3.metric("💾 Cache Hit Rate", f"{cache_stats['hit_rate'] * 100:.1f} %",
+                        help=f"{cache_stats['hits']:,} hits / {cache_stats['misses']:,} misses, "
+                             f"{cache_stats['size']:,} cached inputs")
+
+            # Batching behaviour across all sessions of this server
+            with st.expander("📈 Micro-batching stats"):
+                batch_stats = batcher.stats()
+                st.caption(
+                    f"{batch_stats['requests']:,} requests in {batch_stats['batches']:,} batches "
+                    f"({batch_stats['mean_requests_per_batch']:.2f} requests/batch)"
+                )
+                col1, col2 = st.columns(2)
+                col1.markdown("**Rows per batch (≤)**")
+                col1.bar_chart(pd.Series(batch_stats["batch_rows"], dtype=float))
+                col2.markdown("**Queue depth at batch start (≤)**")
+                col2.bar_chart(pd.Series(batch_stats["queue_depth"], dtype=float))
+
             # Style the metric card
             style_metric_cards(border_left_color="#D61355", background_color="#FAF0F3", border_radius_px=5)
 
         except Exception as e:
             # Catch errors if model prediction fails
             st.error(f"🚫 Prediction failed: {e}")
+
+    # ----------------- What-If Sweep -----------------
+    what_if_panel()
+
+
+# -------------------- What-If Panel --------------------
+@st.fragment
+@timed("fragment.what_if")
+def what_if_panel():
+    """
+    Renders risk over age × systolic BP (and BMI changes) around the last submitted input.
+
+    A fragment: moving its controls reruns only this panel, and the grid itself is
+    scored once per input, so they only re-slice the cached sweep.
+    """
+    row = st.session_state.get("what_if_row")
+    if row is None:
+        return
+
+    st.markdown("---")
+    st.subheader("🔀 What if?")
+    st.caption("How the predicted risk changes with age, blood pressure and BMI, all other inputs unchanged.")
+
+    try:
+        sweep = what_if_sweep(row)
+    except Exception as e:
+        st.error(f"🚫 What-if sweep failed: {e}")
+        return
+
+    age, bp = row[FEATURE_LIST.index("age_years")], row[FEATURE_LIST.index("systolic_bp")]
+    i_bp, j_age = int(np.searchsorted(sweep.bps, bp)), int(np.searchsorted(sweep.ages, age))
+    offsets = [int(d) for d in sweep.bmi_offsets]
+    k_now = offsets.index(0)
+
+    # Quick scenarios, read from the same grid
+    col1, col2, col3 = st.columns(3)
+    current = sweep.risk[k_now, i_bp, j_age] * 100
+    col1.metric("🎯 Current Risk", f"{current:.1f} %")
+    if -5 in offsets:
+        risk = sweep.risk[offsets.index(-5), i_bp, j_age] * 100
+        col2.metric("⚖️ BMI −5", f"{risk:.1f} %", delta=f"{risk - current:+.1f} pts", delta_color="inverse")
+    if 120 in sweep.bps:
+        risk = sweep.risk[k_now, int(np.searchsorted(sweep.bps, 120)), j_age] * 100
+        col3.metric("🩺 BP 120", f"{risk:.1f} %", delta=f"{risk - current:+.1f} pts", delta_color="inverse")
+
+    # Secondary control: picks a slice of the cached grid
+    k = offsets.index(st.select_slider(
+        "⚖️ BMI change",
+        options=offsets,
+        value=0,
+        format_func=lambda d: f"{d:+d} (BMI {sweep.bmis[offsets.index(d)]:.1f})",
+    ))
+    risk = sweep.risk[k] * 100
+
+    fig = px.imshow(
+        risk,
+        x=sweep.ages,
+        y=sweep.bps,
+        origin="lower",
+        aspect="auto",
+        color_continuous_scale="Reds",
+        zmin=0,
+        zmax=100,
+        labels={"x": "Age", "y": "Systolic BP", "color": "Risk %"},
+    )
+    fig.add_scatter(x=[age], y=[bp], mode="markers", showlegend=False, hoverinfo="skip",
+                    marker={"symbol": "x", "size": 12, "color": "black"})
+    st.plotly_chart(fig, use_container_width=True)
+
+    col1, col2 = st.columns(2)
+    col1.markdown(f"**Risk vs. systolic BP at age {age}**")
+    col1.line_chart(pd.DataFrame({"Risk %": risk[:, j_age]}, index=pd.Index(sweep.bps, name="Systolic BP")))
+    col2.markdown(f"**Risk vs. age at BP {bp}**")
+    col2.line_chart(pd.DataFrame({"Risk %": risk[i_bp]}, index=pd.Index(sweep.ages, name="Age")))
+    st.caption(f"⚡ {sweep.rows:,} scenarios scored in one call ({sweep.seconds * 1000:.0f} ms), cached for this input.")
@@ -1,10 +1,65 @@
 import streamlit as st
+import numpy as np
 import pandas as pd
 import plotly.express as px
-import os
-import joblib
-from utils import set_particle_background
-set_particle_background()  # Apply animated particle background globally
+from results_store import top_models_df, top_models_html, accuracy_chart_df, results_version
+from render_cache import memoize
+from calibration import get_calibration, risk_threshold
+from instrumentation import timed
+
+
+def accuracy_figure():
+    """Bar chart of accuracy per model (built once per results version, shared: do not mutate)."""
+    # Create bar chart using Plotly Express
+    fig = px.bar(
+        accuracy_chart_df(),  # Sorted, with "Accuracy %" column for clearer labels
+        x="Model Name",
+        y="Accuracy %",
+        color="Accuracy %",
+        color_continuous_scale="Teal",
+        text_auto=".1f",  # Show labels with 1 decimal
+        title="🔬 Accuracy Across Models",
+        height=500
+    )
+
+    # Customize layout
+    fig.update_layout(
+        xaxis_title="Model",
+        yaxis_title="Accuracy (%)",
+        showlegend=False
+    )
+    return fig
+
+
+def operating_points_figure(calibration, threshold):
+    """Precision / recall / F1 against the threshold, from the precomputed held-out table."""
+    table = calibration.table_df()
+    fig = px.line(
+        table,
+        x="threshold",
+        y=["precision", "recall", "f1"],
+        title="🎚️ Held-out Precision, Recall and F1 by Threshold",
+        height=450
+    )
+    fig.add_vline(x=threshold, line_dash="dash", line_color="#ff4b4b",
+                  annotation_text=f"current {threshold:.2f}")
+    best = calibration.best_f1_threshold()
+    if best != threshold:
+        fig.add_vline(x=best, line_dash="dot", line_color="#43AA8B", annotation_text=f"best F1 {best:.2f}",
+                      annotation_position="bottom right")
+    fig.update_layout(xaxis_title="Threshold (calibrated risk)", yaxis_title=None,
+                      yaxis_range=[0, 1.02], legend_title=None)
+    return fig
+
+
+def operating_points_table(calibration, threshold):
+    """HTML table of the rows every 0.1 plus the current and best-F1 thresholds."""
+    marks = set(np.round(np.arange(0.1, 1.0, 0.1), 3)) | {threshold, calibration.best_f1_threshold()}
+    rows = pd.DataFrame([calibration.operating_point(t) for t in sorted(marks)]).drop_duplicates("threshold")
+    rows = rows.set_index("threshold").rename(columns={
+        "precision": "Precision", "recall": "Recall", "f1": "F1 Score", "positive_rate": "Flagged"})
+    rows.index.name = "Threshold"
+    return rows.style.format("{:.1%}", na_rep="–").format_index("{:.3f}").to_html()
 
 
 def compare_models_page():
@@ -52,76 +107,40 @@ def compare_models_page():
     st.markdown("#### 🔬 Explore and compare the performance of different trained models.")
     st.markdown("---")
 
-    # -------------------- Load Model Comparison Data --------------------
-    # Load the pre-saved DataFrame containing results of different models
-    data_path = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "mlruns", "final_model_comparisons.pkl"))
-    df = joblib.load(data_path)
-
-    # -------------------- Emoji Mapping for Models --------------------
-    # Add emojis to model names for more visual appeal
-    emoji_map = {
-        "XGBoost_Optuna_Tuned": "🚀",
-        "MODELSTACKED+META_LEARNER": "🧩",
-        "MODELSTACKED+OPTUNA": "🔧",
-        "MODELSTACKED_META_LEARNER+NEURAL_NETS": "🧠",
-        "XGB_FEATURES": "📦",
-        "LightGBM_XGB_FEATURES": "🌿",
-        "PCA+XGB_FEATURES": "🔍",
-        "LightGBM+PCA+XGB_FEATURES": "⚡",
-        "LightGBM+PCA+XGB_FEATURES+OPTUNA": "🌱"
-    }
-    df["Model Name"] = df["Model Name"].apply(lambda x: f"{emoji_map.get(x, '')} {x}")
-
-    # -------------------- Display Top 9 Models --------------------
-    st.markdown("### ✅ Top 9 Models")
-
-    # Select only key columns, sort by accuracy, reset index
-    styled_df = (
-        df[["Model Name", "Accuracy", "F1 Score"]]
-        .sort_values(by="Accuracy", ascending=False)
-        .reset_index(drop=True)
-    )
-    styled_df.index += 1  # Index starts from 1 instead of 0
-    styled_df.index.name = "Model No"
-
-    # Display table with gradient color formatting
-    st.dataframe(
-        styled_df.style
-            .background_gradient(subset=["Accuracy", "F1 Score"], cmap="Greens")
-            .format({
-                "Accuracy": lambda x: f"{x * 100:.2f}%",
-                "F1 Score": lambda x: f"{x * 100:.2f}%"
-            })
-    )
+    # -------------------- Display Top Models --------------------
+    st.markdown(f"### ✅ Top {len(top_models_df())} Models")  # 9, plus the row of a local retrain
+
+    # Cached view: key columns sorted by accuracy, numbered from 1, with
+    # emoji model names and gradient color formatting, rendered to HTML
+    # once per results version instead of re-styled on every rerun
+    st.html(top_models_html())
 
     # -------------------- Plot Accuracy Comparison --------------------
     st.markdown("### 📈 Accuracy Comparison")
 
-    # Add percentage column for clearer plot labels
-    df["Accuracy %"] = df["Accuracy"] * 100
-
-    # Create bar chart using Plotly Express
-    fig = px.bar(
-        df.sort_values(by="Accuracy", ascending=False),
-        x="Model Name",
-        y="Accuracy %",
-        color="Accuracy %",
-        color_continuous_scale="Teal",
-        text_auto=".1f",  # Show labels with 1 decimal
-        title="🔬 Accuracy Across Models",
-        height=500
-    )
-
-    # Customize layout
-    fig.update_layout(
-        xaxis_title="Model",
-        yaxis_title="Accuracy (%)",
-        showlegend=False
-    )
+    with timed("compare.accuracy_plot"):
+        fig = memoize("compare.accuracy_figure", results_version(), accuracy_figure)
 
     # Display plot
     st.plotly_chart(fig, use_container_width=True)
 
+    # -------------------- Operating Points --------------------
+    # Precomputed at export time on held-out data: no rows are scored here
+    st.markdown("### 🎚️ Operating Points")
+    calibration = get_calibration()
+    threshold = risk_threshold(calibration)
+    if calibration.is_identity:
+        st.info("ℹ️ No calibration table for this model yet: export it with held-out data "
+                "(`python model_export.py --holdout holdout.csv`) to see precision and recall by threshold.")
+    else:
+        st.caption(f"{calibration.method.capitalize()} calibration fitted on {calibration.rows:,} held-out "
+                   f"patients. The predictor flags high risk above {threshold:.2f}.")
+        fig = memoize("compare.operating_points_figure", calibration.version,
+                      lambda: operating_points_figure(calibration, threshold), threshold)
+        st.plotly_chart(fig, use_container_width=True)
+        st.html(memoize("compare.operating_points_table", calibration.version,
+                        lambda: operating_points_table(calibration, threshold), threshold))
+
     # -------------------- Footer --------------------
     st.markdown("---")
     st.success("✅ Comparison complete! Pick the best model and proceed to insights 👉")
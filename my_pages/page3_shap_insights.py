@@ -1,13 +1,65 @@
 import streamlit as st
-from PIL import Image
-import os
+import numpy as np
+import plotly.graph_objects as go
 
-from utils import set_particle_background
-set_particle_background()  # Apply animated particle background globally
+from instrumentation import timed
+from assets import show_image
+from shap_data import SHAP_DATA_PATH, load_shap_summary, is_stale, shap_store
+
+
+# -------------------- Interactive Figures --------------------
+# Built once per SHAP data version and cached next to the data in `shap_store`
+@timed("shap.bar_figure")
+def _bar_figure(summary):
+    order = np.argsort(summary.mean_abs)
+    fig = go.Figure(go.Bar(
+        x=summary.mean_abs[order],
+        y=[summary.feature_names[i] for i in order],
+        orientation="h",
+        marker_color="#ff4b4b",
+    ))
+    fig.update_layout(title="Top Features - Mean |SHAP| Value", xaxis_title="mean(|SHAP value|)", height=450)
+    return fig
+
+
+@timed("shap.beeswarm_figure")
+def _beeswarm_figure(summary):
+    rows = summary.sample_indices()
+    jitter = np.random.default_rng(0).uniform(-0.3, 0.3, len(rows))
+    fig = go.Figure()
+    for pos, j in enumerate(np.argsort(summary.mean_abs)):
+        values = summary.feature_values[rows, j]
+        spread = np.ptp(values) or 1.0
+        fig.add_trace(go.Scattergl(
+            x=summary.shap_values[rows, j],
+            y=pos + jitter,
+            mode="markers",
+            name=summary.feature_names[j],
+            text=[f"{summary.feature_names[j]} = {v:g}" for v in values],
+            hoverinfo="text+x",
+            marker=dict(
+                size=4,
+                color=(values - values.min()) / spread,  # Low → blue, high → red
+                colorscale="RdBu_r",
+                cmin=0,
+                cmax=1,
+                showscale=pos == 0,
+                colorbar=dict(title="Feature value", tickvals=[0, 1], ticktext=["Low", "High"]),
+            ),
+        ))
+    fig.update_layout(
+        title="SHAP Summary - Feature Impact",
+        xaxis_title="SHAP value (impact on model output)",
+        yaxis=dict(tickvals=list(range(len(summary.feature_names))),
+                   ticktext=[summary.feature_names[j] for j in np.argsort(summary.mean_abs)]),
+        showlegend=False,
+        height=550,
+    )
+    return fig
 
 
 def shap_insights_page():
-    """Renders the SHAP insights page with static plots for explainability."""
+    """Renders the SHAP insights page with interactive (or static fallback) plots for explainability."""
 
     # -------------------- Custom CSS --------------------
     # Styling for main content area, buttons, and sliders
@@ -50,11 +102,6 @@ def shap_insights_page():
         - Bigger magnitude → more influence  
         """)
 
-    # -------------------- Define SHAP Plot Paths --------------------
-    # Paths to static SHAP summary images
-    bar_path = os.path.join(os.path.dirname(__file__), "..", "shap_plots", "shap_summary_bar.png")
-    dot_path = os.path.join(os.path.dirname(__file__), "..", "shap_plots", "shap_summary_dot.png")
-
     # -------------------- SHAP Plot Toggle --------------------
     # Allow user to switch between bar and dot plot
     plot_choice = st.radio(
@@ -64,18 +111,31 @@ def shap_insights_page():
     )
 
     # -------------------- Display Selected Plot --------------------
-    if plot_choice == "📊 Summary Bar Plot":
-        st.image(
-            Image.open(bar_path),
-            caption="Top Features - Mean SHAP Value (Bar)",
-            use_container_width=True
-        )
+    # Interactive plots from the stored SHAP matrix; static PNGs if it is missing or stale
+    summary = load_shap_summary()
+    if summary is not None and not is_stale(summary):
+        if plot_choice == "📊 Summary Bar Plot":
+            fig = shap_store.derived(SHAP_DATA_PATH, "bar_figure", _bar_figure)
+        else:
+            fig = shap_store.derived(SHAP_DATA_PATH, "beeswarm_figure", _beeswarm_figure)
+        st.plotly_chart(fig, use_container_width=True)
+        st.caption(f"Computed on {summary.n_rows:,} rows for the current model.")
     else:
-        st.image(
-            Image.open(dot_path),
-            caption="SHAP Summary - Feature Impact (Dot)",
-            use_container_width=True
-        )
+        # Static SHAP summary images (served as pre-built WebP once `python assets.py build` ran)
+        with timed("shap.image_load"):
+            if plot_choice == "📊 Summary Bar Plot":
+                show_image(
+                    "shap_plots/shap_summary_bar.png",
+                    caption="Top Features - Mean SHAP Value (Bar)",
+                    use_container_width=True
+                )
+            else:
+                show_image(
+                    "shap_plots/shap_summary_dot.png",
+                    caption="SHAP Summary - Feature Impact (Dot)",
+                    use_container_width=True
+                )
+        st.info("ℹ️ Showing static plots. Run `python shap_data.py build --data <cohort.csv>` for interactive ones.")
 
     # -------------------- Footer --------------------
     st.markdown("---")
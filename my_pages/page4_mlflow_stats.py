@@ -1,10 +1,12 @@
 import streamlit as st
 import pandas as pd
 import os
-import joblib
 
-from utils import set_particle_background
-set_particle_background()  # Apply animated particle background globally
+from model_registry import registry, preload_models
+from results_store import ranked_results_html, best_model
+from mlflow_store import get_run_cache, has_tracking_data
+from render_cache import memoize, once_per_session
+from instrumentation import timed
 
 
 def mlflow_stats_page():
@@ -37,33 +39,15 @@ def mlflow_stats_page():
     st.markdown("<div style='margin-top: 2rem'></div>", unsafe_allow_html=True)
     st.markdown("Explore the results from your top experiments tracked via **MLflow** 🧪")
 
-    # -------------------- Load Model Comparison Data --------------------
-    # Load pre-computed experiment results (stored with joblib)
-    data_path = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "mlruns", "final_model_comparisons.pkl"))
-    df = joblib.load(data_path)
-
-    # -------------------- Rename & Rank --------------------
-    # Standardize column names and add ranking index
-    df.columns = ["Run ID", "Accuracy", "F1 Score", "Model Name"]
-    df = df.copy()
-    df.index = range(1, len(df) + 1)   # Rank models starting at 1
-    df.index.name = "Model Rank"
-
     # -------------------- Display Styled Table --------------------
-    # Format Accuracy & F1 with 4 decimals + gradient coloring
-    styled_df = (
-        df.style
-        .format({
-            "Accuracy": "{:.4f}",
-            "F1 Score": "{:.4f}"
-        })
-        .background_gradient(cmap='Blues', subset=["Accuracy", "F1 Score"])
-    )
-    st.dataframe(styled_df, use_container_width=True, height=500)
+    # Cached view of the experiment results: standardized column names,
+    # ranked from 1, Accuracy & F1 with 4 decimals + gradient coloring,
+    # rendered to HTML once per results version
+    st.html(ranked_results_html())
 
     # -------------------- Show Best Model --------------------
     # Identify top-performing model (based on Accuracy)
-    top_model = df.loc[df["Accuracy"].idxmax()]
+    top_model = best_model()
     st.success(
         f"🏆 **Best Model:** `{top_model['Model Name']}` "
         f"with **Accuracy: {top_model['Accuracy']:.4f}** "
@@ -72,6 +56,27 @@ def mlflow_stats_page():
 
     st.markdown("---")
 
+    # -------------------- Live Tracking Store --------------------
+    # Runs read straight from the MLflow tracking store (cached + incremental refresh)
+    if has_tracking_data():
+        live_runs_section()
+        st.markdown("---")
+
+    # -------------------- Model Registry Stats --------------------
+    # Show load time and memory of the models cached in this process
+    with st.expander("🗂️ Loaded Model Artifacts"):
+        preload_models()
+        registry_df = pd.DataFrame(registry.stats())
+        registry_df["path"] = registry_df["path"].map(os.path.basename)
+        st.dataframe(
+            registry_df.style.format({
+                "load_seconds": "{:.3f}",
+                "file_bytes": lambda x: f"{x / 1024:.0f} KB",
+                "memory_bytes": lambda x: f"{x / 1024 ** 2:.1f} MB",
+            }),
+            use_container_width=True,
+        )
+
     # -------------------- Project Summary --------------------
     # Expandable section to reflect on project outcomes
     with st.expander("📘 Project Summary & Reflection"):
@@ -89,5 +94,57 @@ def mlflow_stats_page():
         """)
 
     # -------------------- Fun Ending --------------------
-    # Celebrate completion with Streamlit balloons 🎈
-    st.balloons()
+    # Celebrate completion with Streamlit balloons 🎈 (first visit of the session only)
+    if once_per_session("mlflow.balloons"):
+        st.balloons()
+
+
+@st.fragment
+@timed("fragment.mlflow_live_runs")
+def live_runs_section():
+    """
+    Renders the tracking-store runs with filter / top-k / metric controls.
+
+    Runs as a fragment: changing these widgets reruns only this section, and
+    the ranked table is reused while the cached runs and the widget values
+    are unchanged.
+    """
+    st.markdown("### 🧪 Live Runs from the Tracking Store")
+    try:
+        run_cache = get_run_cache()
+        with timed("mlflow.tracking_runs"):
+            if st.button("🔄 Refresh Runs"):
+                st.toast(f"Fetched {run_cache.refresh()} new or updated runs")
+            elif run_cache.last_refresh is None:
+                run_cache.refresh()
+            runs_df = memoize("mlflow.runs_frame", run_cache.last_refresh, run_cache.frame,
+                              run_cache.tracking_uri)
+    except Exception as e:
+        st.warning(f"⚠️ Could not read the MLflow tracking store: {e}")
+        return
+
+    if runs_df.empty:
+        return
+    st.caption(f"{len(runs_df):,} runs cached from `{run_cache.tracking_uri}`")
+    metric_cols = sorted(c[len("metrics."):] for c in runs_df.columns if c.startswith("metrics."))
+
+    col1, col2 = st.columns([3, 1])
+    with col1:
+        filter_string = st.text_input("🔎 Filter (MLflow syntax)", placeholder="metrics.accuracy > 0.9")
+    with col2:
+        top_k = st.number_input("🏅 Top K", min_value=1, max_value=1000, value=10)
+
+    if metric_cols:
+        metric = st.selectbox("📏 Rank by metric", metric_cols)
+        try:
+            # Server-side search, repeated only when the runs or the controls change
+            st.dataframe(
+                memoize("mlflow.top_k", run_cache.last_refresh,
+                        lambda: run_cache.top_k(metric, int(top_k), filter_string),
+                        run_cache.tracking_uri, metric, int(top_k), filter_string, scope="session"),
+                use_container_width=True,
+            )
+        except Exception as e:
+            st.error(f"🚫 Invalid filter: {e}")
+    else:
+        st.dataframe(runs_df.head(int(top_k)), use_container_width=True)
@@ -0,0 +1,86 @@
+import streamlit as st
+import os
+import tempfile
+
+from batch_scoring import DEFAULT_CHUNKSIZE, PROBA_COLUMN, LABEL_COLUMN, score_file, iter_chunks
+from model_registry import get_predictor
+from calibration import get_calibration, risk_threshold
+from utils import FEATURE_LIST
+from instrumentation import timed
+
+
+def _session_output_path(out_format):
+    """One scratch file per session: each run replaces the previous output, and the
+    directory is removed when the session state is released."""
+    tmp = st.session_state.get("_batch_scoring_dir")
+    if tmp is None:
+        tmp = st.session_state["_batch_scoring_dir"] = tempfile.TemporaryDirectory(prefix="heart-batch-")
+    for name in os.listdir(tmp.name):
+        os.remove(os.path.join(tmp.name, name))
+    return os.path.join(tmp.name, f"scored.{out_format}")
+
+
+def _read_file(path):
+    with open(path, "rb") as f:
+        return f.read()
+
+
+def batch_scoring_page():
+    """Renders the batch scoring page: upload a CSV/Parquet extract, score it in chunks, download results."""
+
+    # -------------------- Page Title & Intro --------------------
+    st.title("📦 Batch Risk Scoring")
+    st.markdown("<div style='margin-top: 2rem'></div>", unsafe_allow_html=True)
+    st.markdown("#### 🏥 Score a whole clinic extract in one go.")
+    st.markdown(f"The file must contain the columns: `{'`, `'.join(FEATURE_LIST)}`. Extra columns are kept.")
+    st.markdown("---")
+
+    # -------------------- Upload & Options --------------------
+    uploaded = st.file_uploader("📄 Upload CSV, Parquet or Arrow", type=["csv", "parquet", "arrow", "feather"])
+    col1, col2 = st.columns(2)
+    with col1:
+        chunksize = st.number_input("🧱 Rows per chunk", min_value=1_000, max_value=1_000_000,
+                                    value=DEFAULT_CHUNKSIZE, step=10_000)
+    with col2:
+        out_format = st.selectbox("💾 Output format", ["csv", "parquet"])
+    explain = st.checkbox("🔍 Add per-row SHAP contributions", value=False)
+
+    if uploaded is None or not st.button("🚀 Score File", type="primary"):
+        return
+
+    # -------------------- Chunked Scoring --------------------
+    # Results are streamed to a temp file so memory stays bounded by the chunk size
+    out_path = _session_output_path(out_format)
+    progress = st.empty()
+
+    def report(stats):
+        progress.info(f"⏳ {stats.rows:,} rows scored — {stats.rows_per_second:,.0f} rows/s")
+
+    try:
+        with timed("batch.score_file"):
+            calibration = get_calibration()
+            stats = score_file(get_predictor(), uploaded, out_path, chunksize=int(chunksize),
+                               threshold=risk_threshold(calibration), explain=explain,
+                               on_chunk=report, calibration=calibration)
+    except Exception as e:
+        st.error(f"🚫 Batch scoring failed: {e}")
+        return
+
+    # -------------------- Results --------------------
+    progress.empty()
+    col1, col2, col3 = st.columns(3)
+    col1.metric("🧾 Rows Scored", f"{stats.rows:,}")
+    col2.metric("⏱️ Time", f"{stats.seconds:.2f} s")
+    col3.metric("⚡ Throughput", f"{stats.rows_per_second:,.0f} rows/s")
+
+    preview = next(iter_chunks(out_path, chunksize=20), None)
+    if preview is not None:
+        st.markdown("### 👀 Preview")
+        st.dataframe(preview[FEATURE_LIST + [PROBA_COLUMN, LABEL_COLUMN]], use_container_width=True)
+
+    # Read on click (in a background thread) rather than on every render
+    st.download_button(
+        "⬇️ Download Scored File",
+        data=lambda: _read_file(out_path),
+        file_name=f"{os.path.splitext(uploaded.name)[0]}_scored.{out_format}",
+    )
@@ -0,0 +1,154 @@
+# page_router.py
+#
+# Lazy page loading for app.py. Each page module (and its heavy dependencies:
+# plotly, PIL, streamlit_lottie, streamlit_extras, shap, ...) is imported the
+# first time its page is opened, not on every rerun of every page. Page
+# modules have no import-time side effects, so importing one only defines
+# its render function.
+#
+# Import timings are recorded per module. To measure cold-start cost in a
+# fresh interpreter (e.g. inside the container):
+#     python page_router.py            # table
+#     python page_router.py --json     # machine-readable
+
+import argparse
+import importlib
+import json
+import os
+import subprocess
+import sys
+import time
+
+from instrumentation import observe, timed
+
+
+# Navigation label -> (module, render function). Home is rendered inline by app.py.
+PAGES = {
+    "🩺 Predictor": ("my_pages.page1_predictor", "predictor_page"),
+    "📦 Batch": ("my_pages.page5_batch_scoring", "batch_scoring_page"),
+    "📊 Compare": ("my_pages.page2_compare_models", "compare_models_page"),
+    "🔍 SHAP Insights": ("my_pages.page3_shap_insights", "shap_insights_page"),
+    "📁 MLflow Stats": ("my_pages.page4_mlflow_stats", "mlflow_stats_page"),
+}
+
+# Modules every page needs anyway (imported by app.py before routing)
+BASE_MODULES = ["streamlit", "streamlit_option_menu", "utils"]
+
+_import_seconds = {}  # module -> wall time of its first import in this process
+
+
+# -------------------- 🧭 ROUTING -------------------- #
+
+def load_page(label):
+    """
+    Returns the render function for a navigation label, importing its module on first use.
+
+    Args:
+        label (str): Navigation option, a key of `PAGES`.
+
+    Returns:
+        callable: The page's render function.
+    """
+    module_name, func_name = PAGES[label]
+    module = sys.modules.get(module_name)
+    if module is None:
+        start = time.perf_counter()
+        module = importlib.import_module(module_name)
+        _import_seconds[module_name] = time.perf_counter() - start
+        observe(f"page_import.{module_name}", _import_seconds[module_name])
+    return getattr(module, func_name)
+
+
+def render_page(label):
+    """Imports (if needed) and renders a page, timing the render under `page.<function>`."""
+    render = load_page(label)
+    with timed(f"page.{render.__name__}"):
+        render()
+
+
+def import_times():
+    """Returns {module: seconds} for the page modules imported so far in this process."""
+    return dict(_import_seconds)
+
+
+# -------------------- ⏱️ COLD-START REPORT -------------------- #
+
+_MARKER = "--page-import--"
+
+
+def _parse_importtime(stderr, depth=0):
+    """Returns [(module, cumulative_seconds)] for the imports at `depth` after the marker."""
+    lines = stderr.splitlines()
+    if _MARKER in lines:
+        lines = lines[lines.index(_MARKER) + 1:]
+    imports = []
+    for line in lines:
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line.split("|", 2)
+        if not cumulative.strip().isdigit():
+            continue  # Header line
+        if (len(name) - len(name.lstrip()) - 1) // 2 != depth:
+            continue  # Counted by its parent / not a direct import
+        imports.append((name.strip(), int(cumulative) / 1e6))
+    return imports
+
+
+def measure_cold_import(module, base_modules=BASE_MODULES, top=5):
+    """
+    Imports `module` in a fresh interpreter (after `base_modules`) and times it.
+
+    Args:
+        module (str | None): Module to measure; None measures only the base modules.
+        base_modules (list[str]): Modules imported first and excluded from the timing.
+        top (int): Number of heaviest imports to report (the base modules themselves,
+            or the direct imports of `module`).
+
+    Returns:
+        dict: module, seconds, and the `top` heaviest imports it triggered.
+    """
+    base = "; ".join(f"import {name}" for name in base_modules) if module else ""
+    target = module or ", ".join(base_modules)
+    code = (
+        f"import sys, time; {base or 'pass'}; sys.stderr.write('{_MARKER}\\n'); "
+        f"t = time.perf_counter(); import {target}; print(time.perf_counter() - t)"
+    )
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        capture_output=True, text=True, check=True, cwd=os.path.dirname(os.path.abspath(__file__)),
+    )
+    heaviest = sorted(_parse_importtime(proc.stderr, depth=1 if module else 0), key=lambda item: -item[1])[:top]
+    return {
+        "module": target,
+        "seconds": float(proc.stdout.strip().splitlines()[-1]),
+        "heaviest": [{"module": name, "seconds": seconds} for name, seconds in heaviest],
+    }
+
+
+def startup_report(top=5):
+    """Cold import cost of the base modules and of each page on top of them."""
+    report = [measure_cold_import(None, top=top)]
+    for module_name, _ in PAGES.values():
+        report.append(measure_cold_import(module_name, top=top))
+    return report
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Report cold import times of the app and each page.")
+    parser.add_argument("--top", type=int, default=5, help="Heaviest imports listed per module")
+    parser.add_argument("--json", action="store_true", help="Print the report as JSON")
+    args = parser.parse_args(argv)
+
+    report = startup_report(top=args.top)
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return
+
+    for entry in report:
+        print(f"{entry['module']:<45} {entry['seconds'] * 1000:8.0f} ms")
+        for item in entry["heaviest"]:
+            print(f"    {item['module']:<41} {item['seconds'] * 1000:8.0f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,142 @@
+# parallel_scoring.py
+#
+# Multi-core scoring for large rescoring jobs (e.g. the nightly registry run).
+# A ProcessPoolExecutor is started once; every worker loads the model a single
+# time in its initializer. Inputs are copied once into a shared-memory float32
+# block and workers write probabilities straight into a shared output block at
+# their shard's offset, so no arrays or DataFrames are pickled and the merged
+# result is in input order by construction.
+#
+# Usage:
+#     with ParallelScorer(workers=8) as scorer:
+#         proba, labels = predict_batch(scorer, X)
+#
+#     python batch_scoring.py registry.parquet -o scored.parquet --workers 8
+#     python benchmarks/parallel_scaling.py --rows 2000000
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import resource_tracker, shared_memory
+
+import numpy as np
+
+from model_registry import MODEL_7_FEATURE_PATH, registry
+
+
+# Worker processes (0 or unset: one per CPU core)
+SCORING_WORKERS = int(os.environ.get("HEART_SCORING_WORKERS", 0)) or os.cpu_count() or 1
+SHARD_ROWS = 65_536  # Rows per task: large enough to amortize IPC, small enough to balance
+
+
+# -------------------- 👷 WORKER SIDE -------------------- #
+
+_worker_model = None
+
+
+def _init_worker(model_path):
+    """Pool initializer: loads the model once per worker process."""
+    global _worker_model
+    _worker_model = registry.get(model_path)
+
+
+def _score_shard(in_name, out_name, shape, start, stop):
+    """Scores rows [start, stop) of the shared input into the shared output."""
+    shm_in = shared_memory.SharedMemory(name=in_name)
+    shm_out = shared_memory.SharedMemory(name=out_name)
+    X = out = None
+    try:
+        X = np.ndarray(shape, dtype=np.float32, buffer=shm_in.buf)
+        out = np.ndarray(shape[0], dtype=np.float64, buffer=shm_out.buf)
+        # One thread per process: the pool already provides the parallelism
+        out[start:stop] = _worker_model.predict_proba(X[start:stop], num_threads=1)[:, 1]
+    finally:
+        # Release the buffer views before closing, even when scoring failed,
+        # so close() cannot raise BufferError over the original exception
+        del X, out
+        shm_in.close()
+        shm_out.close()
+    return stop - start
+
+
+# -------------------- 🏭 SCORER -------------------- #
+
+class ParallelScorer:
+    """
+    Process pool exposing `predict_proba`, so it can replace the model anywhere
+    (`predict_batch`, `batch_scoring.score_file`, ...).
+
+    Small inputs (a single shard) are scored in-process to skip the IPC round trip.
+
+    Args:
+        workers (int): Worker processes; defaults to $HEART_SCORING_WORKERS or the CPU count.
+        model_path (str): LightGBM model each worker loads.
+        shard_rows (int): Rows per task.
+    """
+
+    def __init__(self, workers=None, model_path=MODEL_7_FEATURE_PATH, shard_rows=SHARD_ROWS):
+        self.workers = workers or SCORING_WORKERS
+        self.model_path = model_path
+        self.shard_rows = shard_rows
+        # Workers must share this process's resource tracker; their own would
+        # report the blocks we unlink as leaked when they exit
+        resource_tracker.ensure_running()
+        self._pool = ProcessPoolExecutor(max_workers=self.workers, initializer=_init_worker,
+                                         initargs=(model_path,))
+        # Start every worker now so model loading is not billed to the first batch
+        list(self._pool.map(_noop, range(self.workers)))
+
+    def predict_proba_positive(self, X):
+        """
+        Positive-class probabilities for `X`, in input order.
+
+        Args:
+            X (np.ndarray | pd.DataFrame): Preprocessed features, shape (n, f).
+
+        Returns:
+            np.ndarray: Shape (n,), float64.
+        """
+        X = np.asarray(X, dtype=np.float32)
+        n = len(X)
+        if n <= self.shard_rows:
+            return registry.get(self.model_path).predict_proba(X)[:, 1]
+
+        shm_in = shared_memory.SharedMemory(create=True, size=X.nbytes)
+        shm_out = shared_memory.SharedMemory(create=True, size=n * 8)
+        shared_X = None
+        try:
+            shared_X = np.ndarray(X.shape, dtype=np.float32, buffer=shm_in.buf)
+            shared_X[:] = X
+            futures = [
+                self._pool.submit(_score_shard, shm_in.name, shm_out.name, X.shape,
+                                  start, min(start + self.shard_rows, n))
+                for start in range(0, n, self.shard_rows)
+            ]
+            for future in futures:
+                future.result()  # Re-raises worker errors
+            proba = np.ndarray(n, dtype=np.float64, buffer=shm_out.buf).copy()
+        finally:
+            del shared_X  # Buffer views must be released before closing
+            shm_in.close()
+            shm_in.unlink()
+            shm_out.close()
+            shm_out.unlink()
+        return proba
+
+    def predict_proba(self, X):
+        """sklearn-style (n, 2) class probabilities."""
+        proba = self.predict_proba_positive(X)
+        return np.column_stack((1.0 - proba, proba))
+
+    def close(self):
+        self._pool.shutdown()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
+
+
+def _noop(_):
+    return None
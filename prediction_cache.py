@@ -0,0 +1,135 @@
+# prediction_cache.py
+#
+# Bounded LRU + TTL cache in front of prediction, shared by all sessions in the
+# process. Keys are the canonical 7-feature tuple (integers for the discrete
+# inputs, BMI rounded to the slider step). The whole cache is dropped as soon
+# as the model file's content version changes.
+#
+# Configure with $HEART_PREDICTION_CACHE_SIZE and $HEART_PREDICTION_CACHE_TTL (seconds).
+
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from instrumentation import register_collector
+from model_registry import MODEL_7_FEATURE_PATH, predictor_version
+from utils import FEATURE_LIST
+
+
+CACHE_SIZE = int(os.environ.get("HEART_PREDICTION_CACHE_SIZE", 10_000))
+CACHE_TTL = float(os.environ.get("HEART_PREDICTION_CACHE_TTL", 3600))
+
+BMI_DECIMALS = 1  # Matches the predictor page's BMI slider step (0.1)
+_BMI_INDEX = FEATURE_LIST.index("bmi")
+
+
+def canonical_key(values):
+    """
+    Normalizes one input row (in `FEATURE_LIST` order) into a hashable key.
+
+    Args:
+        values (Sequence[float]): The 7 feature values.
+
+    Returns:
+        tuple: Integers for discrete features, BMI rounded to `BMI_DECIMALS`.
+    """
+    return tuple(
+        round(float(v), BMI_DECIMALS) if j == _BMI_INDEX else int(round(float(v)))
+        for j, v in enumerate(values)
+    )
+
+
+class PredictionCache:
+    """
+    Thread-safe LRU cache with per-entry expiry, invalidated on model version change.
+
+    Args:
+        maxsize (int): Maximum number of cached predictions.
+        ttl (float): Seconds an entry stays valid.
+        model_path (str): Model whose version scopes the entries.
+    """
+
+    def __init__(self, maxsize=CACHE_SIZE, ttl=CACHE_TTL, model_path=MODEL_7_FEATURE_PATH):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.model_path = model_path
+        self._entries = OrderedDict()  # key -> (expires_at, value)
+        self._version = None
+        self._lock = threading.Lock()
+        self.hits = self.misses = self.evictions = self.expirations = self.invalidations = 0
+
+    def _check_version(self):
+        version = predictor_version(self.model_path)
+        if version != self._version:
+            if self._entries:
+                self.invalidations += 1
+            self._entries.clear()
+            self._version = version
+
+    def get_or_compute(self, key, compute):
+        """
+        Returns the cached value for `key`, or calls `compute()` and caches its result.
+
+        Concurrent misses on the same key may both compute; the result is identical.
+        """
+        now = time.monotonic()
+        with self._lock:
+            self._check_version()
+            entry = self._entries.get(key)
+            if entry is not None:
+                if entry[0] > now:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return entry[1]
+                del self._entries[key]
+                self.expirations += 1
+            self.misses += 1
+            version = self._version
+
+        value = compute()  # Outside the lock: scoring must not serialize sessions
+
+        with self._lock:
+            if self._version != version:
+                return value  # Model changed while computing; don't cache a stale result
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        """Returns size and hit/miss/eviction counters."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "invalidations": self.invalidations,
+                "model_version": self._version,
+            }
+
+
+# Process-wide cache shared by every Streamlit session
+prediction_cache = PredictionCache()
+
+
+@register_collector
+def _cache_metrics():
+    stats = prediction_cache.stats()
+    return [
+        ("heart_prediction_cache_hits_total", "counter", "Prediction cache hits.", stats["hits"]),
+        ("heart_prediction_cache_misses_total", "counter", "Prediction cache misses.", stats["misses"]),
+        ("heart_prediction_cache_evictions_total", "counter", "Prediction cache LRU evictions.", stats["evictions"]),
+        ("heart_prediction_cache_size", "gauge", "Predictions currently cached.", stats["size"]),
+    ]
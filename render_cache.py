@@ -0,0 +1,124 @@
+# render_cache.py
+#
+# Memoized render artifacts for Streamlit reruns. Every widget interaction
+# reruns the whole script, so anything a page derives from slow-changing data
+# (Styler HTML, Plotly figures, ranked tables) is built once per
+# (name, data version, widget values) and reused until one of them changes.
+#
+#   scope="process"  shared by every session, LRU-bounded (data-only artifacts)
+#   scope="session"  kept in st.session_state, latest entry per name only
+#                    (artifacts that depend on one user's widget values)
+#
+# Cached artifacts are shared: treat them as read-only.
+#
+# Usage:
+#     fig = memoize("compare.accuracy_figure", results_version(), build_figure)
+#     df = memoize("mlflow.top_k", runs_version, query, metric, k, scope="session")
+
+import os
+import threading
+from collections import OrderedDict
+
+from instrumentation import register_collector
+
+
+RENDER_CACHE_SIZE = int(os.environ.get("HEART_RENDER_CACHE_SIZE", 128))
+SESSION_KEY = "_render_cache"
+
+
+class RenderCache:
+    """
+    Thread-safe LRU of built artifacts, keyed on (name, version, *widget values).
+
+    Args:
+        maxsize (int): Maximum number of artifacts kept.
+    """
+
+    def __init__(self, maxsize=RENDER_CACHE_SIZE):
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, build):
+        """Returns the artifact for `key`, calling `build()` on a miss."""
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key]
+            self.misses += 1
+        value = build()  # Outside the lock: builds may be slow
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+# Process-wide cache shared by every Streamlit session
+render_cache = RenderCache()
+
+
+def memoize(name, version, build, *widgets, scope="process"):
+    """
+    Returns `build()`, memoized until the data version or a widget value changes.
+
+    Args:
+        name (str): Artifact name (e.g. "compare.accuracy_figure").
+        version (Hashable): Version of the underlying data (e.g. `results_version()`).
+        build (callable): Zero-argument function building the artifact.
+        *widgets (Hashable): Widget values the artifact depends on.
+        scope (str): "process" (shared LRU) or "session" (st.session_state).
+
+    Returns:
+        Any: The cached or freshly built artifact.
+    """
+    key = (name, version) + widgets
+    if scope == "process":
+        return render_cache.get(key, build)
+    if scope != "session":
+        raise ValueError(f"🚨 Unknown render cache scope: {scope!r}")
+
+    import streamlit as st
+
+    entries = st.session_state.setdefault(SESSION_KEY, {})
+    entry = entries.get(name)
+    if entry is not None and entry[0] == key:
+        render_cache.hits += 1
+        return entry[1]
+    render_cache.misses += 1
+    value = build()
+    entries[name] = (key, value)  # Replaces the previous version of this artifact
+    return value
+
+
+def once_per_session(name):
+    """
+    Returns True the first time it is called with `name` in a session, False afterwards.
+    """
+    import streamlit as st
+
+    flag = f"_once_{name}"
+    if st.session_state.get(flag):
+        return False
+    st.session_state[flag] = True
+    return True
+
+
+@register_collector
+def _render_cache_metrics():
+    return [
+        ("heart_render_cache_hits_total", "counter", "Render artifact cache hits.", render_cache.hits),
+        ("heart_render_cache_misses_total", "counter", "Render artifact cache misses.", render_cache.misses),
+        ("heart_render_cache_size", "gauge", "Render artifacts cached in this process.", len(render_cache)),
+    ]
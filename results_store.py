@@ -0,0 +1,151 @@
+# results_store.py
+#
+# Shared, cached access to the experiment comparison table used by the
+# Compare and MLflow Stats pages. The pickle is loaded once per file version
+# through the model registry, and every derived view (sorted, ranked,
+# percentage columns, styled) is memoized per version as well.
+#
+# Views are shared between sessions: treat them as read-only.
+
+import os
+
+from model_registry import BASE_DIR, registry
+
+
+COMPARISONS_PATH = os.path.join(BASE_DIR, "mlruns", "final_model_comparisons.pkl")
+RESULT_COLUMNS = ["Run ID", "Accuracy", "F1 Score", "Model Name"]
+
+# Emojis added to model names for more visual appeal
+EMOJI_MAP = {
+    "XGBoost_Optuna_Tuned": "🚀",
+    "MODELSTACKED+META_LEARNER": "🧩",
+    "MODELSTACKED+OPTUNA": "🔧",
+    "MODELSTACKED_META_LEARNER+NEURAL_NETS": "🧠",
+    "XGB_FEATURES": "📦",
+    "LightGBM_XGB_FEATURES": "🌿",
+    "PCA+XGB_FEATURES": "🔍",
+    "LightGBM+PCA+XGB_FEATURES": "⚡",
+    "LightGBM+PCA+XGB_FEATURES+OPTUNA": "🌱",
+    "LightGBM_7_FEATURES_OPTUNA": "🫀"   # Written by training.py
+}
+
+
+def _view(name, build, path=COMPARISONS_PATH):
+    """Returns a derived view of the results table, memoized per file version."""
+    return registry.derived(path, name, build)
+
+
+# -------------------- 📁 BASE TABLE -------------------- #
+
+def results_version(path=COMPARISONS_PATH):
+    """Returns the content version of the comparison file (changes when it is rewritten)."""
+    return registry.version(path)
+
+
+def results_df(path=COMPARISONS_PATH):
+    """
+    Returns the experiment results with standardized column names.
+
+    Returns:
+        pd.DataFrame: Columns Run ID, Accuracy, F1 Score, Model Name (shared, do not mutate).
+    """
+    def build(raw):
+        df = raw.copy()
+        df.columns = RESULT_COLUMNS
+        return df
+
+    return _view("results", build, path)
+
+
+# -------------------- 📊 COMPARE PAGE VIEWS -------------------- #
+
+def emoji_results_df():
+    """Results with emoji-prefixed model names."""
+    def build(_):
+        df = results_df().copy()
+        df["Model Name"] = df["Model Name"].map(lambda x: f"{EMOJI_MAP.get(x, '')} {x}")
+        return df
+
+    return _view("emoji_results", build)
+
+
+def top_models_df():
+    """Model Name / Accuracy / F1 Score sorted by accuracy, numbered from 1."""
+    def build(_):
+        df = (
+            emoji_results_df()[["Model Name", "Accuracy", "F1 Score"]]
+            .sort_values(by="Accuracy", ascending=False)
+            .reset_index(drop=True)
+        )
+        df.index += 1  # Index starts from 1 instead of 0
+        df.index.name = "Model No"
+        return df
+
+    return _view("top_models", build)
+
+
+def top_models_styler():
+    """Green-gradient, percentage-formatted Styler of `top_models_df`."""
+    def build(_):
+        return (
+            top_models_df().style
+            .background_gradient(subset=["Accuracy", "F1 Score"], cmap="Greens")
+            .format({
+                "Accuracy": lambda x: f"{x * 100:.2f}%",
+                "F1 Score": lambda x: f"{x * 100:.2f}%"
+            })
+        )
+
+    return _view("top_models_styler", build)
+
+
+def top_models_html():
+    """`top_models_styler` rendered to HTML once per version (Styler rendering is ~0.1 s)."""
+    return _view("top_models_html", lambda _: top_models_styler().to_html())
+
+
+def accuracy_chart_df():
+    """Results sorted by accuracy with an `Accuracy %` column for plot labels."""
+    def build(_):
+        df = emoji_results_df().sort_values(by="Accuracy", ascending=False)
+        return df.assign(**{"Accuracy %": df["Accuracy"] * 100})
+
+    return _view("accuracy_chart", build)
+
+
+# -------------------- 📁 MLFLOW PAGE VIEWS -------------------- #
+
+def ranked_results_df():
+    """Results indexed by `Model Rank` starting at 1."""
+    def build(_):
+        df = results_df().copy()
+        df.index = range(1, len(df) + 1)   # Rank models starting at 1
+        df.index.name = "Model Rank"
+        return df
+
+    return _view("ranked_results", build)
+
+
+def ranked_results_styler():
+    """Blue-gradient, 4-decimal Styler of `ranked_results_df`."""
+    def build(_):
+        return (
+            ranked_results_df().style
+            .format({
+                "Accuracy": "{:.4f}",
+                "F1 Score": "{:.4f}"
+            })
+            .background_gradient(cmap='Blues', subset=["Accuracy", "F1 Score"])
+        )
+
+    return _view("ranked_results_styler", build)
+
+
+def ranked_results_html():
+    """`ranked_results_styler` rendered to HTML once per version."""
+    return _view("ranked_results_html", lambda _: ranked_results_styler().to_html())
+
+
+def best_model():
+    """Row of the top-performing model (based on Accuracy)."""
+    return _view("best_model", lambda _: results_df().loc[results_df()["Accuracy"].idxmax()])
@@ -0,0 +1,300 @@
+# risk_grid.py
+#
+# Precomputed risk lookup table over the predictor page's bounded input space.
+#
+# A LightGBM model is piecewise constant: along each feature its output only
+# changes at the split thresholds the trees use. The grid therefore has one
+# cell per threshold interval of each feature (restricted to the slider
+# ranges), which makes every in-range lookup exact up to float32 storage
+# (max error ≤ 6e-8, measured again at build time and stored in the manifest).
+# A build whose error exceeds GRID_TOLERANCE is rejected, and every load
+# re-checks GRID_VERIFY_ROWS random rows against the model.
+#
+# Usage:
+#     python risk_grid.py build        # writes models/final_7_feature_lgbm.grid.{npy,json}
+
+import argparse
+import json
+import os
+import threading
+import time
+
+import numpy as np
+
+from model_registry import MODEL_7_FEATURE_PATH, get_model, registry, resolve_path
+from feature_schema import FEATURE_SCHEMA
+from tree_engine import compile_model
+from utils import FEATURE_LIST
+
+
+# Input ranges offered by predictor_page (inclusive)
+GRID_RANGES = {spec.name: (spec.low, spec.high) for spec in FEATURE_SCHEMA}
+INTEGER_FEATURES = {spec.name for spec in FEATURE_SCHEMA if spec.integer}
+GRID_TOLERANCE = 1e-6     # Float32 storage alone stays below 6e-8
+GRID_VERIFY_ROWS = 2_000  # Random rows re-checked whenever a grid is loaded
+
+
+def grid_paths(model_path=MODEL_7_FEATURE_PATH):
+    """Returns the (table, manifest) paths that belong to a model file."""
+    root = os.path.splitext(resolve_path(model_path))[0]
+    return f"{root}.grid.npy", f"{root}.grid.json"
+
+
+# -------------------- 🧮 GRID AXES -------------------- #
+
+def feature_edges(model, feature_list=FEATURE_LIST, ranges=GRID_RANGES):
+    """
+    Returns, per feature, the model's split thresholds that fall inside its range.
+
+    Args:
+        model: Fitted LightGBM model.
+        feature_list (list): Model feature order.
+        ranges (dict): Inclusive (low, high) bounds per feature.
+
+    Returns:
+        list[np.ndarray]: Sorted thresholds per feature; `len + 1` cells per axis.
+    """
+    compiled = compile_model(model)
+    is_split = compiled.left != np.arange(len(compiled.left))
+    edges = []
+    for j, name in enumerate(feature_list):
+        lo, hi = ranges[name]
+        thr = compiled.threshold[is_split & (compiled.feature == j)]
+        edges.append(np.unique(thr[(thr >= lo) & (thr < hi)]))
+    return edges
+
+
+def _axis_points(edges, hi):
+    """One representative value per cell: each edge itself, then the upper bound."""
+    return np.append(edges, hi).astype(np.float64)
+
+
+def sample_inputs(samples, seed=0):
+    """Random in-range rows (continuous BMI, integer everything else), in FEATURE_LIST order."""
+    rng = np.random.default_rng(seed)
+    cols = []
+    for name in FEATURE_LIST:
+        lo, hi = GRID_RANGES[name]
+        cols.append(rng.integers(lo, hi + 1, samples) if name in INTEGER_FEATURES else rng.uniform(lo, hi, samples))
+    return np.column_stack(cols).astype(np.float64)
+
+
+# -------------------- 🔎 LOOKUP -------------------- #
+
+class RiskGrid:
+    """Memory-mapped risk table with per-feature threshold edges."""
+
+    def __init__(self, table, edges, lows, highs, meta):
+        self.table = table
+        self.edges = edges
+        self.lows = lows
+        self.highs = highs
+        self.meta = meta
+
+    @classmethod
+    def load(cls, table_path, manifest_path):
+        with open(manifest_path, "r", encoding="utf-8") as f:
+            meta = json.load(f)
+        table = np.load(table_path, mmap_mode="r")
+        edges = [np.asarray(meta["edges"][name], dtype=np.float64) for name in meta["features"]]
+        lows = np.array([meta["ranges"][name][0] for name in meta["features"]], dtype=np.float64)
+        highs = np.array([meta["ranges"][name][1] for name in meta["features"]], dtype=np.float64)
+        return cls(table, edges, lows, highs, meta)
+
+    @property
+    def max_error(self):
+        return self.meta["max_error"]
+
+    def lookup(self, X):
+        """
+        Looks up risk probabilities for rows of X.
+
+        Args:
+            X (array-like): Features of shape (n, f) or (f,) in model order.
+
+        Returns:
+            tuple: (np.ndarray of probabilities, np.ndarray bool mask of in-grid rows).
+                   Out-of-grid rows are NaN.
+        """
+        X = np.asarray(X, dtype=np.float64)
+        if X.ndim == 1:
+            X = X.reshape(1, -1)
+        in_grid = np.all((X >= self.lows) & (X <= self.highs), axis=1)  # False for NaN too
+        proba = np.full(X.shape[0], np.nan)
+        if in_grid.any():
+            rows = X[in_grid]
+            idx = tuple(np.searchsorted(e, rows[:, j], side="left") for j, e in enumerate(self.edges))
+            proba[in_grid] = self.table[idx]
+        return proba, in_grid
+
+
+class GridPredictor:
+    """
+    `predict_proba`-compatible wrapper: grid lookup first, live model for the rest.
+
+    `grid_mtime` is the manifest mtime the grid was loaded from (None: no grid file).
+    """
+
+    def __init__(self, grid, model, grid_mtime=None):
+        self.grid = grid
+        self.model = model
+        self.grid_mtime = grid_mtime
+
+    def predict_proba(self, X):
+        X = np.asarray(X, dtype=np.float64)
+        if X.ndim == 1:
+            X = X.reshape(1, -1)
+        grid = self.grid  # May be swapped by load_grid_predictor() on a rebuild
+        if grid is None:
+            return self.model.predict_proba(X)
+        p1, in_grid = grid.lookup(X)
+        if not in_grid.all():
+            p1[~in_grid] = self.model.predict_proba(X[~in_grid])[:, 1]
+        return np.column_stack([1.0 - p1, p1])
+
+
+def verify_grid(grid, model, samples=GRID_VERIFY_ROWS, seed=1, atol=GRID_TOLERANCE):
+    """
+    Checks grid lookups against the live model on random in-range rows.
+
+    Args:
+        grid (RiskGrid): Grid to check.
+        model: Model the grid was built from.
+        samples (int): Random rows to compare on.
+        seed (int): RNG seed for the sample.
+        atol (float): Maximum tolerated absolute difference.
+
+    Returns:
+        float: Largest absolute probability difference observed.
+    """
+    X = sample_inputs(samples, seed)
+    max_error = float(np.max(np.abs(grid.lookup(X)[0] - model.predict_proba(X)[:, 1])))
+    if max_error > atol:
+        raise AssertionError(f"🚨 Risk grid differs from predict_proba by {max_error:.3g}")
+    return max_error
+
+
+_grid_lock = threading.Lock()
+
+
+def load_grid_predictor(model_path=MODEL_7_FEATURE_PATH):
+    """
+    Returns a `GridPredictor` for the model, cached per model version.
+
+    One predictor is kept per model; when the grid file is rebuilt its grid is
+    swapped in place, so the previous memory map is released instead of
+    staying cached. The grid is ignored (pure model fallback) when it is
+    missing or was built for a different model version.
+
+    Args:
+        model_path (str): Model the grid was built from.
+
+    Returns:
+        GridPredictor
+    """
+    table_path, manifest_path = grid_paths(model_path)
+    try:
+        grid_mtime = os.stat(manifest_path).st_mtime_ns
+    except FileNotFoundError:
+        grid_mtime = None
+
+    # A fresh predictor starts without a grid, i.e. as if the grid file were missing
+    predictor = registry.derived(model_path, "risk_grid", lambda model: GridPredictor(None, model))
+    if predictor.grid_mtime == grid_mtime:
+        return predictor
+
+    with _grid_lock:
+        if predictor.grid_mtime != grid_mtime:
+            grid = None
+            if grid_mtime is not None:
+                grid = RiskGrid.load(table_path, manifest_path)
+                if grid.meta.get("model_version") != registry.version(model_path):
+                    grid = None  # Stale: built for a previous model file
+                else:
+                    verify_grid(grid, predictor.model)
+            predictor.grid, predictor.grid_mtime = grid, grid_mtime
+    return predictor
+
+
+# -------------------- 🏗️ BUILD -------------------- #
+
+def build_grid(model_path=MODEL_7_FEATURE_PATH, samples=200_000, seed=0, log=print):
+    """
+    Builds the risk table for a model and validates it against the live model.
+
+    The table is filled one age cell at a time into a memory-mapped `.npy`,
+    so memory stays bounded by a single slice.
+
+    Args:
+        model_path (str): Model to tabulate.
+        samples (int): Random in-range rows used to measure the maximum error.
+        seed (int): RNG seed for the validation sample.
+        log (callable): Progress printer.
+
+    Returns:
+        dict: The manifest written next to the table.
+    """
+    model = get_model(model_path)
+    table_path, manifest_path = grid_paths(model_path)
+    edges = feature_edges(model)
+    points = [_axis_points(e, GRID_RANGES[name][1]) for e, name in zip(edges, FEATURE_LIST)]
+    shape = tuple(len(p) for p in points)
+    log(f"🧮 Grid shape {shape} = {np.prod(shape):,} cells ({np.prod(shape) * 4 / 1024 ** 2:.1f} MB)")
+
+    start = time.perf_counter()
+    tmp_path = table_path + ".tmp.npy"
+    table = np.lib.format.open_memmap(tmp_path, mode="w+", dtype=np.float32, shape=shape)
+    for i, first in enumerate(points[0]):
+        mesh = np.meshgrid(np.array([first]), *points[1:], indexing="ij")
+        X = np.column_stack([m.ravel() for m in mesh])
+        table[i] = model.predict_proba(X)[:, 1].reshape(shape[1:])
+        log(f"   slice {i + 1}/{shape[0]}")
+    table.flush()
+    del table
+    build_seconds = time.perf_counter() - start
+
+    manifest = {
+        "model_version": registry.version(model_path),
+        "features": FEATURE_LIST,
+        "ranges": {name: list(GRID_RANGES[name]) for name in FEATURE_LIST},
+        "edges": {name: e.tolist() for name, e in zip(FEATURE_LIST, edges)},
+        "shape": list(shape),
+        "dtype": "float32",
+        "build_seconds": round(build_seconds, 2),
+    }
+
+    # Validated before it replaces the current table, so a bad build never goes live
+    grid = RiskGrid(np.load(tmp_path, mmap_mode="r"), edges,
+                    np.array([GRID_RANGES[n][0] for n in FEATURE_LIST], dtype=np.float64),
+                    np.array([GRID_RANGES[n][1] for n in FEATURE_LIST], dtype=np.float64), manifest)
+    try:
+        max_error = verify_grid(grid, model, samples, seed)
+    except AssertionError:
+        os.remove(tmp_path)
+        raise
+    os.replace(tmp_path, table_path)
+    manifest["max_error"] = max_error
+    manifest["validation_samples"] = samples
+
+    with open(manifest_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+    log(f"✅ Built {table_path} in {build_seconds:.1f}s — max error {max_error:.2e} on {samples:,} samples")
+    return manifest
+
+
+# -------------------- 🖥️ CLI -------------------- #
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build the precomputed risk grid.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    build = sub.add_parser("build", help="Tabulate the model over the slider ranges")
+    build.add_argument("--model", default=MODEL_7_FEATURE_PATH, help="Model path")
+    build.add_argument("--samples", type=int, default=200_000, help="Validation sample size")
+    args = parser.parse_args(argv)
+
+    if args.command == "build":
+        build_grid(args.model, samples=args.samples)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+# server.py
+#
+# ASGI entrypoint (Streamlit >= 1.53 `st.App`) that adds what `streamlit run`
+# can't configure:
+#   - /app/static/* served with `Cache-Control: public, max-age=31536000, immutable`
+#     (names are content-hashed by `python assets.py build`) and 304 revalidation
+#   - /metrics in Prometheus text format (see instrumentation.py)
+#
+# Usage:
+#     uvicorn server:app --host 0.0.0.0 --port 8501
+#
+# `streamlit run app.py` keeps working; it serves static/ with default headers.
+
+import os
+
+from starlette.responses import Response
+from starlette.routing import Mount, Route
+from starlette.staticfiles import StaticFiles
+from streamlit.starlette import App
+
+from assets import STATIC_DIR
+from instrumentation import render_prometheus
+from model_registry import BASE_DIR
+
+
+IMMUTABLE = "public, max-age=31536000, immutable"
+
+
+class HashedStaticFiles(StaticFiles):
+    """Static files whose names change with their content: cache them for a year."""
+
+    def file_response(self, full_path, stat_result, scope, status_code=200):
+        response = super().file_response(full_path, stat_result, scope, status_code)
+        name = os.path.basename(full_path)
+        response.headers["Cache-Control"] = "no-cache" if name == "manifest.json" else IMMUTABLE
+        return response
+
+
+async def metrics(request):
+    return Response(render_prometheus(), media_type="text/plain; version=0.0.4")
+
+
+app = App(
+    os.path.join(BASE_DIR, "app.py"),
+    routes=[
+        Mount("/app/static", app=HashedStaticFiles(directory=STATIC_DIR, check_dir=False)),
+        Route("/metrics", metrics),
+    ],
+)
@@ -0,0 +1,155 @@
+# shap_data.py
+#
+# Compact SHAP summary data for the SHAP Insights page. Instead of shipping
+# rendered PNGs, the SHAP value matrix (float16) and the matching feature
+# values (float32) are stored in one compressed .npz, together with the
+# precomputed mean |SHAP| per feature.
+#
+# Usage:
+#     python shap_data.py build --data cohort.csv --max-rows 5000
+
+import argparse
+import os
+
+import numpy as np
+
+from model_registry import BASE_DIR, MODEL_7_FEATURE_PATH, ModelRegistry, registry
+from shap_explainer import explain_batch
+from utils import FEATURE_LIST, preprocess_input
+
+
+SHAP_DATA_PATH = os.path.join(BASE_DIR, "shap_plots", "shap_values.npz")
+PLOT_SAMPLE_SIZE = 2_000  # Points per feature drawn in the beeswarm
+
+
+# -------------------- 📦 LOADING -------------------- #
+
+class ShapSummary:
+    """SHAP matrix plus feature values and aggregates for one model version."""
+
+    def __init__(self, shap_values, feature_values, feature_names, base_value, mean_abs, model_version):
+        self.shap_values = shap_values
+        self.feature_values = feature_values
+        self.feature_names = feature_names
+        self.base_value = base_value
+        self.mean_abs = mean_abs
+        self.model_version = model_version
+
+    @property
+    def n_rows(self):
+        return self.shap_values.shape[0]
+
+    def sample_indices(self, size=PLOT_SAMPLE_SIZE, seed=0):
+        """Returns a fixed random subset of rows for plotting large backgrounds."""
+        if self.n_rows <= size:
+            return np.arange(self.n_rows)
+        return np.sort(np.random.default_rng(seed).choice(self.n_rows, size, replace=False))
+
+
+def _load_summary(path):
+    with np.load(path, allow_pickle=False) as data:
+        shap_values = data["shap_values"].astype(np.float32)
+        mean_abs = data["mean_abs"] if "mean_abs" in data else np.abs(shap_values).mean(axis=0)
+        return ShapSummary(
+            shap_values=shap_values,
+            feature_values=data["feature_values"],
+            feature_names=[str(name) for name in data["feature_names"]],
+            base_value=float(data["base_value"]),
+            mean_abs=mean_abs,
+            model_version=str(data["model_version"]),
+        )
+
+
+# Same mtime/hash-keyed caching as the models, with an .npz loader
+shap_store = ModelRegistry(loader=_load_summary)
+
+
+def load_shap_summary(path=SHAP_DATA_PATH):
+    """
+    Returns the cached SHAP summary, or None if it has not been built yet.
+
+    Args:
+        path (str): Location of the .npz summary.
+
+    Returns:
+        ShapSummary | None
+    """
+    if not os.path.exists(path):
+        return None
+    return shap_store.get(path)
+
+
+def is_stale(summary, model_path=MODEL_7_FEATURE_PATH):
+    """True when the summary was computed for a different model version."""
+    return summary.model_version != registry.version(model_path)
+
+
+# -------------------- 🏗️ BUILD -------------------- #
+
+def build_shap_summary(data_path, output=SHAP_DATA_PATH, max_rows=5_000, seed=0, model_path=MODEL_7_FEATURE_PATH):
+    """
+    Computes SHAP values on (a sample of) a dataset and stores them compactly.
+
+    Args:
+        data_path (str): CSV or Parquet file with the model's feature columns.
+        output (str): Destination .npz path.
+        max_rows (int): Rows sampled from the dataset (the background size).
+        seed (int): RNG seed for sampling.
+        model_path (str): Model to explain.
+
+    Returns:
+        ShapSummary: The summary that was written.
+    """
+    from batch_scoring import iter_chunks
+
+    # Uniform sample with bounded memory: keep the rows with the smallest random keys
+    rng = np.random.default_rng(seed)
+    keys = np.empty(0)
+    X = np.empty((0, len(FEATURE_LIST)), dtype=np.float32)
+    for chunk in iter_chunks(data_path):
+        keys = np.concatenate([keys, rng.random(len(chunk))])
+        X = np.concatenate([X, preprocess_input(chunk, FEATURE_LIST).to_numpy(dtype=np.float32)])
+        if len(keys) > max_rows:
+            keep = np.argpartition(keys, max_rows)[:max_rows]
+            keys, X = keys[keep], X[keep]
+
+    shap_values, base_value = explain_batch(X, model_path)
+    summary = ShapSummary(
+        shap_values=shap_values.astype(np.float32),
+        feature_values=X,
+        feature_names=list(FEATURE_LIST),
+        base_value=base_value,
+        mean_abs=np.abs(shap_values).mean(axis=0),
+        model_version=registry.version(model_path),
+    )
+    np.savez_compressed(
+        output,
+        shap_values=shap_values.astype(np.float16),
+        feature_values=X,
+        feature_names=np.array(FEATURE_LIST),
+        base_value=np.float64(base_value),
+        mean_abs=summary.mean_abs,
+        model_version=np.array(summary.model_version),
+    )
+    return summary
+
+
+# -------------------- 🖥️ CLI -------------------- #
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build the SHAP summary data for the SHAP Insights page.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    build = sub.add_parser("build", help="Compute SHAP values on a dataset sample")
+    build.add_argument("--data", required=True, help="CSV or Parquet file with the 7 model features")
+    build.add_argument("--output", default=SHAP_DATA_PATH, help="Destination .npz")
+    build.add_argument("--max-rows", type=int, default=5_000, help="Rows to explain")
+    args = parser.parse_args(argv)
+
+    if args.command == "build":
+        summary = build_shap_summary(args.data, args.output, max_rows=args.max_rows)
+        print(f"✅ Wrote {summary.n_rows:,} SHAP rows to {args.output} "
+              f"({os.path.getsize(args.output) / 1024:.0f} KB)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+# shap_explainer.py
+#
+# Live SHAP explanations for the predictor page and batch scoring. The
+# TreeExplainer is built once per model version (cached in the model registry)
+# and single-row explanations are memoized on the input vector.
+#
+# With HEART_INFERENCE_BACKEND=exported the explainer is built from the
+# exported native Booster (model_export.py), so explaining a prediction never
+# unpickles the sklearn model.
+
+import warnings
+from functools import lru_cache
+
+import numpy as np
+
+from model_registry import INFERENCE_BACKEND, MODEL_7_FEATURE_PATH, predictor_version, registry
+
+
+EXPLAIN_CACHE_SIZE = 4096
+
+
+# -------------------- 🧠 EXPLAINER -------------------- #
+
+def _build_explainer(model):
+    import shap
+
+    return shap.TreeExplainer(model)
+
+
+def get_explainer(model_path=MODEL_7_FEATURE_PATH, backend=None):
+    """
+    Returns the `shap.TreeExplainer` for a model, built once per model version.
+
+    Args:
+        model_path (str): Model to explain.
+        backend (str): Inference backend; defaults to $HEART_INFERENCE_BACKEND. The
+            "exported" backend explains the exported Booster instead of the pickle.
+
+    Returns:
+        shap.TreeExplainer
+    """
+    if (backend or INFERENCE_BACKEND) == "exported":
+        from model_export import export_paths, export_store, get_exported_model
+
+        get_exported_model(model_path)  # Raises if the model has not been exported
+        return export_store.derived(export_paths(model_path)[2], "shap_explainer",
+                                    lambda exported: _build_explainer(exported.booster()))
+    return registry.derived(model_path, "shap_explainer", _build_explainer)
+
+
+def _positive_class(values, base_value):
+    """Normalizes SHAP outputs across versions to the positive class (log-odds)."""
+    if isinstance(values, list):
+        values = values[-1]
+    values = np.asarray(values, dtype=np.float64)
+    if values.ndim == 3:
+        values = values[..., -1]
+    base_value = np.ravel(np.asarray(base_value, dtype=np.float64))[-1]
+    return values, float(base_value)
+
+
+# -------------------- 🔍 EXPLANATIONS -------------------- #
+
+def explain_batch(X, model_path=MODEL_7_FEATURE_PATH):
+    """
+    Computes SHAP contributions for many rows in one call.
+
+    Args:
+        X (array-like): Features of shape (n, f) in model order.
+        model_path (str): Model to explain.
+
+    Returns:
+        tuple: (np.ndarray of shape (n, f) with log-odds contributions, base value)
+    """
+    explainer = get_explainer(model_path)
+    X = np.asarray(X, dtype=np.float64)
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", UserWarning)  # LightGBM output-format notice
+        values = explainer.shap_values(X)
+    return _positive_class(values, explainer.expected_value)
+
+
+@lru_cache(maxsize=EXPLAIN_CACHE_SIZE)
+def _explain_row_cached(model_path, version, row):
+    values, base_value = explain_batch(np.array([row]), model_path)
+    values = values[0]
+    values.setflags(write=False)  # Shared between sessions
+    return values, base_value
+
+
+def explain_row(row, model_path=MODEL_7_FEATURE_PATH):
+    """
+    Returns SHAP contributions for a single input vector, memoized per model version
+    (`predictor_version`, so the exported backend never loads the pickle).
+
+    Args:
+        row (sequence): One row of features in model order.
+        model_path (str): Model to explain.
+
+    Returns:
+        tuple: (read-only np.ndarray of shape (f,), base value)
+    """
+    key = tuple(float(v) for v in np.ravel(row))
+    return _explain_row_cached(model_path, predictor_version(model_path), key)
+
+
+def explain_cache_info():
+    """Returns hit/miss statistics of the single-row explanation cache."""
+    return _explain_row_cached.cache_info()
@@ -0,0 +1,461 @@
+# training.py
+#
+# Offline retraining of the 7-feature LightGBM model from a local CSV/Parquet
+# file, end to end:
+#
+#   1. load + validate the features against feature_schema (out-of-range rows dropped)
+#   2. stratified train / validation / calibration / test split
+#   3. Optuna search, trials spread over worker processes that share one
+#      journal file; each trial trains single-threaded and is pruned early
+#      when its validation AUC falls behind the median of earlier trials
+#   4. refit on train + validation with the best parameters, evaluate on test
+#   5. write models/final_7_feature_lgbm.pkl, the comparison table row, the
+#      SHAP summary and the pickle-free export, with a calibration map and
+#      threshold table fitted on the calibration split (calibration.py);
+#      Brier before / after calibration is reported on the untouched test split
+#   6. log the search (one nested run per trial) and the final model to a
+#      local MLflow file store
+#
+# Wall time per trial and overall search throughput are printed and logged.
+#
+# Usage:
+#     python training.py --data cardio.csv --trials 200 --workers 8
+#     python training.py --data cohort.parquet --target cardio --timeout 600 --no-shap
+
+import argparse
+import datetime
+import json
+import os
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from feature_schema import encoder
+from model_registry import MODEL_7_FEATURE_PATH, resolve_path
+from mlflow_store import TRACKING_URI, allow_file_store
+from results_store import COMPARISONS_PATH, RESULT_COLUMNS
+from utils import DEFAULT_THRESHOLD, FEATURE_LIST, preprocess_input
+
+
+TARGET_COLUMN = os.environ.get("HEART_TARGET_COLUMN", "cardio")
+EXPERIMENT_NAME = "heart-risk-7-feature"
+COMPARISON_NAME = "LightGBM_7_FEATURES_OPTUNA"  # Row written to the comparison table
+
+MAX_ROUNDS = 2_000             # Upper bound on boosting rounds; early stopping picks the count
+EARLY_STOPPING_ROUNDS = 50
+PRUNE_INTERVAL = 10            # Rounds between reports to the pruner
+VALID_FRACTION = 0.15
+CALIBRATION_FRACTION = 0.15    # Never seen by the search or the final fit
+TEST_FRACTION = 0.15
+
+
+# -------------------- 📥 DATA -------------------- #
+
+def load_training_data(data_path, target=TARGET_COLUMN):
+    """
+    Reads the model features and the binary target, dropping invalid rows.
+
+    Args:
+        data_path (str): CSV or Parquet file with the 7 model features and `target`.
+        target (str): Name of the 0/1 label column.
+
+    Returns:
+        tuple: (X float32 (n, 7) in FEATURE_LIST order, y int8 (n,), number of dropped rows)
+    """
+    from batch_scoring import iter_chunks
+
+    Xs, ys = [], []
+    for chunk in iter_chunks(data_path):
+        if target not in chunk.columns:
+            raise ValueError(f"🚨 Missing target column `{target}`")
+        Xs.append(preprocess_input(chunk, FEATURE_LIST).to_numpy(dtype=np.float32))
+        ys.append(chunk[target].to_numpy(dtype=np.float64))
+    X, y = np.concatenate(Xs), np.concatenate(ys)
+
+    keep = encoder.valid_rows(X) & np.isin(y, (0, 1))
+    return X[keep], y[keep].astype(np.int8), int((~keep).sum())
+
+
+def split_data(X, y, seed=0):
+    """Stratified (train, valid, calibration, test) split, each a (X, y) pair."""
+    from sklearn.model_selection import train_test_split
+
+    X_rest, X_test, y_rest, y_test = train_test_split(
+        X, y, test_size=TEST_FRACTION, stratify=y, random_state=seed)
+    X_rest, X_calib, y_rest, y_calib = train_test_split(
+        X_rest, y_rest, test_size=CALIBRATION_FRACTION / (1 - TEST_FRACTION), stratify=y_rest,
+        random_state=seed)
+    X_train, X_valid, y_train, y_valid = train_test_split(
+        X_rest, y_rest, test_size=VALID_FRACTION / (1 - TEST_FRACTION - CALIBRATION_FRACTION),
+        stratify=y_rest, random_state=seed)
+    return (X_train, y_train), (X_valid, y_valid), (X_calib, y_calib), (X_test, y_test)
+
+
+# -------------------- 🔍 SEARCH (WORKER SIDE) -------------------- #
+
+_worker_data = None
+
+
+def _init_worker(train, valid):
+    """Pool initializer: keeps the training split in each worker (inherited on fork)."""
+    global _worker_data
+    _worker_data = (train, valid)
+
+
+def suggest_params(trial):
+    """LightGBM search space."""
+    return {
+        "num_leaves": trial.suggest_int("num_leaves", 8, 256, log=True),
+        "learning_rate": trial.suggest_float("learning_rate", 0.01, 0.3, log=True),
+        "min_child_samples": trial.suggest_int("min_child_samples", 5, 200, log=True),
+        "subsample": trial.suggest_float("subsample", 0.5, 1.0),
+        "subsample_freq": 1,
+        "colsample_bytree": trial.suggest_float("colsample_bytree", 0.5, 1.0),
+        "reg_alpha": trial.suggest_float("reg_alpha", 1e-8, 10.0, log=True),
+        "reg_lambda": trial.suggest_float("reg_lambda", 1e-8, 10.0, log=True),
+    }
+
+
+def _pruning_callback(trial, interval=PRUNE_INTERVAL):
+    """LightGBM callback reporting the validation AUC to Optuna and stopping pruned trials."""
+    import optuna
+
+    def callback(env):
+        if (env.iteration + 1) % interval:
+            return
+        for _, name, value, _ in env.evaluation_result_list:
+            if name == "auc":
+                trial.report(value, env.iteration)
+                if trial.should_prune():
+                    raise optuna.TrialPruned(f"AUC {value:.4f} at round {env.iteration + 1}")
+
+    return callback
+
+
+def _objective(trial, seed=0):
+    import lightgbm
+
+    (X_train, y_train), (X_valid, y_valid) = _worker_data
+    params = {**suggest_params(trial), "objective": "binary", "metric": "auc",
+              "seed": seed, "num_threads": 1, "verbosity": -1}
+    train_set = lightgbm.Dataset(X_train, y_train)
+    booster = lightgbm.train(
+        params, train_set, num_boost_round=MAX_ROUNDS,
+        valid_sets=[lightgbm.Dataset(X_valid, y_valid, reference=train_set)],
+        callbacks=[lightgbm.early_stopping(EARLY_STOPPING_ROUNDS, verbose=False), _pruning_callback(trial)],
+    )
+    trial.set_user_attr("best_iteration", int(booster.best_iteration or MAX_ROUNDS))
+    return float(booster.best_score["valid_0"]["auc"])
+
+
+def _make_pruner():
+    import optuna
+
+    return optuna.pruners.MedianPruner(n_startup_trials=5, n_warmup_steps=2 * PRUNE_INTERVAL)
+
+
+def _journal(path):
+    import optuna
+
+    return optuna.storages.JournalStorage(optuna.storages.journal.JournalFileBackend(path))
+
+
+def _run_trials(journal_path, study_name, n_trials, timeout, seed):
+    """Worker loop: pulls trials from the shared study until `n_trials` are finished overall."""
+    import optuna
+    from optuna.trial import TrialState
+
+    optuna.logging.set_verbosity(optuna.logging.WARNING)
+    study = optuna.load_study(study_name=study_name, storage=_journal(journal_path),
+                              sampler=optuna.samplers.TPESampler(seed=seed), pruner=_make_pruner())
+    stop = optuna.study.MaxTrialsCallback(n_trials, states=(TrialState.COMPLETE, TrialState.PRUNED))
+    study.optimize(lambda trial: _objective(trial, seed), timeout=timeout, callbacks=[stop])
+
+
+# -------------------- 🔍 SEARCH -------------------- #
+
+def run_search(train, valid, n_trials=100, workers=None, timeout=None, seed=0, journal_path=None):
+    """
+    Runs the Optuna search over `workers` processes.
+
+    Args:
+        train (tuple): (X, y) used to fit each trial.
+        valid (tuple): (X, y) for early stopping, pruning and the objective (AUC).
+        n_trials (int): Finished (complete + pruned) trials to run in total.
+        workers (int): Worker processes; defaults to the CPU count.
+        timeout (float): Optional wall-clock limit in seconds per worker.
+        seed (int): Seed of the samplers (offset per worker) and the models.
+        journal_path (str): Optuna journal file; a temporary one if omitted.
+
+    Returns:
+        tuple: (in-memory optuna.Study with the finished trials, wall seconds)
+    """
+    import optuna
+
+    optuna.logging.set_verbosity(optuna.logging.WARNING)
+    workers = workers or os.cpu_count() or 1
+    owned_journal = journal_path is None
+    if owned_journal:
+        fd, journal_path = tempfile.mkstemp(suffix=".optuna.journal")
+        os.close(fd)
+    study_name = f"{EXPERIMENT_NAME}-{datetime.datetime.now():%Y%m%d-%H%M%S}"
+    study = optuna.create_study(study_name=study_name, storage=_journal(journal_path),
+                                direction="maximize", pruner=_make_pruner())
+
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(train, valid)) as pool:
+        futures = [pool.submit(_run_trials, journal_path, study_name, n_trials, timeout, seed + i)
+                   for i in range(workers)]
+        for future in futures:
+            future.result()  # Re-raises worker errors
+    seconds = time.perf_counter() - start
+
+    # Copy the finished trials into an in-memory study (the journal may be temporary)
+    finished = optuna.create_study(direction="maximize")
+    finished.add_trials(optuna.load_study(study_name=study_name, storage=_journal(journal_path)).trials)
+    if owned_journal:
+        os.remove(journal_path)
+    return finished, seconds
+
+
+def trial_seconds(study):
+    """Returns {state name: np.ndarray of wall seconds} over the finished trials."""
+    by_state = {}
+    for trial in study.trials:
+        if trial.datetime_start is None or trial.datetime_complete is None:
+            continue
+        seconds = (trial.datetime_complete - trial.datetime_start).total_seconds()
+        by_state.setdefault(trial.state.name, []).append(seconds)
+    return {state: np.array(values) for state, values in by_state.items()}
+
+
+def search_report(study, wall_seconds, n_train):
+    """Timing and throughput summary of a finished search."""
+    times = trial_seconds(study)
+    all_times = np.concatenate(list(times.values())) if times else np.empty(0)
+    finished = len(all_times)
+    report = {
+        "trials": finished,
+        "trials_by_state": {state: len(values) for state, values in times.items()},
+        "wall_seconds": wall_seconds,
+        "trials_per_minute": 60 * finished / wall_seconds if wall_seconds else 0.0,
+        "trial_seconds_mean": float(all_times.mean()) if finished else 0.0,
+        "trial_seconds_median": float(np.median(all_times)) if finished else 0.0,
+        "trial_seconds_max": float(all_times.max()) if finished else 0.0,
+        "train_rows_per_second": n_train * finished / wall_seconds if wall_seconds else 0.0,
+    }
+    for state, values in times.items():
+        report[f"trial_seconds_mean_{state.lower()}"] = float(values.mean())
+    return report
+
+
+# -------------------- 🏁 FINAL MODEL -------------------- #
+
+def fit_final_model(best_params, best_iteration, X, y, seed=0):
+    """Refits LightGBM with the best parameters on `X` (named columns, as the app expects)."""
+    import lightgbm
+    import pandas as pd
+
+    model = lightgbm.LGBMClassifier(**best_params, subsample_freq=1, n_estimators=best_iteration,
+                                    random_state=seed, verbose=-1)
+    model.fit(pd.DataFrame(X, columns=FEATURE_LIST), y)
+    return model
+
+
+def evaluate(model, X, y, threshold=DEFAULT_THRESHOLD):
+    """Accuracy, F1 and ROC AUC on a held-out set."""
+    import pandas as pd
+    from sklearn.metrics import accuracy_score, f1_score, roc_auc_score
+
+    proba = model.predict_proba(pd.DataFrame(X, columns=FEATURE_LIST))[:, 1]
+    labels = (proba > threshold).astype(int)
+    return {
+        "accuracy": float(accuracy_score(y, labels)),
+        "f1_score": float(f1_score(y, labels)),
+        "roc_auc": float(roc_auc_score(y, proba)),
+    }
+
+
+def brier_scores(model, calibration, X, y):
+    """Brier score of the raw and the calibrated probabilities on a held-out set."""
+    import pandas as pd
+
+    proba = model.predict_proba(pd.DataFrame(X, columns=FEATURE_LIST))[:, 1]
+    return {
+        "brier_raw": float(np.mean((proba - y) ** 2)),
+        "brier_calibrated": float(np.mean((calibration.apply(proba) - y) ** 2)),
+    }
+
+
+def _atomic_dump(obj, path):
+    import joblib
+
+    tmp = f"{path}.tmp"
+    joblib.dump(obj, tmp)
+    os.replace(tmp, path)  # Readers (and the registry's version check) never see a partial file
+
+
+def update_comparisons(run_id, metrics, name=COMPARISON_NAME, path=COMPARISONS_PATH):
+    """Replaces (or appends) the `name` row of the comparison table shown on the Compare page."""
+    import joblib
+    import pandas as pd
+
+    row = pd.DataFrame([[run_id, metrics["accuracy"], metrics["f1_score"], name]], columns=RESULT_COLUMNS)
+    if os.path.exists(path):
+        table = joblib.load(path)
+        table = table[table.iloc[:, 3] != name]
+        row.columns = table.columns
+        table = pd.concat([table, row], ignore_index=True)
+    else:
+        table = row
+    _atomic_dump(table, path)
+
+
+# -------------------- 🧪 MLFLOW -------------------- #
+
+def log_to_mlflow(study, report, metrics, params, data_info, model_path,
+                  tracking_uri=TRACKING_URI, experiment=EXPERIMENT_NAME):
+    """
+    Logs the search as one parent run with a nested run per trial.
+
+    Returns:
+        str: The parent run id.
+    """
+    allow_file_store(tracking_uri)
+    import mlflow
+
+    mlflow.set_tracking_uri(tracking_uri)
+    mlflow.set_experiment(experiment)
+    with mlflow.start_run(run_name=COMPARISON_NAME) as parent:
+        mlflow.log_params({**params, **data_info})
+        mlflow.log_metrics({**metrics, **{k: v for k, v in report.items() if isinstance(v, (int, float))}})
+        mlflow.log_dict(report, "search_report.json")
+        mlflow.log_artifact(model_path)
+        for trial in study.trials:
+            with mlflow.start_run(run_name=f"trial_{trial.number}", nested=True):
+                mlflow.log_params(trial.params)
+                mlflow.set_tag("state", trial.state.name)
+                trial_metrics = {}
+                if trial.value is not None:
+                    trial_metrics["valid_auc"] = trial.value
+                elif trial.intermediate_values:
+                    trial_metrics["valid_auc"] = trial.intermediate_values[max(trial.intermediate_values)]
+                if trial.datetime_complete is not None:
+                    trial_metrics["seconds"] = (trial.datetime_complete - trial.datetime_start).total_seconds()
+                mlflow.log_metrics(trial_metrics)
+    return parent.info.run_id
+
+
+# -------------------- 🚂 PIPELINE -------------------- #
+
+def train(data_path, target=TARGET_COLUMN, n_trials=100, workers=None, timeout=None, seed=0,
+          output=MODEL_7_FEATURE_PATH, tracking_uri=TRACKING_URI, shap=True, export=True,
+          calibration_method="isotonic", log=print):
+    """
+    Runs the full retraining pipeline (see the module header).
+
+    Args:
+        data_path (str): CSV or Parquet file with the 7 model features and `target`.
+        target (str): 0/1 label column.
+        n_trials (int): Optuna trials (complete + pruned).
+        workers (int): Search processes; defaults to the CPU count.
+        timeout (float): Optional search time limit in seconds.
+        seed (int): Seed for the split, the samplers and the models.
+        output (str): Destination of the joblib model.
+        tracking_uri (str): MLflow tracking store.
+        shap (bool): Rebuild the SHAP summary on the test split.
+        export (bool): Write the pickle-free export (model_export.py) and the calibration.
+        calibration_method (str): "isotonic" or "platt", fitted on the calibration split.
+        log (callable): Progress printer.
+
+    Returns:
+        dict: Test metrics (with the test Brier scores when exporting), search report,
+            best parameters and the MLflow run id.
+    """
+    output = resolve_path(output)
+    X, y, dropped = load_training_data(data_path, target)
+    train_set, valid_set, calib_set, test_set = split_data(X, y, seed)
+    log(f"📥 {len(X):,} rows ({dropped:,} invalid dropped), positive rate {y.mean():.3f}: "
+        f"{len(train_set[1]):,} train / {len(valid_set[1]):,} valid / {len(calib_set[1]):,} calibration / "
+        f"{len(test_set[1]):,} test")
+
+    study, wall_seconds = run_search(train_set, valid_set, n_trials, workers, timeout, seed)
+    report = search_report(study, wall_seconds, len(train_set[1]))
+    best = study.best_trial
+    log(f"🔍 {report['trials']} trials {report['trials_by_state']} in {wall_seconds:.1f}s "
+        f"({report['trials_per_minute']:.1f} trials/min, {report['trial_seconds_median']:.2f}s median per trial)")
+    log(f"   best valid AUC {best.value:.4f} (trial {best.number}, {best.user_attrs['best_iteration']} rounds)")
+
+    start = time.perf_counter()
+    model = fit_final_model(best.params, best.user_attrs["best_iteration"],
+                            np.concatenate([train_set[0], valid_set[0]]),
+                            np.concatenate([train_set[1], valid_set[1]]), seed)
+    report["final_fit_seconds"] = time.perf_counter() - start
+    metrics = evaluate(model, *test_set)
+    _atomic_dump(model, output)
+    log(f"🏁 Test accuracy {metrics['accuracy']:.4f}, F1 {metrics['f1_score']:.4f}, "
+        f"AUC {metrics['roc_auc']:.4f} — wrote {os.path.relpath(output)}")
+
+    if export:
+        from calibration import calibration_path, load_calibration
+        from model_export import export_model
+
+        manifest = export_model(output, metrics=metrics, holdout=calib_set, calibration_method=calibration_method)
+        calibration = load_calibration(calibration_path(output))
+        metrics.update(brier_scores(model, calibration, *test_set))
+        log(f"📦 Exported native text + flat arrays; {calibration.method} calibration fitted on "
+            f"{calibration.rows:,} rows, threshold {manifest['threshold']:.3f}")
+        log(f"   test Brier {metrics['brier_raw']:.4f} -> {metrics['brier_calibrated']:.4f}")
+
+    data_info = {"data": os.path.basename(data_path), "rows": len(X), "dropped_rows": dropped,
+                 "n_trials": n_trials, "workers": workers or os.cpu_count() or 1}
+    run_id = log_to_mlflow(study, report, metrics, best.params, data_info, output, tracking_uri)
+    update_comparisons(run_id, metrics)
+    log(f"🧪 Logged run {run_id} to {tracking_uri}")
+
+    if shap:
+        import pandas as pd
+
+        from shap_data import build_shap_summary
+
+        with tempfile.TemporaryDirectory() as tmp:
+            sample_path = os.path.join(tmp, "test.parquet")
+            pd.DataFrame(test_set[0], columns=FEATURE_LIST).to_parquet(sample_path)
+            summary = build_shap_summary(sample_path, model_path=output)
+        log(f"🔍 SHAP summary rebuilt on {summary.n_rows:,} test rows")
+    log("ℹ️ Rebuild the risk grid with `python risk_grid.py build` (it is stale until then)")
+
+    return {"metrics": metrics, "search": report, "best_params": best.params,
+            "best_valid_auc": best.value, "run_id": run_id}
+
+
+# -------------------- 🖥️ CLI -------------------- #
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Retrain the 7-feature LightGBM model with a parallel Optuna search.")
+    parser.add_argument("--data", required=True, help="CSV or Parquet file with the 7 model features and the target")
+    parser.add_argument("--target", default=TARGET_COLUMN, help="0/1 label column")
+    parser.add_argument("--trials", type=int, default=100, help="Optuna trials (complete + pruned)")
+    parser.add_argument("--workers", type=int, help="Search processes (default: CPU count)")
+    parser.add_argument("--timeout", type=float, help="Search time limit in seconds")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default=MODEL_7_FEATURE_PATH, help="Joblib model path")
+    parser.add_argument("--tracking-uri", default=TRACKING_URI, help="MLflow tracking store")
+    parser.add_argument("--no-shap", action="store_true", help="Skip rebuilding the SHAP summary")
+    parser.add_argument("--no-export", action="store_true", help="Skip the pickle-free export and calibration")
+    parser.add_argument("--calibration", choices=["isotonic", "platt"], default="isotonic",
+                        help="Calibration fitted on the calibration split at export")
+    parser.add_argument("--json", action="store_true", help="Print the result as JSON")
+    args = parser.parse_args(argv)
+
+    result = train(args.data, args.target, args.trials, args.workers, args.timeout, args.seed,
+                   args.output, args.tracking_uri, shap=not args.no_shap, export=not args.no_export,
+                   calibration_method=args.calibration)
+    if args.json:
+        print(json.dumps(result, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,368 @@
+# tree_engine.py
+#
+# Compiled inference backend for the LightGBM models: the booster's trees are
+# exported into flat NumPy arrays and evaluated without the sklearn wrapper,
+# pandas or the generic LightGBM predictor.
+#
+# Every build through model_registry.get_predictor("compiled") is checked
+# against predict_proba on VERIFY_ROWS synthetic rows first (compile_verified),
+# so a traversal bug fails loudly instead of shipping wrong probabilities.
+#
+# Usage:
+#     python tree_engine.py            # verify against predict_proba + timings
+
+import argparse
+import os
+import time
+
+import numpy as np
+
+try:  # Optional JIT backend
+    import numba
+except ImportError:
+    numba = None
+
+if numba is not None and "NUMBA_THREADING_LAYER_PRIORITY" not in os.environ:
+    # TBB (numba's first choice) hangs interpreter exit once a parallel kernel
+    # has run on a daemon thread (micro-batcher, server threads); OpenMP doesn't
+    numba.config.THREADING_LAYER_PRIORITY = ["omp", "tbb", "workqueue"]
+
+
+_MISSING_TYPES = {"None": 0, "Zero": 1, "NaN": 2}
+_ZERO_THRESHOLD = float(np.float32(1e-35))  # LightGBM's kZeroThreshold (a float literal, 1e-35f)
+_ROW_BLOCK = 16_384      # Rows per vectorized block (bounds the node-index matrix)
+VERIFY_ROWS = 2_000      # Synthetic rows checked whenever the backend is built
+
+
+# -------------------- 🌳 FLAT TREE ARRAYS -------------------- #
+
+class CompiledForest:
+    """
+    A LightGBM binary classifier flattened into node arrays.
+
+    Leaves are stored as nodes whose children point to themselves with an
+    infinite threshold, so every tree can be stepped `max_depth` times in
+    lock-step without per-row branching.
+
+    Exposes `predict_proba` with the sklearn output shape, so it can be passed
+    anywhere a model is expected (e.g., `utils.predict_batch`).
+    """
+
+    def __init__(self, feature, threshold, left, right, value, default_left,
+                 missing_type, roots, max_depth, feature_names, sigmoid=1.0):
+        self.feature = feature
+        self.threshold = threshold
+        self.left = left
+        self.right = right
+        self.value = value
+        self.default_left = default_left
+        self.missing_type = missing_type
+        self.roots = roots
+        self.max_depth = max_depth
+        self.feature_names = feature_names
+        self.sigmoid = sigmoid
+        self.has_missing_rules = bool(np.any(missing_type != 0))
+
+    _ARRAYS = ("feature", "threshold", "left", "right", "value", "default_left", "missing_type", "roots")
+
+    @property
+    def n_trees(self):
+        return len(self.roots)
+
+    @property
+    def n_features_in_(self):
+        return len(self.feature_names)
+
+    # ----------------- Vectorized traversal -----------------
+
+    def _raw_block(self, X):
+        n, f = X.shape
+        flat = X.ravel()
+        row_offset = (np.arange(n) * f)[:, None]
+        node = np.broadcast_to(self.roots, (n, self.n_trees)).copy()
+        for _ in range(self.max_depth):
+            # np.take on flat arrays is markedly cheaper than 2-D fancy indexing
+            fval = np.take(flat, row_offset + np.take(self.feature, node))
+            thr = np.take(self.threshold, node)
+            go_left = fval <= thr
+            if self.has_missing_rules:
+                mtype = np.take(self.missing_type, node)
+                is_nan = np.isnan(fval)
+                use_default = ((mtype == 1) & (np.abs(np.where(is_nan, 0.0, fval)) <= _ZERO_THRESHOLD)) | \
+                              ((mtype == 2) & is_nan)
+                # NaN is treated as 0.0 unless the split has a NaN rule
+                go_left = np.where(is_nan & (mtype != 2), 0.0 <= thr, go_left)
+                go_left = np.where(use_default, np.take(self.default_left, node), go_left)
+            node = np.where(go_left, np.take(self.left, node), np.take(self.right, node))
+        return np.take(self.value, node).sum(axis=1)
+
+    def predict_raw(self, X, use_numba=True):
+        """
+        Returns the raw (log-odds) score for each row.
+
+        Args:
+            X (array-like): Features of shape (n, f) or (f,) in model order.
+            use_numba (bool): Use the JIT kernel when Numba is installed.
+
+        Returns:
+            np.ndarray: Raw scores of shape (n,).
+        """
+        X = np.ascontiguousarray(X, dtype=np.float64)
+        if X.ndim == 1:
+            X = X.reshape(1, -1)
+        if X.shape[1] != self.n_features_in_:
+            raise ValueError(f"🚨 Expected {self.n_features_in_} features, got {X.shape[1]}")
+
+        if use_numba and numba is not None:
+            return _numba_raw(X, self.feature, self.threshold, self.left, self.right, self.value,
+                              self.default_left, self.missing_type, self.roots)
+        # LightGBM reads |x| <= kZeroThreshold as exactly 0.0 (which matters at its ±1e-35 splits)
+        tiny = (np.abs(X) <= _ZERO_THRESHOLD) & (X != 0.0)
+        if tiny.any():
+            X = np.where(tiny, 0.0, X)
+        if not self.has_missing_rules and np.isnan(X).any():
+            X = np.where(np.isnan(X), 0.0, X)  # Without NaN rules LightGBM reads NaN as 0.0
+        if X.shape[0] <= _ROW_BLOCK:
+            return self._raw_block(X)
+        return np.concatenate([self._raw_block(X[i:i + _ROW_BLOCK])
+                               for i in range(0, X.shape[0], _ROW_BLOCK)])
+
+    def predict_proba(self, X, use_numba=True):
+        """
+        Returns class probabilities with the same layout as sklearn's `predict_proba`.
+
+        Args:
+            X (array-like): Features of shape (n, f) or (f,) in model order.
+            use_numba (bool): Use the JIT kernel when Numba is installed.
+
+        Returns:
+            np.ndarray: Array of shape (n, 2) with P(class 0), P(class 1).
+        """
+        p1 = 1.0 / (1.0 + np.exp(-self.sigmoid * self.predict_raw(X, use_numba=use_numba)))
+        return np.column_stack([1.0 - p1, p1])
+
+    # ----------------- Serialization -----------------
+
+    def save(self, path):
+        """Writes the node arrays to an uncompressed .npz file (loadable without pickle)."""
+        np.savez(path, **{name: getattr(self, name) for name in self._ARRAYS},
+                 max_depth=self.max_depth, sigmoid=self.sigmoid,
+                 feature_names=np.asarray(self.feature_names, dtype=str))
+
+    @classmethod
+    def load(cls, path):
+        """Reads a forest written by `save`. Needs NumPy only (no LightGBM/sklearn import)."""
+        with np.load(path, allow_pickle=False) as data:
+            return cls(**{name: data[name] for name in cls._ARRAYS},
+                       max_depth=int(data["max_depth"]), sigmoid=float(data["sigmoid"]),
+                       feature_names=data["feature_names"].tolist())
+
+
+# -------------------- ⚡ NUMBA KERNEL -------------------- #
+
+if numba is not None:
+    @numba.njit(parallel=True, cache=True, nogil=True)
+    def _numba_raw(X, feature, threshold, left, right, value, default_left, missing_type, roots):
+        n = X.shape[0]
+        out = np.zeros(n)
+        for i in numba.prange(n):
+            total = 0.0
+            for t in range(roots.shape[0]):
+                node = roots[t]
+                while left[node] != node:
+                    fval = X[i, feature[node]]
+                    mtype = missing_type[node]
+                    if (np.isnan(fval) and mtype != 2) or abs(fval) <= _ZERO_THRESHOLD:
+                        fval = 0.0
+                    if (mtype == 1 and abs(fval) <= _ZERO_THRESHOLD) or (mtype == 2 and np.isnan(fval)):
+                        go_left = default_left[node]
+                    else:
+                        go_left = fval <= threshold[node]
+                    node = left[node] if go_left else right[node]
+                total += value[node]
+            out[i] = total
+        return out
+else:
+    _numba_raw = None
+
+
+# -------------------- 🏗️ EXPORT -------------------- #
+
+def compile_model(model):
+    """
+    Exports a fitted LightGBM binary classifier into a `CompiledForest`.
+
+    Args:
+        model: `LGBMClassifier` or `lightgbm.Booster` with a binary objective.
+
+    Returns:
+        CompiledForest: Flat-array representation of the booster.
+    """
+    booster = getattr(model, "booster_", model)
+    dump = booster.dump_model()
+
+    objective = dump.get("objective", "")
+    if not objective.startswith("binary") or dump.get("num_tree_per_iteration", 1) != 1:
+        raise ValueError(f"🚨 Only binary LightGBM models can be compiled (got '{objective}')")
+    if dump.get("average_output"):
+        raise ValueError("🚨 Averaged-output (random forest) boosters are not supported")
+    sigmoid = 1.0
+    for token in objective.split():
+        if token.startswith("sigmoid:"):
+            sigmoid = float(token.split(":", 1)[1])
+
+    feature, threshold, left, right, value, default_left, missing_type = [], [], [], [], [], [], []
+    roots, max_depth = [], 0
+
+    def add_node(node, depth):
+        nonlocal max_depth
+        idx = len(feature)
+        feature.append(0)
+        threshold.append(np.inf)
+        left.append(idx)
+        right.append(idx)
+        value.append(0.0)
+        default_left.append(True)
+        missing_type.append(0)
+
+        if "leaf_value" in node:
+            value[idx] = node["leaf_value"]
+            max_depth = max(max_depth, depth)
+            return idx
+        if node["decision_type"] != "<=":
+            raise ValueError("🚨 Categorical splits are not supported by the compiled engine")
+
+        feature[idx] = node["split_feature"]
+        threshold[idx] = node["threshold"]
+        default_left[idx] = node["default_left"]
+        missing_type[idx] = _MISSING_TYPES[node["missing_type"]]
+        left[idx] = add_node(node["left_child"], depth + 1)
+        right[idx] = add_node(node["right_child"], depth + 1)
+        return idx
+
+    for tree in dump["tree_info"]:
+        roots.append(add_node(tree["tree_structure"], 0))
+
+    return CompiledForest(
+        feature=np.asarray(feature, dtype=np.int32),
+        threshold=np.asarray(threshold, dtype=np.float64),
+        left=np.asarray(left, dtype=np.int32),
+        right=np.asarray(right, dtype=np.int32),
+        value=np.asarray(value, dtype=np.float64),
+        default_left=np.asarray(default_left, dtype=np.bool_),
+        missing_type=np.asarray(missing_type, dtype=np.int8),
+        roots=np.asarray(roots, dtype=np.int32),
+        max_depth=max_depth,
+        feature_names=list(dump["feature_names"]),
+        sigmoid=sigmoid,
+    )
+
+
+def verify(model, compiled, X, atol=1e-9):
+    """
+    Checks compiled probabilities against the live model's `predict_proba`.
+
+    Args:
+        model: Original fitted model.
+        compiled (CompiledForest): Output of `compile_model(model)`.
+        X (array-like): Rows to compare on.
+        atol (float): Maximum tolerated absolute difference.
+
+    Returns:
+        float: Largest absolute probability difference observed.
+    """
+    expected = model.predict_proba(X)[:, 1]
+    max_diff = 0.0
+    for use_numba in ([True, False] if numba is not None else [False]):
+        actual = compiled.predict_proba(X, use_numba=use_numba)[:, 1]
+        max_diff = max(max_diff, float(np.max(np.abs(actual - expected))))
+    if max_diff > atol:
+        raise AssertionError(f"🚨 Compiled engine differs from predict_proba by {max_diff:.3g}")
+    return max_diff
+
+
+def _split_points(booster):
+    """(feature, threshold) arrays of every split, read from the model text rather than dump_model()."""
+    features, thresholds = [], []
+    for line in booster.model_to_string().splitlines():
+        if line.startswith("split_feature="):
+            features.extend(int(v) for v in line[len("split_feature="):].split())
+        elif line.startswith("threshold="):
+            thresholds.extend(float(v) for v in line[len("threshold="):].split())
+    return np.asarray(features, dtype=np.int64), np.asarray(thresholds, dtype=np.float64)
+
+
+def verification_input(model, rows=VERIFY_ROWS, seed=0):
+    """
+    Synthetic rows exercising every split of a LightGBM model.
+
+    Each feature is drawn uniformly around the range of its split thresholds;
+    20% of the values sit exactly on a threshold (the `<=` edge) and 5% are
+    NaN (the missing-value routing). Thresholds come from the model text, so
+    an export bug in `compile_model` cannot shift the test points with it.
+
+    Returns:
+        np.ndarray: Shape (rows, n_features), float64.
+    """
+    booster = getattr(model, "booster_", model)
+    features, thresholds = _split_points(booster)
+    rng = np.random.default_rng(seed)
+    cols = []
+    for j in range(booster.num_feature()):
+        edges = thresholds[features == j]
+        if len(edges) == 0:
+            cols.append(rng.uniform(0.0, 1.0, rows))
+            continue
+        col = rng.uniform(edges.min() - 1.0, edges.max() + 1.0, rows)
+        on_edge = rng.random(rows) < 0.2
+        col[on_edge] = rng.choice(edges, on_edge.sum())
+        cols.append(col)
+    X = np.column_stack(cols)
+    X[rng.random(X.shape) < 0.05] = np.nan
+    return X
+
+
+def compile_verified(model):
+    """`compile_model` followed by `verify` on `verification_input` (raises on a mismatch)."""
+    compiled = compile_model(model)
+    verify(model, compiled, verification_input(model))
+    return compiled
+
+
+# -------------------- 🖥️ CLI -------------------- #
+
+def main(argv=None):
+    from benchmarks.bench_predict_risk import make_input
+    from model_registry import get_model, MODEL_7_FEATURE_PATH
+
+    parser = argparse.ArgumentParser(description="Verify and time the compiled tree engine.")
+    parser.add_argument("--model", default=MODEL_7_FEATURE_PATH, help="Model path")
+    parser.add_argument("--rows", type=int, default=100_000, help="Rows for verification/throughput")
+    args = parser.parse_args(argv)
+
+    model = get_model(args.model)
+    compiled = compile_model(model)
+    X = make_input(args.rows).to_numpy(dtype=np.float64)
+
+    print(f"🌳 {compiled.n_trees} trees, {len(compiled.feature)} nodes, max depth {compiled.max_depth}")
+    print(f"✅ max |Δp| vs predict_proba: {verify(model, compiled, X):.3g}")
+
+    backends = [("lightgbm", lambda x: model.predict_proba(x))]
+    backends.append(("numpy", lambda x: compiled.predict_proba(x, use_numba=False)))
+    if numba is not None:
+        backends.append(("numba", lambda x: compiled.predict_proba(x)))
+
+    for name, fn in backends:
+        fn(X[:1])  # Warm-up (JIT compile)
+        start = time.perf_counter()
+        for _ in range(200):
+            fn(X[:1])
+        single_us = (time.perf_counter() - start) / 200 * 1e6
+        start = time.perf_counter()
+        fn(X)
+        rows_per_s = len(X) / (time.perf_counter() - start)
+        print(f"{name:<9} single-row {single_us:9.1f} µs | batch {rows_per_s:12,.0f} rows/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,51 +1,59 @@
 # utils.py
 
-import joblib
+import json
 import pandas as pd
 import numpy as np
 import os
 import streamlit as st  # Needed for set_particle_background()
 
+from model_registry import registry
+from instrumentation import timed
+from feature_schema import FEATURE_NAMES
+
 
 # -------------------- 🌌 BACKGROUND PARTICLE ANIMATION -------------------- #
 
-def set_particle_background():
-    """
-    Injects animated particle background into Streamlit UI using HTML + JS.
-    Call this function at the top of any Streamlit page.
-    """
-    st.markdown("""
-        <style>
-            html, body, [data-testid="stAppViewContainer"] {
-                margin: 0;
-                padding: 0;
-                height: 100%;
-                overflow: hidden;
-                background: transparent !important;
-            }
-            canvas#bgCanvas {
-                position: fixed;
-                top: 0;
-                left: 0;
-                z-index: -1;
-                width: 100vw;
-                height: 100vh;
-            }
-        </style>
-        <canvas id="bgCanvas"></canvas>
-        <script>
-        const canvas = document.getElementById("bgCanvas");
-        const ctx = canvas.getContext("2d");
-        let w = window.innerWidth;
-        let h = window.innerHeight;
-        canvas.width = w;
-        canvas.height = h;
-
-        // Particle system setup
-        const particles = [];
-        const numParticles = 120;
-
-        for (let i = 0; i < numParticles; i++) {
+# Particle count (0 disables the background) and frame-rate cap
+PARTICLE_COUNT = int(os.environ.get("HEART_PARTICLES", 120))
+PARTICLE_MAX_FPS = int(os.environ.get("HEART_PARTICLES_FPS", 30))
+
+# Attaches the canvas and animation loop to the page document itself, so they
+# outlive the element that injected them and survive reruns. The window flag
+# makes repeated injections update the config instead of starting another
+# requestAnimationFrame loop.
+_PARTICLE_SCRIPT = """
+(function (cfg) {
+    const win = window, doc = win.document;
+    if (win.__heartParticles) { win.__heartParticles.configure(cfg); return; }
+
+    const style = doc.createElement("style");
+    style.id = "heart-particles-style";
+    style.textContent = `
+        html, body, [data-testid="stAppViewContainer"] {
+            margin: 0; padding: 0; height: 100%; overflow: hidden;
+            background: transparent !important;
+        }
+        canvas#bgCanvas {
+            position: fixed; top: 0; left: 0; z-index: -1;
+            width: 100vw; height: 100vh; pointer-events: none;
+        }`;
+    doc.head.appendChild(style);
+
+    const canvas = doc.createElement("canvas");
+    canvas.id = "bgCanvas";
+    doc.body.prepend(canvas);
+    const ctx = canvas.getContext("2d");
+
+    let w = 0, h = 0, particles = [], minInterval = 0, frame = null, last = 0, slow = 0, disabled = false;
+
+    function resize() {
+        w = canvas.width = win.innerWidth;
+        h = canvas.height = win.innerHeight;
+    }
+
+    function spawn(count) {
+        particles = particles.slice(0, count);
+        while (particles.length < count) {
             particles.push({
                 x: Math.random() * w,
                 y: Math.random() * h,
@@ -54,64 +62,130 @@ def set_particle_background():
                 radius: Math.random() * 2.2 + 1
             });
         }
+    }
+
+    function draw(now) {
+        frame = win.requestAnimationFrame(draw);
+        const elapsed = now - last;
+        if (elapsed < minInterval) return;  // Frame-rate cap
+        // Frame budget: if the client keeps missing half the target rate, turn off
+        slow = elapsed > 2 * minInterval && last ? slow + 1 : 0;
+        if (slow > 60) { stop(true); return; }
+        const step = last ? Math.min(elapsed / 16.7, 4) : 1;  // Same speed at any fps
+        last = now;
+
+        ctx.clearRect(0, 0, w, h);
+        ctx.fillStyle = "rgba(255, 75, 75, 0.5)";  // red tint
+        ctx.beginPath();
+        for (const p of particles) {
+            ctx.moveTo(p.x + p.radius, p.y);
+            ctx.arc(p.x, p.y, p.radius, 0, Math.PI * 2);
+            p.x += p.vx * step;
+            p.y += p.vy * step;
+            if (p.x < 0 || p.x > w) p.vx *= -1;  // Bounce off walls
+            if (p.y < 0 || p.y > h) p.vy *= -1;
+        }
+        ctx.fill();
+    }
+
+    function start() {
+        if (frame === null && !disabled && particles.length && !doc.hidden) {
+            last = 0;
+            frame = win.requestAnimationFrame(draw);
+        }
+    }
 
-        // Animation loop
-        function draw() {
+    function stop(permanently) {
+        if (frame !== null) win.cancelAnimationFrame(frame);
+        frame = null;
+        if (permanently) {
+            disabled = true;
             ctx.clearRect(0, 0, w, h);
-            for (let i = 0; i < particles.length; i++) {
-                const p = particles[i];
-                ctx.beginPath();
-                ctx.arc(p.x, p.y, p.radius, 0, Math.PI * 2);
-                ctx.fillStyle = "rgba(255, 75, 75, 0.5)";  // red tint
-                ctx.fill();
-
-                // Move particle
-                p.x += p.vx;
-                p.y += p.vy;
-
-                // Bounce off walls
-                if (p.x < 0 || p.x > w) p.vx *= -1;
-                if (p.y < 0 || p.y > h) p.vy *= -1;
-            }
-            requestAnimationFrame(draw);
         }
+    }
 
-        draw();
+    function lowPower() {
+        const nav = win.navigator;
+        return win.matchMedia("(prefers-reduced-motion: reduce)").matches
+            || (nav.hardwareConcurrency || 4) <= 2
+            || (nav.deviceMemory || 4) <= 2
+            || Boolean(nav.connection && nav.connection.saveData);
+    }
+
+    function configure(next) {
+        minInterval = 1000 / Math.max(next.fps, 1);
+        spawn(next.count);
+        if (!particles.length) stop(false); else start();
+    }
 
-        // Responsive canvas
-        window.onresize = () => {
-            w = window.innerWidth;
-            h = window.innerHeight;
-            canvas.width = w;
-            canvas.height = h;
-        };
-        </script>
-    """, unsafe_allow_html=True)
+    resize();
+    win.addEventListener("resize", resize);
+    doc.addEventListener("visibilitychange", () => doc.hidden ? stop(false) : start());
+    if (lowPower()) disabled = true;
+    if (win.navigator.getBattery) {
+        win.navigator.getBattery().then((battery) => {
+            const check = () => { if (!battery.charging && battery.level < 0.2) stop(true); };
+            battery.addEventListener("levelchange", check);
+            battery.addEventListener("chargingchange", check);
+            check();
+        });
+    }
+
+    win.__heartParticles = { configure: configure };
+    configure(cfg);
+})(__CONFIG__);
+"""
+
+
+def set_particle_background(count=PARTICLE_COUNT, max_fps=PARTICLE_MAX_FPS):
+    """
+    Mounts the animated particle background once per session.
+
+    The canvas and its animation loop live in the page document, so reruns and
+    page switches don't restart or stack them; calling this again in the same
+    session is a no-op. The animation caps its frame rate, pauses while the tab
+    is hidden and turns itself off on low-power clients (reduced-motion
+    preference, <= 2 cores or GB of memory, data saver, low battery, or
+    sustained missed frames).
+
+    Args:
+        count (int): Number of particles (0 disables the background).
+        max_fps (int): Frame-rate cap.
+    """
+    config = {"count": int(count), "fps": int(max_fps)}
+    if not count or st.session_state.get("_particle_background") == config:
+        return
+
+    script = _PARTICLE_SCRIPT.replace("__CONFIG__", json.dumps(config))
+    st.html(f"<script>{script}</script>", unsafe_allow_javascript=True)
+    st.session_state["_particle_background"] = config
 
 
 # -------------------- 💾 MODEL LOADING -------------------- #
 
-@st.cache_resource
 def load_model(model_path="models/final_7_feature_lgbm.pkl"):
     """
     Loads a trained ML model (LightGBM in this case) from disk.
 
+    The model is served from the process-wide `model_registry`, so it is
+    unpickled once per file version instead of on every Streamlit rerun.
+
     Args:
         model_path (str): Relative path to the model inside project.
     
     Returns:
         Loaded model object (e.g., LightGBM).
     """
-    abs_path = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", model_path))
-    try:
-        model = joblib.load(abs_path)
-        return model
-    except FileNotFoundError:
-        raise FileNotFoundError(f"❌ Model not found at {abs_path}")
+    return registry.get(model_path)
 
 
 # -------------------- 📊 DATA PREPARATION -------------------- #
 
+# Feature order expected by models/final_7_feature_lgbm.pkl (declared in feature_schema.py)
+FEATURE_LIST = list(FEATURE_NAMES)
+
+
+@timed("preprocess_input")
 def preprocess_input(user_input: pd.DataFrame, feature_list: list):
     """
     Ensures the user-provided input has the exact features required by the model.
@@ -132,20 +206,49 @@ def preprocess_input(user_input: pd.DataFrame, feature_list: list):
 
 # -------------------- 🔮 PREDICTION -------------------- #
 
-def predict_risk(model, input_data: pd.DataFrame):
+DEFAULT_THRESHOLD = 0.5
+
+
+def predict_batch(model, input_data, threshold=DEFAULT_THRESHOLD, calibration=None):
+    """
+    Scores one or many rows with a single pass over the model's trees.
+
+    Class labels are derived from the probabilities instead of calling
+    `model.predict`, which would walk the whole ensemble a second time.
+
+    Args:
+        model: Trained model with `predict_proba`.
+        input_data (pd.DataFrame | np.ndarray): Preprocessed features, shape (n, f) or (f,).
+        threshold (float): Probability above which a row is labelled high risk.
+        calibration (calibration.Calibration): Optional map applied to the probabilities
+            before thresholding (one np.interp over the batch).
+
+    Returns:
+        tuple: (np.ndarray of positive-class probabilities, np.ndarray of 0/1 labels)
+    """
+    if isinstance(input_data, np.ndarray) and input_data.ndim == 1:
+        input_data = input_data.reshape(1, -1)
+    with timed("predict_proba"):
+        proba = model.predict_proba(input_data)[:, 1]  # Probability of class 1
+    if calibration is not None:
+        proba = calibration.apply(proba)
+    return proba, (proba > threshold).astype(np.int8)
+
+
+def predict_risk(model, input_data: pd.DataFrame, threshold=DEFAULT_THRESHOLD):
     """
     Makes prediction using the trained model.
 
     Args:
-        model: Trained model with `predict` and `predict_proba`.
-        input_data (pd.DataFrame): Preprocessed input features.
+        model: Trained model with `predict_proba`.
+        input_data (pd.DataFrame): Preprocessed input features (first row is scored).
+        threshold (float): Probability above which the row is labelled high risk.
 
     Returns:
         tuple: (probability of positive class, predicted class label)
     """
-    proba = model.predict_proba(input_data)[0][1]  # Probability of class 1
-    pred_class = model.predict(input_data)[0]
-    return proba, pred_class
+    proba, labels = predict_batch(model, input_data, threshold=threshold)
+    return float(proba[0]), int(labels[0])
 
 
 # -------------------- 📁 MODEL COMPARISON DATA -------------------- #
@@ -154,16 +257,14 @@ def load_model_comparison_df():
     """
     Loads the saved MLflow model comparison DataFrame.
 
+    Served from the shared `results_store` cache (do not mutate the result).
+
     Returns:
         pd.DataFrame: Experiment results containing Accuracy, F1 Score, etc.
     """
-    current_dir = os.path.dirname(os.path.abspath(__file__))
-    data_path = os.path.normpath(os.path.join(current_dir, "..", "mlruns", "final_model_comparisons.pkl"))
+    from results_store import results_df
 
-    if not os.path.exists(data_path):
-        raise FileNotFoundError(f"File not found at: {data_path}")
-    
-    return joblib.load(data_path)
+    return results_df()
 
 
 # -------------------- 🎯 METRICS FORMATTER -------------------- #
@@ -0,0 +1,99 @@
+# what_if.py
+#
+# "What-if" sensitivity sweeps for the predictor page. Around one submitted
+# input, every age (18–100) is crossed with systolic BP (80–200 in steps of 5,
+# plus the submitted value) and a range of BMI changes; the whole grid is
+# scored in a single predict_proba call (then calibrated, see calibration.py)
+# and memoized per (input, model version, calibration), so moving the page's
+# secondary controls only slices the result.
+
+import time
+from dataclasses import dataclass
+from functools import lru_cache
+
+import numpy as np
+
+from calibration import get_calibration
+from feature_schema import SCHEMA_BY_NAME
+from instrumentation import observe
+from model_registry import get_predictor, predictor_version
+from utils import FEATURE_LIST
+
+
+SWEEP_CACHE_SIZE = 256
+BP_STEP = 5
+BMI_OFFSETS = tuple(range(-10, 6))  # BMI changes offered by the panel
+
+_AGE, _BP, _BMI = (FEATURE_LIST.index(name) for name in ("age_years", "systolic_bp", "bmi"))
+
+
+@dataclass(frozen=True)
+class Sweep:
+    """Risk over the what-if grid; `risk[k, i, j]` is BMI offset k, BP i, age j."""
+    ages: np.ndarray
+    bps: np.ndarray
+    bmi_offsets: np.ndarray
+    bmis: np.ndarray         # Submitted BMI + offset, clipped to the valid range
+    risk: np.ndarray
+    seconds: float           # Time of the single predict_proba call (+ calibration)
+
+    @property
+    def rows(self):
+        return self.risk.size
+
+
+def sweep_axes(row):
+    """Returns the (ages, BPs, BMI offsets, BMIs) axes of the grid around `row`."""
+    age, bp, bmi = SCHEMA_BY_NAME["age_years"], SCHEMA_BY_NAME["systolic_bp"], SCHEMA_BY_NAME["bmi"]
+    ages = np.arange(age.low, age.high + 1)
+    bps = np.union1d(np.arange(bp.low, bp.high + 1, BP_STEP), [row[_BP]])
+    offsets = np.array(BMI_OFFSETS, dtype=np.float64)
+    bmis = np.clip(row[_BMI] + offsets, bmi.low, bmi.high)
+    return ages, bps, offsets, bmis
+
+
+def sweep_inputs(row):
+    """
+    Builds the (n_bmi * n_bp * n_age, 7) float32 grid around `row`, age varying fastest.
+    """
+    ages, bps, _, bmis = sweep_axes(row)
+    shape = (len(bmis), len(bps), len(ages))
+    X = np.empty(shape + (len(FEATURE_LIST),), dtype=np.float32)
+    X[...] = np.asarray(row, dtype=np.float32)
+    X[..., _AGE] = ages[None, None, :]
+    X[..., _BP] = bps[None, :, None]
+    X[..., _BMI] = bmis[:, None, None]
+    return X.reshape(-1, len(FEATURE_LIST))
+
+
+@lru_cache(maxsize=SWEEP_CACHE_SIZE)
+def _sweep_cached(row, version, calibration_version):
+    ages, bps, offsets, bmis = sweep_axes(row)
+    X = sweep_inputs(row)
+    start = time.perf_counter()
+    risk = get_calibration().apply(get_predictor().predict_proba(X)[:, 1])
+    seconds = time.perf_counter() - start
+    observe("what_if.sweep", seconds)
+    risk = risk.astype(np.float32).reshape(len(bmis), len(bps), len(ages))
+    for array in (ages, bps, offsets, bmis, risk):
+        array.setflags(write=False)  # Shared between sessions
+    return Sweep(ages, bps, offsets, bmis, risk, seconds=seconds)
+
+
+def what_if_sweep(row):
+    """
+    Returns the calibrated what-if `Sweep` around one canonical input row, memoized
+    per model and calibration version.
+
+    Args:
+        row (tuple): One input in `FEATURE_LIST` order (e.g. `prediction_cache.canonical_key`).
+
+    Returns:
+        Sweep: Read-only grid axes and risk values.
+    """
+    return _sweep_cached(tuple(row), predictor_version(), get_calibration().version)
+
+
+def sweep_cache_info():
+    """Returns hit/miss statistics of the sweep cache."""
+    return _sweep_cached.cache_info()